@@ -1,12 +1,43 @@
 # app.py
-from flask import Flask
-from routes import api_routes
+from flask import Flask, Response, abort, render_template
+from routes import api_routes, analytics_charts
+from utils.fast_json import FastJSONProvider
+from utils import timing
+from utils.log_config import configure_logging, install_request_logging
 
-app = Flask(__name__)
 
-#  register the API routes blueprint
-app.register_blueprint(api_routes, url_prefix='/api')
+def analytics_dashboard():
+    """dashboard page; the browser fetches each chart image separately"""
+    return render_template('analytics.html', charts=analytics_charts())
+
+
+def metrics():
+    """prometheus scrape endpoint for the timing histograms; 404 while timing is disabled"""
+    if not timing.TIMING_ENABLED:
+        abort(404)
+    return Response(timing.render_metrics(), mimetype='text/plain; version=0.0.4')
+
+
+def create_app():
+    """
+    Builds the flask app. Nothing here touches the network or disk: services,
+    the snowflake pool and the rate limit store are created on first use.
+    """
+    configure_logging()
+
+    app = Flask(__name__)
+    app.json = FastJSONProvider(app)
+    install_request_logging(app)
+    timing.install_timing(app)
+
+    #  register the API routes blueprint
+    app.register_blueprint(api_routes, url_prefix='/api')
+    app.add_url_rule('/analytics', view_func=analytics_dashboard)
+    app.add_url_rule('/metrics', view_func=metrics)
+    return app
+
+
+app = create_app()
 
 if __name__ == "__main__":
     app.run(debug=True)
-
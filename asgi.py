@@ -0,0 +1,222 @@
+# asgi.py
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import sys
+import time
+from urllib.parse import parse_qs
+
+from a2wsgi import WSGIMiddleware
+
+from app import app as flask_app
+from routes import (
+    GUIDE_TYPES, RATE_LIMIT_BACKEND, RATE_LIMIT_MESSAGE, cache_control, check_rate_limit, client_key,
+    error_body, pagination_error, success_body, valid_id
+)
+from utils import timing
+from utils.fast_json import make_encoder
+from utils.lazy import lazy_module
+from utils.log_config import log_request
+
+# serve with `uvicorn asgi:app`. The perenual proxy routes below run as coroutines on the
+# server's event loop, so one worker keeps hundreds of upstream calls in flight instead of
+# holding a thread per call. Every other route is the flask app, run on a thread pool.
+perenual_async_service = lazy_module('services.perenual_async_service')
+perenual_service = lazy_module('services.perenual_service')
+plant_service = lazy_module('services.plant_service')
+
+# threads for the routes that still run through flask
+ASGI_WSGI_THREADS = int(os.getenv('ASGI_WSGI_THREADS', 10))
+
+logger = logging.getLogger(__name__)
+encode_json = make_encoder()
+flask_asgi = WSGIMiddleware(flask_app, workers=ASGI_WSGI_THREADS)
+
+
+class Request:
+    """the parts of an asgi http scope the proxy routes read"""
+
+    def __init__(self, scope):
+        self.method = scope['method']
+        self.headers = {name.decode('latin-1'): value.decode('latin-1')
+                        for name, value in scope['headers']}
+        query = parse_qs(scope['query_string'].decode('latin-1'))
+        self.args = {name: values[0] for name, values in query.items()}
+        self.client = scope.get('client')
+
+    def int_arg(self, name, default):
+        """like flask's request.args.get(name, default, type=int)"""
+        try:
+            return int(self.args[name])
+        except (KeyError, ValueError):
+            return default
+
+    def rate_limit_key(self):
+        return client_key(self.headers.get('x-api-key'), self.client[0] if self.client else None)
+
+
+_routes = []
+
+def route(path, cache=None):
+    """
+    registers an async proxy route under /api. Handlers return (status, data or
+    error message), optionally followed by extra headers, and get the same rate
+    limit, id validation, response envelope and http caching as their flask
+    twins in routes.py.
+    """
+    def decorator(handler):
+        _routes.append((re.compile(f'^/api{path}$'), handler, cache))
+        return handler
+    return decorator
+
+
+@route(r'/plants/fetch', cache={'max_age': 3600, 'stale_while_revalidate': 600})
+async def fetch_species(request):
+    page = request.int_arg('page', 1)
+    error = pagination_error(page, request.int_arg('per_page', 10))
+    if error:
+        return 400, error
+    species_data = await perenual_async_service.fetch_species_list(page)
+    if not species_data:
+        return 404, 'No data found'
+    # read-ahead runs on its own threads, so queueing it never blocks the loop
+    perenual_service.prefetch_species_pages(request.rate_limit_key(), page)
+    return 200, {'count': len(species_data), 'page': page, 'plants': species_data}
+
+
+@route(r'/plants/perenual/(\d+)', cache={'max_age': 86400, 'stale_while_revalidate': 3600})
+async def get_plant(request, plant_id):
+    plant_data = await perenual_async_service.fetch_plant_details_by_id(plant_id)
+    if not plant_data:
+        return 404, f'Plant with ID {plant_id} not found'
+    return 200, plant_data
+
+
+@route(r'/plants/perenual/(\d+)/diseases', cache={'max_age': 86400, 'stale_while_revalidate': 3600})
+async def get_plant_diseases(request, species_id):
+    diseases_data = await perenual_async_service.fetch_plant_diseases(species_id)
+    return 200, {'species_id': species_id, 'diseases': diseases_data}
+
+
+@route(r'/plants/perenual/(\d+)/guides', cache={'max_age': 86400, 'stale_while_revalidate': 3600})
+async def get_plant_guides(request, species_id):
+    guide_type = request.args.get('type')
+    if guide_type and guide_type not in GUIDE_TYPES:
+        return 400, 'Invalid guide type'
+    guides_data = await perenual_async_service.fetch_plant_guides(species_id, guide_type)
+    return 200, {'species_id': species_id, 'guide_type': guide_type, 'guides': guides_data}
+
+
+@route(r'/plants/perenual/(\d+)/full', cache={'max_age': 86400, 'stale_while_revalidate': 3600})
+async def get_plant_page(request, plant_id):
+    guide_type = request.args.get('type')
+    if guide_type and guide_type not in GUIDE_TYPES:
+        return 400, 'Invalid guide type'
+    include_local = request.args.get('local', 'false').lower() in ('1', 'true', 'yes')
+    status, page = await perenual_async_service.fetch_plant_page(
+        plant_id, guide_type, plant_service.get_plant_by_any_id if include_local else None)
+    if status == 200 and page['partial']:
+        return status, page, {'Cache-Control': 'no-store'}
+    return status, page
+
+
+@route(r'/plants/perenual/random')
+async def get_random_plant(request):
+    plant_data = await perenual_async_service.fetch_random_plant()
+    if not plant_data:
+        return 404, 'Failed to fetch random plant'
+    return 200, plant_data
+
+
+def _etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+    return '*' in tags or etag in tags
+
+
+async def _check_rate_limit(request):
+    if RATE_LIMIT_BACKEND == 'memory':
+        return check_rate_limit(request.rate_limit_key())
+    # the shared store is a sqlite file, which must not block the loop
+    return await asyncio.to_thread(check_rate_limit, request.rate_limit_key())
+
+
+async def dispatch(request, handler, ids, cache):
+    """runs one proxy route and returns (status, headers, body)"""
+    allowed, headers = await _check_rate_limit(request)
+    if not allowed:
+        status, body = 429, error_body(RATE_LIMIT_MESSAGE, 429)
+    elif not all(valid_id(value) for value in ids):
+        status, body = 400, error_body('Invalid ID value', 400)
+    else:
+        try:
+            status, result, *extra_headers = await handler(request, *ids)
+            for extra in extra_headers:
+                headers.update(extra)
+        except Exception as e:
+            logger.error("Error in %s: %s", handler.__name__, e, exc_info=True)
+            status, result = 500, str(e)
+        body = (error_body(result, status) if status >= 400
+                else success_body(result, cacheable=cache is not None))
+
+    with timing.timer(timing.JSON_ENCODE_SECONDS, 'json'):
+        content = f"{encode_json(body)}\n".encode('utf-8')
+    headers['Content-Type'] = 'application/json'
+    if cache is not None and status == 200:
+        etag = f'"{hashlib.sha256(content).hexdigest()}"'
+        headers['ETag'] = etag
+        headers.setdefault('Cache-Control', cache_control(**cache))
+        if _etag_matches(request.headers.get('if-none-match'), etag):
+            status, content = 304, b''
+    return status, headers, content
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            if 'services.perenual_async_service' in sys.modules:
+                await perenual_async_service.aclose()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        return await _lifespan(receive, send)
+
+    if scope['type'] == 'http' and scope['method'] in ('GET', 'HEAD'):
+        for pattern, handler, cache in _routes:
+            match = pattern.match(scope['path'])
+            if match:
+                started = time.perf_counter()
+                request = Request(scope)
+                token = timing.start_request() if timing.TIMING_ENABLED else None
+                status, headers, content = await dispatch(
+                    request, handler, [int(value) for value in match.groups()], cache)
+                if token is not None:
+                    elapsed = time.perf_counter() - started
+                    timing.REQUEST_SECONDS.observe(elapsed, f'asgi.{handler.__name__}', request.method, str(status))
+                    server_timing = timing.end_request(token, elapsed)
+                    if server_timing:
+                        headers['Server-Timing'] = server_timing
+                if content:
+                    headers['Content-Length'] = str(len(content))
+                await send({
+                    'type': 'http.response.start',
+                    'status': status,
+                    'headers': [(name.encode('latin-1'), value.encode('latin-1'))
+                                for name, value in headers.items()],
+                })
+                await send({'type': 'http.response.body',
+                            'body': content if request.method == 'GET' else b''})
+                log_request(f'asgi.{handler.__name__}', request.method, scope['path'], status,
+                            (time.perf_counter() - started) * 1000, request.client and request.client[0])
+                return
+
+    await flask_asgi(scope, receive, send)
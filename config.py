@@ -17,3 +17,17 @@ SNOWFLAKE_ACCOUNT = os.getenv('SNOWFLAKE_ACCOUNT')
 SNOWFLAKE_WAREHOUSE = os.getenv('SNOWFLAKE_WAREHOUSE')
 SNOWFLAKE_DATABASE = os.getenv('SNOWFLAKE_DATABASE')
 SNOWFLAKE_SCHEMA = os.getenv('SNOWFLAKE_SCHEMA')
+
+# snowflake connection pool
+DB_POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE', 10))
+DB_POOL_MAX_IDLE = float(os.getenv('DB_POOL_MAX_IDLE', 300))  # seconds
+DB_POOL_MAX_LIFETIME = float(os.getenv('DB_POOL_MAX_LIFETIME', 3600))  # seconds
+DB_POOL_CHECKOUT_TIMEOUT = float(os.getenv('DB_POOL_CHECKOUT_TIMEOUT', 30))  # seconds
+DB_POOL_PING_INTERVAL = float(os.getenv('DB_POOL_PING_INTERVAL', 30))  # seconds
+
+# batched plant writes
+PLANT_INSERT_ROWS_PER_STATEMENT = int(os.getenv('PLANT_INSERT_ROWS_PER_STATEMENT', 100))
+PLANT_STAGE_THRESHOLD_ROWS = int(os.getenv('PLANT_STAGE_THRESHOLD_ROWS', 2000))
+
+# streamed exports fetch this many rows per round trip
+PLANT_EXPORT_FETCH_SIZE = int(os.getenv('PLANT_EXPORT_FETCH_SIZE', 1000))
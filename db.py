@@ -1,8 +1,16 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
 import snowflake.connector
 from config import (
     SNOWFLAKE_USER, SNOWFLAKE_PASSWORD, SNOWFLAKE_ACCOUNT,
-    SNOWFLAKE_WAREHOUSE, SNOWFLAKE_DATABASE, SNOWFLAKE_SCHEMA
+    SNOWFLAKE_WAREHOUSE, SNOWFLAKE_DATABASE, SNOWFLAKE_SCHEMA,
+    DB_POOL_MAX_SIZE, DB_POOL_MAX_IDLE, DB_POOL_MAX_LIFETIME,
+    DB_POOL_CHECKOUT_TIMEOUT, DB_POOL_PING_INTERVAL
 )
+from utils import timing
 
 def get_connection():
     """
@@ -23,6 +31,294 @@ def get_connection():
         print(f"Error establishing Snowflake connection: {e}")
         raise
 
+class PoolTimeout(Exception):
+    """raised when no pooled connection frees up within the checkout timeout"""
+
+
+class _PooledConnection:
+    """bookkeeping wrapper around a raw DB-API connection"""
+    __slots__ = ('raw', 'created_at', 'last_used')
+
+    def __init__(self, raw):
+        now = time.monotonic()
+        self.raw = raw
+        self.created_at = now
+        self.last_used = now
+
+
+def _ping(conn):
+    """cheap liveness check run against connections that sat idle for a while"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT 1")
+        cursor.fetchone()
+    finally:
+        cursor.close()
+
+
+class ConnectionPool:
+    """
+    Thread-safe, bounded pool of DB-API connections.
+
+    `connect` is any zero-argument callable returning a DB-API connection, so the
+    pool works the same against Snowflake and a local stand-in such as sqlite3.
+    Idle connections older than `max_idle` seconds are evicted, connections older
+    than `max_lifetime` seconds are recycled, and connections idle for longer than
+    `ping_interval` seconds are health checked before being handed out.
+    """
+
+    def __init__(self, connect, max_size=10, max_idle=300, max_lifetime=3600,
+                 checkout_timeout=30, ping_interval=30, health_check=_ping):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self._connect = connect
+        self.max_size = max_size
+        self.max_idle = max_idle
+        self.max_lifetime = max_lifetime
+        self.checkout_timeout = checkout_timeout
+        self.ping_interval = ping_interval
+        self._health_check = health_check
+
+        self._idle = deque()
+        self._in_use = 0
+        self._closed = False
+        self._cond = threading.Condition(threading.Lock())
+        self._stats = {
+            'checkouts': 0,
+            'checkout_waits': 0,
+            'checkout_timeouts': 0,
+            'checkout_wait_total': 0.0,
+            'checkout_wait_max': 0.0,
+            'created': 0,
+            'evicted_idle': 0,
+            'recycled': 0,
+            'failed_health_checks': 0,
+        }
+        self._leases = {}
+
+    # internal helpers
+
+    def _expired(self, entry, now):
+        return (now - entry.created_at > self.max_lifetime
+                or now - entry.last_used > self.max_idle)
+
+    def _discard(self, entry):
+        try:
+            entry.raw.close()
+        except Exception:
+            pass
+
+    def _record_wait(self, waited):
+        self._stats['checkout_wait_total'] += waited
+        if waited > self._stats['checkout_wait_max']:
+            self._stats['checkout_wait_max'] = waited
+
+    # public api
+
+    def acquire(self, timeout=None):
+        """borrows a connection, blocking up to `timeout` seconds for a free slot"""
+        timeout = self.checkout_timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+        waited_once = False
+
+        while True:
+            stale = []
+            entry = None
+            create = False
+            with self._cond:
+                if self._closed:
+                    raise RuntimeError("Connection pool is closed")
+                now = time.monotonic()
+                while self._idle:
+                    candidate = self._idle.pop()
+                    if self._expired(candidate, now):
+                        stale.append(candidate)
+                        if now - candidate.created_at > self.max_lifetime:
+                            self._stats['recycled'] += 1
+                        else:
+                            self._stats['evicted_idle'] += 1
+                        continue
+                    entry = candidate
+                    break
+                if entry is None and self._in_use + len(self._idle) < self.max_size:
+                    create = True
+                if entry is not None or create:
+                    self._in_use += 1
+                    self._stats['checkouts'] += 1
+                    self._record_wait(now - started)
+                else:
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        self._stats['checkout_timeouts'] += 1
+                        self._record_wait(now - started)
+                        raise PoolTimeout(
+                            f"Timed out after {timeout}s waiting for a database connection")
+                    if not waited_once:
+                        self._stats['checkout_waits'] += 1
+                        waited_once = True
+                    self._cond.wait(remaining)
+
+            for old in stale:
+                self._discard(old)
+
+            if entry is None and not create:
+                continue
+
+            try:
+                if create:
+                    entry = _PooledConnection(self._connect())
+                    with self._cond:
+                        self._stats['created'] += 1
+                elif (self._health_check is not None
+                      and time.monotonic() - entry.last_used > self.ping_interval):
+                    try:
+                        self._health_check(entry.raw)
+                    except Exception:
+                        self._discard(entry)
+                        with self._cond:
+                            self._stats['failed_health_checks'] += 1
+                        entry = _PooledConnection(self._connect())
+                        with self._cond:
+                            self._stats['created'] += 1
+            except Exception:
+                with self._cond:
+                    self._in_use -= 1
+                    self._cond.notify()
+                raise
+
+            with self._cond:
+                self._leases[id(entry.raw)] = entry
+            return entry.raw
+
+    def release(self, conn, discard=False):
+        """returns a borrowed connection; `discard` closes it instead of reusing it"""
+        with self._cond:
+            entry = self._leases.pop(id(conn), None)
+            if entry is None:
+                raise ValueError("Connection was not checked out from this pool")
+            self._in_use -= 1
+            now = time.monotonic()
+            keep = not (discard or self._closed
+                        or now - entry.created_at > self.max_lifetime)
+            if keep:
+                entry.last_used = now
+                self._idle.append(entry)
+            elif not discard and not self._closed:
+                self._stats['recycled'] += 1
+            self._cond.notify()
+        if not keep:
+            self._discard(entry)
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """
+        Context manager that borrows a connection and always hands it back.
+        The transaction is rolled back on error; connections that cannot even
+        roll back are assumed broken and closed rather than returned.
+        """
+        conn = self.acquire(timeout)
+        broken = False
+        try:
+            yield conn
+        except Exception:
+            try:
+                conn.rollback()
+            except Exception:
+                broken = True
+            raise
+        finally:
+            self.release(conn, discard=broken)
+
+    def close(self):
+        """closes idle connections; borrowed ones are closed when released"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = list(self._idle), deque()
+            self._cond.notify_all()
+        for entry in idle:
+            self._discard(entry)
+
+    def stats(self):
+        """snapshot of pool size and checkout metrics"""
+        with self._cond:
+            snapshot = dict(self._stats)
+            snapshot['in_use'] = self._in_use
+            snapshot['idle'] = len(self._idle)
+            snapshot['max_size'] = self.max_size
+        checkouts = snapshot['checkouts'] + snapshot['checkout_timeouts']
+        snapshot['checkout_wait_avg'] = (
+            snapshot['checkout_wait_total'] / checkouts if checkouts else 0.0)
+        return snapshot
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """lazily creates the process-wide Snowflake connection pool"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    get_connection,
+                    max_size=DB_POOL_MAX_SIZE,
+                    max_idle=DB_POOL_MAX_IDLE,
+                    max_lifetime=DB_POOL_MAX_LIFETIME,
+                    checkout_timeout=DB_POOL_CHECKOUT_TIMEOUT,
+                    ping_interval=DB_POOL_PING_INTERVAL
+                )
+    return _pool
+
+def pooled_connection(timeout=None, operation='other'):
+    """
+    borrows a connection from the shared pool for the duration of a `with` block.
+    `operation` names the caller in the query timing metrics.
+    """
+    if timing.TIMING_ENABLED:
+        return _timed_connection(timeout, operation)
+    return get_pool().connection(timeout)
+
+class _TimedCursor:
+    """cursor proxy that times execute() under the operation its connection was borrowed for"""
+
+    def __init__(self, cursor, operation):
+        self._cursor = cursor
+        self._operation = operation
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def execute(self, *args, **kwargs):
+        with timing.timer(timing.DB_QUERY_SECONDS, 'db-query', self._operation):
+            return self._cursor.execute(*args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        with timing.timer(timing.DB_QUERY_SECONDS, 'db-query', self._operation):
+            return self._cursor.executemany(*args, **kwargs)
+
+class _TimedConnection:
+    def __init__(self, conn, operation):
+        self._conn = conn
+        self._operation = operation
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def cursor(self, *args, **kwargs):
+        return _TimedCursor(self._conn.cursor(*args, **kwargs), self._operation)
+
+@contextmanager
+def _timed_connection(timeout, operation):
+    started = time.perf_counter()
+    with get_pool().connection(timeout) as conn:
+        timing.record(timing.DB_CHECKOUT_SECONDS, 'db-checkout', time.perf_counter() - started)
+        yield _TimedConnection(conn, operation)
+
 def create_tables():
     conn = get_connection()
     cursor = conn.cursor()
@@ -86,7 +382,8 @@ def create_tables():
                 maintenance STRING,
                 plant_anatomy ARRAY,
                 seeds INTEGER,
-                other_images STRING
+                other_images STRING,
+                content_hash STRING
             );
         """)
 
@@ -102,8 +399,24 @@ def create_tables():
         cursor.close()
         conn.close()
 
+def migrate_tables():
+    """brings an existing plants table up to date without dropping its rows"""
+    with pooled_connection(operation='migrate_tables') as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute("ALTER TABLE plants ADD COLUMN IF NOT EXISTS content_hash STRING")
+            conn.commit()
+            print("Successfully migrated tables.")
+        finally:
+            cursor.close()
+
 if __name__ == "__main__":
+    import sys
     try:
-        create_tables()
+        # `python db.py migrate` upgrades in place; plain `python db.py` recreates the table
+        if sys.argv[1:] == ['migrate']:
+            migrate_tables()
+        else:
+            create_tables()
     except Exception as e:
         print(f"Failed to create tables: {e}")
\ No newline at end of file
@@ -0,0 +1,168 @@
+# loadtest.py
+import argparse
+import asyncio
+import json
+import logging
+import os
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from socketserver import ThreadingMixIn
+
+# Compares the threaded flask app with the asgi entry point on the perenual proxy routes.
+# Both servers talk to a local mock of perenual that answers after a fixed delay, and
+# every request asks for a different plant so nothing is answered from cache.
+#
+#   python loadtest.py --latency 0.2 --requests 2000 --concurrency 200 --threads 8
+#
+# The threaded server gets a fixed pool of --threads, like that many sync workers.
+
+API_KEY = 'loadtest'
+
+
+def mock_perenual(latency):
+    """asgi app answering species details after `latency` seconds"""
+    async def app(scope, receive, send):
+        if scope['type'] != 'http':
+            return
+        await asyncio.sleep(latency)
+        plant_id = int(scope['path'].rsplit('/', 1)[-1] or 0) if scope['path'][-1:].isdigit() else 0
+        body = json.dumps({'id': plant_id, 'common_name': f'Plant {plant_id}',
+                           'scientific_name': [f'Plantae {plant_id}'], 'cycle': 'Perennial',
+                           'watering': 'Average', 'sunlight': ['full sun']}).encode('utf-8')
+        await send({'type': 'http.response.start', 'status': 200,
+                    'headers': [(b'content-type', b'application/json')]})
+        await send({'type': 'http.response.body', 'body': body})
+    return app
+
+
+def serve_threaded(port, threads):
+    from werkzeug.serving import BaseWSGIServer
+
+    from app import app
+
+    class PooledWSGIServer(ThreadingMixIn, BaseWSGIServer):
+        request_queue_size = 1024
+
+        def process_request(self, request, client_address):
+            pool.submit(self.process_request_thread, request, client_address)
+
+    pool = ThreadPoolExecutor(threads)
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    PooledWSGIServer('127.0.0.1', port, app).serve_forever()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"nothing listening on port {port}")
+
+
+def start(args, env=None):
+    return subprocess.Popen([sys.executable, *args], env=env, cwd=os.path.dirname(os.path.abspath(__file__)))
+
+
+async def drive(port, requests, concurrency, first_id):
+    """fires `requests` GETs with at most `concurrency` in flight; returns (seconds, latencies, errors)"""
+    import httpx
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async with httpx.AsyncClient(base_url=f'http://127.0.0.1:{port}', limits=limits, timeout=120,
+                                 headers={'X-API-Key': API_KEY}) as client:
+        async def one(plant_id):
+            nonlocal errors
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    response = await client.get(f'/api/plants/perenual/{plant_id}')
+                    ok = response.status_code == 200
+                except Exception:
+                    ok = False
+                latencies.append(time.perf_counter() - started)
+                errors += not ok
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(first_id + i) for i in range(requests)))
+        return time.perf_counter() - started, sorted(latencies), errors
+
+
+def report(label, seconds, latencies, errors):
+    def pct(p):
+        return latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))] * 1000
+
+    print(f"{label:<22} {len(latencies) / seconds:9.1f} req/s   p50 {pct(50):7.1f} ms   "
+          f"p95 {pct(95):7.1f} ms   p99 {pct(99):7.1f} ms   errors {errors}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='load test the perenual proxy routes, threaded vs asgi')
+    parser.add_argument('--latency', type=float, default=0.2, help='mock perenual delay in seconds')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=200)
+    parser.add_argument('--threads', type=int, default=8, help='threads for the flask server')
+    parser.add_argument('--serve-mock', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--serve-threaded', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve_mock:
+        import uvicorn
+        uvicorn.run(mock_perenual(args.latency), port=args.serve_mock, log_level='warning',
+                    access_log=False)
+        return
+    if args.serve_threaded:
+        serve_threaded(args.serve_threaded, args.threads)
+        return
+
+    mock_port, threaded_port, asgi_port = free_port(), free_port(), free_port()
+    env = dict(
+        os.environ,
+        PERENUAL_API_BASE_URL=f'http://127.0.0.1:{mock_port}',
+        PERENUAL_API_KEY=API_KEY,
+        # no quota, no retries and no cache, so every request is one upstream round trip
+        PERENUAL_MAX_RPS='1000000', PERENUAL_BURST='1000000', PERENUAL_MAX_RETRIES='0',
+        PERENUAL_CACHE_PATH='', PERENUAL_USAGE_PATH='',
+        RATE_LIMIT_KEY_QUOTAS=json.dumps({API_KEY: 10 ** 9}),
+        PERENUAL_POOL_SIZE=str(args.threads),
+    )
+    servers = [
+        start([__file__, '--serve-mock', str(mock_port), '--latency', str(args.latency)]),
+        start([__file__, '--serve-threaded', str(threaded_port), '--threads', str(args.threads)], env),
+        start(['-m', 'uvicorn', 'asgi:app', '--port', str(asgi_port), '--log-level', 'warning',
+               '--no-access-log'], env),
+    ]
+    try:
+        for port in (mock_port, threaded_port, asgi_port):
+            wait_for_port(port)
+        print(f"{args.requests} requests, {args.concurrency} concurrent, "
+              f"upstream latency {args.latency * 1000:.0f} ms")
+        # each run asks for ids the other has not, so neither is served from the other's cache
+        report(f"flask, {args.threads} threads",
+               *asyncio.run(drive(threaded_port, args.requests, args.concurrency, 1)))
+        report("asgi, 1 worker",
+               *asyncio.run(drive(asgi_port, args.requests, args.concurrency, args.requests + 1)))
+    finally:
+        for server in servers:
+            server.terminate()
+        for server in servers:
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -41,8 +41,15 @@ class Plant(Base):
         return f"<Plant(id={self.id}, common_name='{self.common_name}', scientific_name='{self.scientific_name}')>"
 
 DATABASE_URL = 'sqlite:///plants.db'  # change for production Snowflake usage
-engine = create_engine(DATABASE_URL)
-Base.metadata.create_all(engine)
-
-Session = sessionmaker(bind=engine)
-session = Session()
+_engine = None
+
+def get_engine():
+    """creates the engine and its tables on first use rather than at import"""
+    global _engine
+    if _engine is None:
+        _engine = create_engine(DATABASE_URL)
+        Base.metadata.create_all(_engine)
+    return _engine
+
+def get_session():
+    return sessionmaker(bind=get_engine())()
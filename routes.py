@@ -1,62 +1,103 @@
 # routes.py
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, make_response, g, send_file, url_for
 from functools import wraps
 from marshmallow import ValidationError
-from cachelib import SimpleCache
+import hashlib
+import json
+import os
+import re
+import threading
 import time
-from services.plant_service import (
-    add_plant,
-    find_all_plants_with_pagination,
-    get_plant_by_any_id,
-    update_plant_details,
-    remove_plant_from_db
-)
-from services.perenual_service import (
-    fetch_species_list,
-    fetch_plant_details_by_id,
-    fetch_plant_diseases,
-    fetch_plant_guides,
-    fetch_random_plant
-)
+from utils.lazy import lazy_module
+from utils.rate_limit import create_backend
 import logging
 
-# setup basic route config and logging
+# services pull in snowflake, pandas and requests; they load on first use so the app starts fast
+plant_service = lazy_module('services.plant_service')
+perenual_service = lazy_module('services.perenual_service')
+ingest_service = lazy_module('services.ingest_service')
+export_service = lazy_module('services.export_service')
+analytics_service = lazy_module('services.analytics_service')
+chart_service = lazy_module('services.chart_service')
+
+# setup basic route config and logging; handlers are configured once by the app factory
 api_routes = Blueprint('api', __name__)
-cache = SimpleCache()
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
-# requests per IP address - adjust based on API tier
+# requests per client - adjust based on API tier
 RATE_LIMIT = 100  # per minute
 RATE_LIMIT_PERIOD = 60  # seconds
+RATE_LIMIT_MESSAGE = 'Rate limit exceeded. Please try again later.'
 
-def rate_limit(func):
-    """tracks and limits API requests per IP address using simple cache"""
-    @wraps(func)
-    def wrapper(*args, **kwargs):
-        client_ip = request.remote_addr
-        key = f'rate_limit_{client_ip}'
-        
-        requests = cache.get(key) or []
-        now = time.time()
-        
-        # remove expired timestamps
-        requests = [req for req in requests if req > now - RATE_LIMIT_PERIOD]
-        
-        if len(requests) >= RATE_LIMIT:
-            return create_error_response(
-                'Rate limit exceeded. Please try again later.',
-                429,
-                {'X-RateLimit-Limit': RATE_LIMIT,
-                 'X-RateLimit-Remaining': 0,
-                 'X-RateLimit-Reset': int(min(requests) + RATE_LIMIT_PERIOD - now)}
-            )
-        
-        requests.append(now)
-        cache.set(key, requests, timeout=RATE_LIMIT_PERIOD)
-        
-        return func(*args, **kwargs)
-    return wrapper
+# 'memory' limits per worker; 'sqlite' shares one budget across every worker on the host
+RATE_LIMIT_BACKEND = os.getenv('RATE_LIMIT_BACKEND', 'memory')
+RATE_LIMIT_DB_PATH = os.getenv('RATE_LIMIT_DB_PATH', 'rate_limits.db')
+# per-client overrides keyed by X-API-Key, e.g. '{"partner-key": 1000}'
+RATE_LIMIT_KEY_QUOTAS = json.loads(os.getenv('RATE_LIMIT_KEY_QUOTAS', '{}'))
+
+_limiter_backend = None
+_limiter_lock = threading.Lock()
+
+def get_limiter_backend():
+    """creates the rate limit store on first use; the sqlite backend opens its file then"""
+    global _limiter_backend
+    if _limiter_backend is None:
+        with _limiter_lock:
+            if _limiter_backend is None:
+                _limiter_backend = create_backend(RATE_LIMIT_BACKEND, RATE_LIMIT_DB_PATH)
+    return _limiter_backend
+
+def client_key(api_key, remote_addr):
+    """
+    the rate limit bucket for a caller. only keys listed in RATE_LIMIT_KEY_QUOTAS
+    get their own bucket; any other X-API-Key is ignored, so a client cannot
+    mint a fresh budget by sending a new random key with every request.
+    """
+    if api_key and api_key in RATE_LIMIT_KEY_QUOTAS:
+        return f'key:{api_key}'
+    return f'ip:{remote_addr}'
+
+def rate_limit_key():
+    """identifies the caller by a known api key, otherwise by ip address"""
+    return client_key(request.headers.get('X-API-Key'), request.remote_addr)
+
+def check_rate_limit(client, limit=None, period=RATE_LIMIT_PERIOD, scope='global'):
+    """counts one request for `client`; returns (allowed, X-RateLimit-* headers)"""
+    quota = limit or RATE_LIMIT
+    # a key's quota raises the shared budget only; per-route limits such as bulk ingest stay as set
+    if scope == 'global' and client.startswith('key:'):
+        quota = RATE_LIMIT_KEY_QUOTAS.get(client[4:], quota)
+
+    result = get_limiter_backend().hit(f'{scope}:{client}', quota, period)
+    headers = {'X-RateLimit-Limit': str(result.limit),
+               'X-RateLimit-Remaining': str(result.remaining),
+               'X-RateLimit-Reset': str(result.reset)}
+    if not result.allowed:
+        headers['Retry-After'] = str(result.reset)
+    return result.allowed, headers
+
+def rate_limit(func=None, *, limit=None, period=RATE_LIMIT_PERIOD, scope='global'):
+    """
+    limits requests per client with a sliding-window counter.
+    use bare for the shared default budget, or as rate_limit(limit=..., scope=...)
+    to give a route its own quota. X-RateLimit-* headers go on every response.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            allowed, headers = check_rate_limit(rate_limit_key(), limit, period, scope)
+            if not allowed:
+                return create_error_response(RATE_LIMIT_MESSAGE, 429, headers)
+
+            response = make_response(view(*args, **kwargs))
+            for key, value in headers.items():
+                response.headers.setdefault(key, value)
+            return response
+        return wrapper
+
+    if func is not None:
+        return decorator(func)
+    return decorator
 
 def validate_pagination_params(func):
     """ensures page and per_page params are within acceptable ranges"""
@@ -65,65 +106,116 @@ def validate_pagination_params(func):
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 10, type=int)
         
-        if page < 1:
-            return create_error_response('Page number must be greater than 0', 400)
-        if per_page < 1 or per_page > 100:
-            return create_error_response('Per page must be between 1 and 100', 400)
+        error = pagination_error(page, per_page)
+        if error:
+            return create_error_response(error, 400)
             
         return func(*args, **kwargs)
     return wrapper
 
+def pagination_error(page, per_page):
+    if page < 1:
+        return 'Page number must be greater than 0'
+    if per_page < 1 or per_page > 100:
+        return 'Per page must be between 1 and 100'
+    return None
+
 def validate_id_param(func):
     """validates plant/species IDs are within valid range"""
     @wraps(func)
     def wrapper(*args, **kwargs):
         plant_id = kwargs.get('plant_id') or kwargs.get('species_id')
-        if plant_id and (plant_id < 1 or plant_id > 1000000):
+        if not valid_id(plant_id):
             return create_error_response('Invalid ID value', 400)
         return func(*args, **kwargs)
     return wrapper
 
-def create_error_response(message, status_code, headers=None):
-    """standardizes error response format across all endpoints"""
-    response = jsonify({
+def valid_id(plant_id):
+    return not plant_id or 1 <= plant_id <= 1000000
+
+def error_body(message, status_code):
+    return {
         'error': str(message),
         'status_code': status_code,
         'timestamp': time.strftime('%Y-%m-%d %H:%M:%S')
-    })
+    }
+
+def create_error_response(message, status_code, headers=None):
+    """standardizes error response format across all endpoints"""
+    response = jsonify(error_body(message, status_code))
     response.status_code = status_code
     if headers:
         for key, value in headers.items():
             response.headers[key] = value
     return response
 
+def http_cache(max_age=0, public=True, stale_while_revalidate=None):
+    """
+    adds a strong etag and a cache-control policy to successful GET responses
+    and answers a matching If-None-Match with 304 Not Modified
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            g.http_cacheable = True
+            response = make_response(view(*args, **kwargs))
+            if request.method != 'GET' or response.status_code not in (200, 304):
+                return response
+            # streamed bodies are not buffered just to hash them
+            if response.status_code == 200 and not response.is_streamed and not response.get_etag()[0]:
+                response.set_etag(hashlib.sha256(response.get_data()).hexdigest())
+            # a view that set its own policy, e.g. no-store for a partial result, keeps it
+            response.headers.setdefault('Cache-Control', cache_control(max_age, public, stale_while_revalidate))
+            return response.make_conditional(request)
+        return wrapper
+    return decorator
+
+def cache_control(max_age=0, public=True, stale_while_revalidate=None):
+    directives = ['public' if public else 'private', f'max-age={max_age}']
+    if stale_while_revalidate:
+        directives.append(f'stale-while-revalidate={stale_while_revalidate}')
+    return ', '.join(directives)
+
 def create_success_response(data, message=None, status_code=200):
-    """standardizes success response format across all endpoints"""
-    response = {
+    """
+    standardizes success response format across all endpoints.
+    cacheable routes leave out the per-second timestamp so identical data
+    serializes to identical bytes (the Date header carries the time instead).
+    """
+    return jsonify(success_body(data, message, status_code, g.get('http_cacheable'))), status_code
+
+def success_body(data, message=None, status_code=200, cacheable=False):
+    body = {
         'status_code': status_code,
-        'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
         'data': data
     }
+    if not cacheable:
+        body['timestamp'] = time.strftime('%Y-%m-%d %H:%M:%S')
     if message:
-        response['message'] = message
+        body['message'] = message
     if isinstance(data, list):
-        response['count'] = len(data)
-    return jsonify(response), status_code
+        body['count'] = len(data)
+    return body
 
 # perenual api routes
+GUIDE_TYPES = ['watering', 'sunlight', 'pruning', 'fertilizer']
 
 @api_routes.route('/plants/fetch', methods=['GET'])
 @rate_limit
+@http_cache(max_age=3600, stale_while_revalidate=600)
 @validate_pagination_params
 def api_fetch_species():
     """fetches paginated plant species list from perenual"""
     try:
         page = request.args.get('page', 1, type=int)
-        logger.debug(f"Request received to fetch species list for page: {page}")
         
-        species_data = fetch_species_list(page)
+        species_data = perenual_service.fetch_species_list(page)
         
         if not species_data:
             return create_error_response('No data found', 404)
+
+        # readers page forward, so the next pages are fetched while this one is read
+        perenual_service.prefetch_species_pages(rate_limit_key(), page)
             
         return create_success_response({
             'count': len(species_data),
@@ -132,17 +224,18 @@ def api_fetch_species():
         })
         
     except Exception as e:
-        logger.error(f"Error in fetching species data: {e}", exc_info=True)
+        logger.error("Error in fetching species data: %s", e, exc_info=True)
         return create_error_response(str(e), 500)
 
 @api_routes.route('/plants/perenual/<int:plant_id>', methods=['GET'])
 @rate_limit
+@http_cache(max_age=86400, stale_while_revalidate=3600)
 @validate_id_param
 def api_get_plant_from_api(plant_id):
     """fetches detailed plant info by ID from perenual"""
     try:
-        logger.info(f"Fetching plant details from Perenual API for ID: {plant_id}")
-        plant_data = fetch_plant_details_by_id(plant_id)
+        logger.info("Fetching plant details from Perenual API for ID: %s", plant_id)
+        plant_data = perenual_service.fetch_plant_details_by_id(plant_id)
         
         if not plant_data:
             return create_error_response(f'Plant with ID {plant_id} not found', 404)
@@ -150,20 +243,21 @@ def api_get_plant_from_api(plant_id):
         return create_success_response(plant_data)
         
     except ValidationError as e:
-        logger.error(f"Validation error for plant ID {plant_id}: {e.messages}")
+        logger.error("Validation error for plant ID %s: %s", plant_id, e.messages)
         return create_error_response(e.messages, 422)
     except Exception as e:
-        logger.error(f"Error fetching plant by ID {plant_id}: {e}", exc_info=True)
+        logger.error("Error fetching plant by ID %s: %s", plant_id, e, exc_info=True)
         return create_error_response(str(e), 500)
 
 @api_routes.route('/plants/perenual/<int:species_id>/diseases', methods=['GET'])
 @rate_limit
+@http_cache(max_age=86400, stale_while_revalidate=3600)
 @validate_id_param
 def api_get_plant_diseases(species_id):
     """fetches disease information for a specific plant species"""
     try:
-        logger.info(f"Fetching diseases for species ID: {species_id}")
-        diseases_data = fetch_plant_diseases(species_id)
+        logger.info("Fetching diseases for species ID: %s", species_id)
+        diseases_data = perenual_service.fetch_plant_diseases(species_id)
         
         return create_success_response({
             'species_id': species_id,
@@ -171,21 +265,22 @@ def api_get_plant_diseases(species_id):
         })
         
     except Exception as e:
-        logger.error(f"Error fetching diseases for species ID {species_id}: {e}", exc_info=True)
+        logger.error("Error fetching diseases for species ID %s: %s", species_id, e, exc_info=True)
         return create_error_response(str(e), 500)
 
 @api_routes.route('/plants/perenual/<int:species_id>/guides', methods=['GET'])
 @rate_limit
+@http_cache(max_age=86400, stale_while_revalidate=3600)
 @validate_id_param
 def api_get_plant_guides(species_id):
     """fetches care guides for a plant species, optionally filtered by guide type"""
     try:
         guide_type = request.args.get('type')
-        if guide_type and guide_type not in ['watering', 'sunlight', 'pruning', 'fertilizer']:
+        if guide_type and guide_type not in GUIDE_TYPES:
             return create_error_response('Invalid guide type', 400)
             
-        logger.info(f"Fetching guides for species ID: {species_id}, type: {guide_type}")
-        guides_data = fetch_plant_guides(species_id, guide_type)
+        logger.info("Fetching guides for species ID: %s, type: %s", species_id, guide_type)
+        guides_data = perenual_service.fetch_plant_guides(species_id, guide_type)
         
         return create_success_response({
             'species_id': species_id,
@@ -194,16 +289,56 @@ def api_get_plant_guides(species_id):
         })
         
     except Exception as e:
-        logger.error(f"Error fetching guides for species ID {species_id}: {e}", exc_info=True)
+        logger.error("Error fetching guides for species ID %s: %s", species_id, e, exc_info=True)
+        return create_error_response(str(e), 500)
+
+@api_routes.route('/plants/perenual/<int:plant_id>/full', methods=['GET'])
+@rate_limit
+@http_cache(max_age=86400, stale_while_revalidate=3600)
+@validate_id_param
+def api_get_plant_page(plant_id):
+    """
+    details, diseases and guides for one plant in a single call, fetched in
+    parallel; ?local=true adds the local database row. parts that fail or time
+    out come back null and are listed under errors.
+    """
+    try:
+        guide_type = request.args.get('type')
+        if guide_type and guide_type not in GUIDE_TYPES:
+            return create_error_response('Invalid guide type', 400)
+        include_local = request.args.get('local', 'false').lower() in ('1', 'true', 'yes')
+
+        status, page = perenual_service.fetch_plant_page(
+            plant_id, guide_type, plant_service.get_plant_by_any_id if include_local else None)
+        if status != 200:
+            return create_error_response(page, status)
+
+        response = make_response(create_success_response(page))
+        if page['partial']:
+            response.headers['Cache-Control'] = 'no-store'
+        return response
+
+    except Exception as e:
+        logger.error("Error fetching plant page for ID %s: %s", plant_id, e, exc_info=True)
         return create_error_response(str(e), 500)
 
+@api_routes.route('/plants/perenual/quota', methods=['GET'])
+def api_get_perenual_quota():
+    """reports remaining perenual budget and outbound call metrics"""
+    return create_success_response(perenual_service.get_quota_stats())
+
+@api_routes.route('/plants/perenual/prefetch', methods=['GET'])
+def api_get_perenual_prefetch():
+    """reports species-list read-ahead activity and its hit rate"""
+    return create_success_response(perenual_service.get_prefetch_stats())
+
 @api_routes.route('/plants/perenual/random', methods=['GET'])
 @rate_limit
 def api_get_random_plant():
     """fetches a random plant from perenual's database"""
     try:
         logger.info("Fetching random plant")
-        plant_data = fetch_random_plant()
+        plant_data = perenual_service.fetch_random_plant()
         
         if not plant_data:
             return create_error_response('Failed to fetch random plant', 404)
@@ -211,7 +346,7 @@ def api_get_random_plant():
         return create_success_response(plant_data)
         
     except Exception as e:
-        logger.error(f"Error fetching random plant: {e}", exc_info=True)
+        logger.error("Error fetching random plant: %s", e, exc_info=True)
         return create_error_response(str(e), 500)
 
 # error handlers
@@ -221,7 +356,7 @@ def not_found_error(error):
 
 @api_routes.errorhandler(500)
 def internal_error(error):
-    logger.error(f"Internal server error: {error}", exc_info=True)
+    logger.error("Internal server error: %s", error, exc_info=True)
     return create_error_response('Internal server error', 500)
 
 @api_routes.errorhandler(400)
@@ -239,31 +374,96 @@ def api_add_plant():
     """adds a new plant to local database"""
     data = request.json
     try:
-        new_plant = add_plant(data)
+        new_plant = plant_service.add_plant(data)
         return jsonify({'message': 'Plant added successfully', 'plant': new_plant}), 201
     except Exception as e:
         return jsonify({'error': str(e)}), 400
 
 @api_routes.route('/plants', methods=['GET'])
+@http_cache(max_age=30)
 def api_get_all_plants():
     """retrieves plants from local db with optional filtering and search"""
     limit = request.args.get('limit', 10, type=int)
     offset = request.args.get('offset', 0, type=int)
     search_term = request.args.get('search', type=str)
     filters = request.args.get('filters', None)  # json object in query params
+    after = request.args.get('after', type=str)  # opaque cursor from a previous page
+    sort = request.args.get('sort', 'id', type=str)
+    # totals cost an extra query, so cursor clients must opt in with ?count=true
+    include_count = request.args.get('count', 'false' if after else 'true').lower() in ('1', 'true', 'yes')
+    if limit < 1 or limit > 100:
+        return jsonify({'error': 'Limit must be between 1 and 100'}), 400
     try:
-        result = find_all_plants_with_pagination(limit=limit, offset=offset, search_term=search_term, filters=filters)
+        # list views default to a small projection; ?fields=* selects every column
+        raw_fields = request.args.get('fields', type=str)
+        if raw_fields is None:
+            fields = plant_service.DEFAULT_LIST_FIELDS
+        else:
+            fields = plant_service.parse_fields(raw_fields)
+        result = plant_service.find_all_plants_with_pagination(
+            limit=limit, offset=offset, search_term=search_term, filters=filters, after=after,
+            sort=sort, include_count=include_count, fields=fields)
         return jsonify(result), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 400
 
+@api_routes.route('/plants/export', methods=['GET'])
+@rate_limit(limit=10, scope='export')
+def api_export_plants():
+    """streams every matching plant as ndjson, csv or parquet, optionally gzipped"""
+    export_format = request.args.get('format', 'ndjson', type=str).lower()
+    search_term = request.args.get('search', type=str)
+    filters = request.args.get('filters', None)
+    compress = request.args.get('gzip', 'false').lower() in ('1', 'true', 'yes')
+    try:
+        fields = plant_service.parse_fields(request.args.get('fields', type=str))
+        content_type, filename, chunks = export_service.export_plants(
+            export_format, fields=fields, search_term=search_term, filters=filters, compress=compress)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+    response = Response(chunks, content_type=content_type)
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+@api_routes.route('/plants/search', methods=['GET'])
+@rate_limit(limit=600, scope='search')  # autocomplete sends a request per keystroke
+@http_cache(max_age=60)
+def api_search_plants():
+    """ranked name search over local plants, served from the in-process index"""
+    query = request.args.get('q', '', type=str).strip()
+    limit = request.args.get('limit', 10, type=int)
+    if not query:
+        return jsonify({'error': 'Query parameter q is required'}), 400
+    if limit < 1 or limit > 100:
+        return jsonify({'error': 'Limit must be between 1 and 100'}), 400
+    try:
+        results = plant_service.search_plants(query, limit=limit)
+        return jsonify({'query': query, 'results': results, 'count': len(results)}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+def _plant_etag(version):
+    return f'plant-{version}'
+
 @api_routes.route('/plants/<int:plant_id>', methods=['GET'])
+@http_cache(max_age=60)
 def api_get_plant(plant_id):
     """retrieves a specific plant from local database"""
     try:
-        plant = get_plant_by_any_id(plant_id)
+        fields = plant_service.parse_fields(request.args.get('fields', type=str))
+        # full rows carry a content hash, so a revalidation only needs that one column
+        if fields is None and request.if_none_match:
+            version = plant_service.get_plant_version(plant_id)
+            if version and request.if_none_match.contains(_plant_etag(version)):
+                response = make_response('', 304)
+                response.set_etag(_plant_etag(version))
+                return response
+        plant = plant_service.get_plant_by_any_id(plant_id, fields=fields)
         if plant:
-            return jsonify(plant), 200
+            response = make_response(jsonify(plant), 200)
+            if plant.get('content_hash'):
+                response.set_etag(_plant_etag(plant['content_hash']))
+            return response
         else:
             return jsonify({'error': 'Plant not found'}), 404
     except Exception as e:
@@ -274,7 +474,7 @@ def api_update_plant(plant_id):
     """updates an existing plant in local database"""
     data = request.json
     try:
-        updated_plant = update_plant_details(plant_id, data)
+        updated_plant = plant_service.update_plant_details(plant_id, data)
         return jsonify({'message': 'Plant updated successfully', 'plant': updated_plant}), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 400
@@ -283,10 +483,87 @@ def api_update_plant(plant_id):
 def api_delete_plant(plant_id):
     """removes a plant from local database"""
     try:
-        deleted_plant = remove_plant_from_db(plant_id)
+        deleted_plant = plant_service.remove_plant_from_db(plant_id)
         if deleted_plant:
             return jsonify({'message': 'Plant deleted successfully', 'plant': deleted_plant}), 200
         else:
             return jsonify({'error': 'Plant not found'}), 404
     except Exception as e:
-        return jsonify({'error': str(e)}), 400
\ No newline at end of file
+        return jsonify({'error': str(e)}), 400
+
+@api_routes.route('/analytics', methods=['GET'])
+@rate_limit
+@http_cache(max_age=300)
+def api_get_analytics():
+    """catalog-wide distributions over the local plants table"""
+    try:
+        return jsonify(analytics_service.get_catalog_stats()), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def analytics_charts():
+    """chart name -> title, image url and whether it is rendered yet, for the current stats"""
+    charts = chart_service.request_charts(analytics_service.get_catalog_stats())
+    return {name: {'title': chart_service.CHART_TITLES[name],
+                   'url': url_for('api.api_get_chart', key=key),
+                   'ready': ready}
+            for name, (key, ready) in charts.items()}
+
+@api_routes.route('/analytics/charts', methods=['GET'])
+@rate_limit
+@http_cache(max_age=60)
+def api_get_analytics_charts():
+    """image urls for the analytics charts; rendering happens off the request path"""
+    try:
+        charts = analytics_charts()
+        response = make_response(jsonify({'charts': charts}), 200)
+        # clients poll until every chart is ready, so a partial list must not be cached
+        if not all(chart['ready'] for chart in charts.values()):
+            response.headers['Cache-Control'] = 'no-store'
+        return response
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+CHART_KEY_RE = re.compile(r'^[0-9a-f]{32}$')
+CHART_RETRY_AFTER_SECONDS = 1
+
+@api_routes.route('/analytics/charts/<key>.png', methods=['GET'])
+def api_get_chart(key):
+    """
+    serves a rendered chart; urls are content addressed, so they are cached for
+    good. a chart still rendering answers 202 straight away for the client to retry.
+    """
+    if not CHART_KEY_RE.match(key):
+        return jsonify({'error': 'Chart not found'}), 404
+    status = chart_service.chart_status(key)
+    if status == 'pending':
+        response = make_response(jsonify({'status': 'rendering'}), 202)
+        response.headers['Retry-After'] = str(CHART_RETRY_AFTER_SECONDS)
+        response.headers['Cache-Control'] = 'no-store'
+        return response
+    if status == 'missing':
+        return jsonify({'error': 'Chart not found'}), 404
+    response = send_file(chart_service.chart_path(key), mimetype='image/png', conditional=True)
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
+@api_routes.route('/plants/bulk_ingest', methods=['POST'])
+@rate_limit(limit=5, scope='bulk_ingest')
+def api_bulk_ingest():
+    """starts a background bulk load of the perenual catalog into the local database"""
+    options = request.get_json(silent=True) or {}
+    allowed = {'start_page', 'max_pages', 'workers', 'pages_per_round', 'batch_size'}
+    unknown = set(options) - allowed
+    if unknown:
+        return jsonify({'error': f"Unknown options: {', '.join(sorted(unknown))}"}), 400
+    if not all(type(value) is int and value > 0 for value in options.values()):
+        return jsonify({'error': 'Options must be positive integers'}), 400
+    if not ingest_service.start_bulk_ingest(**options):
+        return jsonify({'error': 'Bulk ingestion already running',
+                        'job': ingest_service.get_bulk_ingest_status()}), 409
+    return jsonify({'message': 'Bulk ingestion started', 'job': ingest_service.get_bulk_ingest_status()}), 202
+
+@api_routes.route('/plants/bulk_ingest', methods=['GET'])
+def api_bulk_ingest_status():
+    """reports progress of the current or last bulk ingestion run"""
+    return jsonify(ingest_service.get_bulk_ingest_status()), 200
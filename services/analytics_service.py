@@ -0,0 +1,174 @@
+# services/analytics_service.py
+import logging
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+from snowflake.connector.options import installed_pandas
+
+from db import pooled_connection
+from utils.data_analysis import (
+    DISTRIBUTION_COLUMNS, HARDINESS_ZONES, CatalogAggregates,
+    distribution, lower_columns, toxicity_summary, zone_histogram
+)
+
+logger = logging.getLogger(__name__)
+
+# One scan answers every scalar distribution; GROUPING() tells the sets apart
+GROUPED_COUNTS_SQL = f"""
+    SELECT {', '.join(DISTRIBUTION_COLUMNS)}, poisonous_to_humans, poisonous_to_pets,
+           {', '.join(f'GROUPING({column}) AS g_{column}' for column in DISTRIBUTION_COLUMNS)},
+           GROUPING(poisonous_to_humans, poisonous_to_pets) AS g_toxicity,
+           COUNT(*) AS plants
+    FROM {{plants}}
+    GROUP BY GROUPING SETS (
+        {', '.join(f'({column})' for column in DISTRIBUTION_COLUMNS)},
+        (poisonous_to_humans, poisonous_to_pets)
+    )
+"""
+
+# sunlight is an ARRAY, so it is flattened before grouping
+SUNLIGHT_COUNTS_SQL = """
+    SELECT LOWER(TRIM(s.value::STRING)) AS sunlight, 0 AS g_sunlight, COUNT(DISTINCT p.id) AS plants
+    FROM {plants} p, LATERAL FLATTEN(input => p.sunlight) s
+    GROUP BY 1
+"""
+
+# zone ranges are expanded client side, which only needs two narrow numeric columns
+HARDINESS_SQL = """
+    SELECT TRY_TO_NUMBER(hardiness:min::STRING) AS zone_min,
+           TRY_TO_NUMBER(hardiness:max::STRING) AS zone_max
+    FROM {plants}
+    WHERE hardiness IS NOT NULL
+"""
+
+# a recount pins every query to one instant with time travel, so the three scans agree
+# with each other and with the journal of writes replayed on top of them
+AS_OF_TABLE = "plants AT(TIMESTAMP => TO_TIMESTAMP_LTZ(%(as_of)s))"
+
+FETCH_BATCH_ROWS = 10000
+
+
+def iter_frames(cursor, query, params=None):
+    """
+    Runs `query` and yields its result as DataFrames. Uses the connector's
+    Arrow batches when its pandas extra is installed, otherwise builds frames
+    from fetchmany() batches.
+    """
+    cursor.execute(query, params)
+    if installed_pandas:
+        for frame in cursor.fetch_pandas_batches():
+            yield lower_columns(frame)
+        return
+    columns = [desc[0] for desc in cursor.description]
+    while True:
+        rows = cursor.fetchmany(FETCH_BATCH_ROWS)
+        if not rows:
+            break
+        yield lower_columns(pd.DataFrame.from_records(rows, columns=columns))
+
+
+def _fetch_frame(cursor, query, params=None, columns=()):
+    frames = list(iter_frames(cursor, query, params))
+    if not frames:
+        return pd.DataFrame(columns=list(columns))
+    return pd.concat(frames, ignore_index=True)
+
+
+def _hardiness_zones(cursor, query, params=None):
+    counts = np.zeros(HARDINESS_ZONES, dtype=np.int64)
+    for frame in iter_frames(cursor, query, params):
+        counts += zone_histogram(pd.to_numeric(frame['zone_min'], errors='coerce'),
+                                 pd.to_numeric(frame['zone_max'], errors='coerce'))
+    return {str(zone): int(count) for zone, count in enumerate(counts, start=1)}
+
+
+def compute_catalog_stats(as_of=None):
+    """
+    catalog-wide distributions of the local plants table, read as of `as_of`
+    (epoch seconds) when given, otherwise as each query finds it
+    """
+    started = time.perf_counter()
+    plants, params = ('plants', None) if as_of is None else (AS_OF_TABLE, {'as_of': round(as_of, 3)})
+    with pooled_connection(operation='compute_catalog_stats') as conn:
+        cursor = conn.cursor()
+        try:
+            grouped = _fetch_frame(cursor, GROUPED_COUNTS_SQL.format(plants=plants), params,
+                                   columns=DISTRIBUTION_COLUMNS + [
+                                       'poisonous_to_humans', 'poisonous_to_pets', 'g_toxicity', 'plants'
+                                   ] + [f'g_{column}' for column in DISTRIBUTION_COLUMNS])
+            sunlight = _fetch_frame(cursor, SUNLIGHT_COUNTS_SQL.format(plants=plants), params,
+                                    columns=['sunlight', 'g_sunlight', 'plants'])
+            hardiness_zones = _hardiness_zones(cursor, HARDINESS_SQL.format(plants=plants), params)
+        finally:
+            cursor.close()
+
+    stats = {column: distribution(grouped, column) for column in DISTRIBUTION_COLUMNS}
+    stats['total'] = sum(stats[DISTRIBUTION_COLUMNS[0]].values())
+    stats['sunlight'] = distribution(sunlight, 'sunlight')
+    stats['toxicity'] = toxicity_summary(grouped)
+    stats['hardiness_zones'] = hardiness_zones
+    logger.info("Computed catalog analytics in %.3fs.", time.perf_counter() - started)
+    return stats
+
+
+# Columns the incremental aggregates read from a plant row
+AGGREGATE_COLUMNS = ['id'] + DISTRIBUTION_COLUMNS + [
+    'sunlight', 'poisonous_to_humans', 'poisonous_to_pets', 'hardiness'
+]
+# other workers write too, so each worker recounts the catalog this often
+ANALYTICS_RECONCILE_SECONDS = 900
+_aggregates = None
+_aggregates_reconciled_at = 0.0
+_aggregates_reconciling = False
+_aggregates_lock = threading.Lock()
+
+
+def _reconcile_aggregates():
+    global _aggregates_reconciled_at, _aggregates_reconciling
+    as_of = _aggregates.begin_reconcile()
+    try:
+        _aggregates.finish_reconcile(compute_catalog_stats(as_of), as_of)
+        _aggregates_reconciled_at = time.monotonic()
+    except Exception as e:
+        _aggregates.abort_reconcile()
+        logger.error("Error reconciling catalog analytics: %s", e)
+    finally:
+        _aggregates_reconciling = False
+
+
+def get_catalog_stats():
+    """
+    Catalog stats from the in-process aggregates, built by one full count on
+    first use and kept current by the plant write paths after that.
+    """
+    global _aggregates, _aggregates_reconciled_at, _aggregates_reconciling
+    if _aggregates is None:
+        with _aggregates_lock:
+            if _aggregates is None:
+                _aggregates = CatalogAggregates(compute_catalog_stats())
+                _aggregates_reconciled_at = time.monotonic()
+    elif time.monotonic() - _aggregates_reconciled_at > ANALYTICS_RECONCILE_SECONDS:
+        with _aggregates_lock:
+            start_reconcile = not _aggregates_reconciling
+            _aggregates_reconciling = True
+        if start_reconcile:
+            threading.Thread(target=_reconcile_aggregates, daemon=True).start()
+    return _aggregates.snapshot()
+
+
+def aggregates_enabled():
+    """whether writes need to report their changes; false until stats are first read"""
+    return _aggregates is not None
+
+
+def record_plant_changes(changes):
+    """applies (before, after) plant pairs from a committed write to the aggregates"""
+    if _aggregates is None:
+        return
+    try:
+        _aggregates.apply(changes)
+    except Exception as e:
+        # a bad row must not fail the write that already committed; the next recount fixes it
+        logger.error("Error updating catalog analytics: %s", e)
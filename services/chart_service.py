@@ -0,0 +1,227 @@
+# services/chart_service.py
+import hashlib
+import io
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from utils.data_analysis import DISTRIBUTION_COLUMNS, UNKNOWN
+
+logger = logging.getLogger(__name__)
+
+CHART_CACHE_DIR = os.getenv('CHART_CACHE_DIR', 'chart_cache')
+CHART_CACHE_MAX_FILES = int(os.getenv('CHART_CACHE_MAX_FILES', 200))
+CHART_RENDER_WORKERS = int(os.getenv('CHART_RENDER_WORKERS', 2))
+# a render claims its key with a marker file in the shared cache dir, so every worker process
+# knows it is underway; markers older than this belong to a worker that died mid-render
+CHART_PENDING_STALE_SECONDS = int(os.getenv('CHART_PENDING_STALE_SECONDS', 120))
+
+# bump when the drawing code changes so cached images are not reused
+CHART_STYLE_VERSION = 1
+TOP_LABELS = 15
+
+CHART_TITLES = {
+    'watering': 'Plants by watering needs',
+    'cycle': 'Plants by life cycle',
+    'care_level': 'Plants by care level',
+    'family': f'Top {TOP_LABELS} plant families',
+    'sunlight': 'Plants by sunlight',
+    'toxicity': 'Toxicity',
+    'hardiness_zones': 'Plants hardy in each USDA zone',
+}
+CHARTS = [column for column in DISTRIBUTION_COLUMNS if column in CHART_TITLES] + [
+    'sunlight', 'toxicity', 'hardiness_zones'
+]
+
+_executor = None
+_pending = set()  # chart keys this process is rendering
+_lock = threading.Lock()
+
+
+def chart_data(name, stats):
+    """(labels, {series: values}) drawn for one chart, from catalog stats"""
+    if name == 'toxicity':
+        toxicity = stats['toxicity']
+        states = ['toxic', 'non_toxic', UNKNOWN]
+        return ['humans', 'pets'], {state: [toxicity['humans'][state], toxicity['pets'][state]]
+                                    for state in states}
+    if name == 'hardiness_zones':
+        zones = stats['hardiness_zones']
+        return list(zones), {'plants': list(zones.values())}
+    values = list(stats[name].items())[:TOP_LABELS]
+    return [label for label, _ in values], {'plants': [count for _, count in values]}
+
+
+def chart_key(name, labels, series):
+    """content hash of what a chart draws; equal data always maps to the same image"""
+    payload = json.dumps([CHART_STYLE_VERSION, name, labels, series], sort_keys=True,
+                         separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]
+
+
+def render_png(title, labels, series):
+    """draws one bar chart; runs in a worker process, so matplotlib is imported here"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(8, 4.5), dpi=100)
+    try:
+        width = 0.8 / len(series)
+        for i, (name, values) in enumerate(series.items()):
+            positions = [x + (i - (len(series) - 1) / 2) * width for x in range(len(labels))]
+            ax.bar(positions, values, width=width, label=name.replace('_', ' '))
+        crowded = len(labels) > 6
+        ax.set_xticks(range(len(labels)))
+        ax.set_xticklabels(labels, rotation=45 if crowded else 0, ha='right' if crowded else 'center')
+        ax.set_title(title)
+        ax.set_ylabel('Plants')
+        if len(series) > 1:
+            ax.legend()
+        fig.tight_layout()
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format='png')
+        return buffer.getvalue()
+    finally:
+        plt.close(fig)
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            # matplotlib is neither thread safe nor cheap; spawned workers keep it out of request threads
+            _executor = ProcessPoolExecutor(max_workers=CHART_RENDER_WORKERS,
+                                            mp_context=multiprocessing.get_context('spawn'))
+        return _executor
+
+
+def _discard_executor(broken):
+    # a worker that died takes the whole pool down with it; the next render starts a new one
+    global _executor
+    with _lock:
+        if _executor is broken:
+            _executor = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def _submit(*args):
+    executor = _get_executor()
+    try:
+        return executor.submit(render_png, *args)
+    except BrokenProcessPool:
+        _discard_executor(executor)
+        return _get_executor().submit(render_png, *args)
+
+
+def chart_path(key):
+    return os.path.join(CHART_CACHE_DIR, f"{key}.png")
+
+
+def _marker_path(key):
+    return os.path.join(CHART_CACHE_DIR, f"{key}.pending")
+
+
+def _marker_live(key):
+    try:
+        return time.time() - os.path.getmtime(_marker_path(key)) < CHART_PENDING_STALE_SECONDS
+    except OSError:
+        return False
+
+
+def _claim(key):
+    """takes the cross-process render claim for `key`; false while another worker holds it"""
+    os.makedirs(CHART_CACHE_DIR, exist_ok=True)
+    if os.path.exists(_marker_path(key)) and not _marker_live(key):
+        _release(key)
+    try:
+        os.close(os.open(_marker_path(key), os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        return True
+    except FileExistsError:
+        return False
+
+
+def _release(key):
+    try:
+        os.remove(_marker_path(key))
+    except OSError:
+        pass
+
+
+def _store(key, future):
+    try:
+        png = future.result()
+        os.makedirs(CHART_CACHE_DIR, exist_ok=True)
+        tmp_path = f"{chart_path(key)}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(png)
+        os.replace(tmp_path, chart_path(key))
+        _prune_cache()
+    except Exception as e:
+        logger.error("Error rendering chart %s: %s", key, e)
+    finally:
+        _release(key)
+        with _lock:
+            _pending.discard(key)
+
+
+def _prune_cache():
+    names = [name for name in os.listdir(CHART_CACHE_DIR) if name.endswith('.png')]
+    if len(names) <= CHART_CACHE_MAX_FILES:
+        return
+    paths = sorted((os.path.join(CHART_CACHE_DIR, name) for name in names), key=os.path.getmtime)
+    for path in paths[:len(paths) - CHART_CACHE_MAX_FILES]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def request_charts(stats):
+    """
+    Returns {chart name: (key, ready)} for the current stats and queues a
+    render for every chart whose image is not cached yet. Images are keyed by
+    the data they draw, so unchanged stats never render twice.
+    """
+    charts = {}
+    for name in CHARTS:
+        labels, series = chart_data(name, stats)
+        key = chart_key(name, labels, series)
+        ready = os.path.exists(chart_path(key))
+        if not ready:
+            with _lock:
+                # another worker process may already be drawing it into the shared cache dir
+                start_render = key not in _pending and _claim(key)
+                if start_render:
+                    _pending.add(key)
+            if start_render:
+                try:
+                    future = _submit(CHART_TITLES[name], labels, series)
+                except Exception:
+                    _release(key)
+                    with _lock:
+                        _pending.discard(key)
+                    raise
+                future.add_done_callback(lambda done, key=key: _store(key, done))
+        charts[name] = (key, ready)
+    return charts
+
+
+def chart_status(key):
+    """
+    'ready' once the image is on disk, 'pending' while it is rendering here or,
+    going by its marker file, in another worker process, otherwise 'missing'.
+    Never waits, so serving a chart cannot hold a request thread.
+    """
+    if os.path.exists(chart_path(key)):
+        return 'ready'
+    with _lock:
+        rendering = key in _pending
+    if rendering or _marker_live(key):
+        return 'pending'
+    return 'missing'
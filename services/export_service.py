@@ -0,0 +1,159 @@
+# services/export_service.py
+import csv
+import io
+import logging
+import zlib
+
+from services.plant_service import stream_plants
+from utils.fast_json import make_encoder
+from utils.filters import FIELD_TYPES
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # parquet export is only offered when pyarrow is installed
+    pyarrow = None
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = {
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+
+
+class ExportError(ValueError):
+    pass
+
+
+def _ndjson_chunks(columns, batches):
+    encode = make_encoder()
+    for plants in batches:
+        yield ''.join(encode(plant) + '\n' for plant in plants).encode('utf-8')
+
+
+def _csv_chunks(columns, batches):
+    # ARRAY/OBJECT columns are written as their JSON text
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for plants in batches:
+        writer.writerows([plant.get(column) for column in columns] for plant in plants)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+class _ChunkSink(io.RawIOBase):
+    """write-only file that hands back whatever was written since the last drain"""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _parquet_type(column):
+    field_type = 'int' if column == 'seeds' else FIELD_TYPES.get(column)
+    if field_type == 'int':
+        return pyarrow.int64()
+    if field_type == 'bool':
+        return pyarrow.bool_()
+    return pyarrow.string()
+
+
+def _parquet_value(field_type, value):
+    if value is None:
+        return None
+    if pyarrow.types.is_string(field_type):
+        return str(value)
+    if pyarrow.types.is_boolean(field_type):
+        return bool(value)
+    return int(value)
+
+
+def _parquet_chunks(columns, batches):
+    # one row group per fetched batch, flushed to the client as soon as it is written
+    schema = pyarrow.schema([(column, _parquet_type(column)) for column in columns])
+    sink = _ChunkSink()
+    writer = pyarrow.parquet.ParquetWriter(sink, schema, compression='snappy')
+    try:
+        for plants in batches:
+            arrays = [
+                pyarrow.array([_parquet_value(field.type, plant.get(field.name)) for plant in plants],
+                              type=field.type)
+                for field in schema
+            ]
+            writer.write_table(pyarrow.Table.from_arrays(arrays, schema=schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+_WRITERS = {
+    'ndjson': _ndjson_chunks,
+    'csv': _csv_chunks,
+    'parquet': _parquet_chunks,
+}
+
+
+def _gzip(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _logged(chunks):
+    # headers are already sent by the time a mid-stream failure surfaces
+    try:
+        yield from chunks
+    except Exception as e:
+        logger.error("Error streaming plant export: %s", e)
+        raise
+
+
+def export_plants(export_format='ndjson', fields=None, search_term=None, filters=None,
+                  compress=False):
+    """
+    Validates an export request and returns (content_type, filename, chunks),
+    where chunks is a generator of encoded bytes streamed straight from the
+    database cursor. Invalid formats, fields or filters raise before any row is read.
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ExportError(f"Unsupported export format: {export_format}")
+    if export_format == 'parquet':
+        if pyarrow is None:
+            raise ExportError("Parquet export requires pyarrow to be installed")
+        if compress:
+            raise ExportError("Parquet exports are already compressed")
+
+    columns, batches = stream_plants(fields=fields, search_term=search_term, filters=filters)
+    content_type, extension = EXPORT_FORMATS[export_format]
+    chunks = _WRITERS[export_format](columns, batches)
+    filename = f"plants.{extension}"
+    if compress:
+        content_type, filename, chunks = 'application/gzip', f"{filename}.gz", _gzip(chunks)
+    return content_type, filename, _logged(chunks)
@@ -0,0 +1,194 @@
+# services/ingest_service.py
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from services.perenual_service import fetch_species_list, fetch_plant_details_payload
+from services.plant_service import upsert_plants
+from utils.governor import BULK, priority
+from utils.log_config import configure_logging
+
+logger = logging.getLogger(__name__)
+
+INGEST_CHECKPOINT_PATH = os.getenv('INGEST_CHECKPOINT_PATH', 'ingest_checkpoint.json')
+INGEST_WORKERS = int(os.getenv('INGEST_WORKERS', 8))
+INGEST_PAGES_PER_ROUND = int(os.getenv('INGEST_PAGES_PER_ROUND', 4))
+INGEST_BATCH_SIZE = int(os.getenv('INGEST_BATCH_SIZE', 500))
+
+
+def load_checkpoint(path):
+    """returns the saved ingestion progress, or None when starting fresh"""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def save_checkpoint(path, state):
+    """writes progress atomically so a killed run never leaves a torn file behind"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+def _fetch_details(species_id):
+    try:
+        # bulk loads queue behind interactive requests for the perenual budget
+        with priority(BULK):
+            payload = fetch_plant_details_payload(species_id)
+    except requests.exceptions.RequestException as e:
+        logger.warning("Failed to fetch details for species ID %s: %s", species_id, e)
+        return None
+    if not isinstance(payload, dict) or 'error' in payload:
+        logger.warning("Perenual returned no usable details for species ID %s", species_id)
+        return None
+    return payload
+
+
+def _fetch_page_ids(page):
+    with priority(BULK):
+        species = fetch_species_list(page)
+    if species is None:
+        raise RuntimeError(f"Failed to fetch species list page {page}")
+    return [item['id'] for item in species if item.get('id') is not None]
+
+
+def bulk_ingest(start_page=None, max_pages=None, workers=INGEST_WORKERS,
+                pages_per_round=INGEST_PAGES_PER_ROUND, batch_size=INGEST_BATCH_SIZE,
+                checkpoint_path=INGEST_CHECKPOINT_PATH, progress=None):
+    """
+    Walks the perenual species list and loads every species into Snowflake.
+
+    Pages are fetched a round at a time and species details are fetched
+    concurrently on a bounded thread pool, then validated and MERGEd in
+    multi-row batches. The checkpoint is advanced only after a round has been
+    committed, so a killed run resumes from the first unfinished round and
+    replaying that round is harmless.
+    """
+    state = load_checkpoint(checkpoint_path) if checkpoint_path else None
+    if state is None or start_page is not None:
+        state = {'next_page': start_page or 1, 'fetched': 0, 'inserted': 0,
+                 'updated': 0, 'unchanged': 0, 'invalid': 0, 'failed': 0, 'done': False}
+    if state.get('done'):
+        logger.info("Checkpoint says ingestion already finished; nothing to do.")
+        return state
+
+    last_page = None if max_pages is None else state['next_page'] + max_pages - 1
+    started = time.monotonic()
+    written_at_start = state['inserted'] + state.get('updated', 0) + state.get('unchanged', 0)
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ingest') as executor:
+        while True:
+            first = state['next_page']
+            pages = list(range(first, first + pages_per_round))
+            if last_page is not None:
+                pages = [page for page in pages if page <= last_page]
+            if not pages:
+                break
+
+            # page lookups and detail lookups share the same bounded pool
+            page_ids = list(executor.map(_fetch_page_ids, pages))
+            reached_end = any(not ids for ids in page_ids)
+            species_ids = [species_id for ids in page_ids for species_id in ids]
+
+            buffer = []
+            futures = [executor.submit(_fetch_details, species_id) for species_id in species_ids]
+            for future in as_completed(futures):
+                payload = future.result()
+                if payload is None:
+                    state['failed'] += 1
+                    continue
+                state['fetched'] += 1
+                buffer.append(payload)
+                if len(buffer) >= batch_size:
+                    _write_batch(buffer, state)
+                    buffer = []
+            if buffer:
+                _write_batch(buffer, state)
+
+            state['next_page'] = pages[-1] + 1
+            state['done'] = reached_end
+            if checkpoint_path:
+                save_checkpoint(checkpoint_path, state)
+
+            elapsed = time.monotonic() - started
+            written = state['inserted'] + state['updated'] + state['unchanged']
+            rate = (written - written_at_start) / elapsed if elapsed else 0.0
+            logger.info("Ingested through page %s: %s inserted, %s updated, %s unchanged (%.1f rows/sec)",
+                        pages[-1], state['inserted'], state['updated'], state['unchanged'], rate)
+            if progress is not None:
+                progress(dict(state))
+            if reached_end:
+                break
+
+    return state
+
+
+def _write_batch(records, state):
+    result = upsert_plants(records)
+    for key in ('inserted', 'updated', 'unchanged'):
+        state[key] = state.get(key, 0) + result[key]
+    state['invalid'] += len(result['errors'])
+
+
+# background job used by the api route
+
+_job = {'running': False, 'state': None, 'error': None}
+_job_lock = threading.Lock()
+
+
+def start_bulk_ingest(**kwargs):
+    """starts bulk_ingest on a background thread; returns False if a run is already active"""
+    with _job_lock:
+        if _job['running']:
+            return False
+        _job.update(running=True, state=None, error=None)
+
+    def update_progress(state):
+        with _job_lock:
+            _job['state'] = state
+
+    def run():
+        try:
+            final_state = bulk_ingest(progress=update_progress, **kwargs)
+            update_progress(final_state)
+        except Exception as e:
+            logger.error("Bulk ingestion failed: %s", e, exc_info=True)
+            with _job_lock:
+                _job['error'] = str(e)
+        finally:
+            with _job_lock:
+                _job['running'] = False
+
+    threading.Thread(target=run, name='bulk-ingest', daemon=True).start()
+    return True
+
+
+def get_bulk_ingest_status():
+    with _job_lock:
+        return dict(_job)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk load Perenual species into Snowflake")
+    parser.add_argument('--start-page', type=int, default=None,
+                        help="ignore the checkpoint and start from this page")
+    parser.add_argument('--max-pages', type=int, default=None)
+    parser.add_argument('--workers', type=int, default=INGEST_WORKERS)
+    parser.add_argument('--pages-per-round', type=int, default=INGEST_PAGES_PER_ROUND)
+    parser.add_argument('--batch-size', type=int, default=INGEST_BATCH_SIZE)
+    parser.add_argument('--checkpoint', default=INGEST_CHECKPOINT_PATH)
+    args = parser.parse_args()
+
+    configure_logging()
+    result = bulk_ingest(start_page=args.start_page, max_pages=args.max_pages,
+                         workers=args.workers, pages_per_round=args.pages_per_round,
+                         batch_size=args.batch_size, checkpoint_path=args.checkpoint)
+    print(json.dumps(result, indent=2))
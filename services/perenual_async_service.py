@@ -0,0 +1,194 @@
+# services/perenual_async_service.py
+import asyncio
+import logging
+import os
+import random
+import time
+
+import httpx
+from marshmallow import ValidationError
+
+from services.perenual_service import (
+    API_BASE_URL, API_KEY, PERENUAL_BACKOFF_FACTOR, PERENUAL_BACKOFF_JITTER, PERENUAL_CONNECT_TIMEOUT,
+    PERENUAL_MAX_RETRIES, PERENUAL_READ_TIMEOUT, RETRY_STATUS_CODES, PerenualQuotaExceeded,
+    PLANT_PAGE_TIMEOUTS, get_cache, get_governor, merge_plant_page, plant_loader, upstream_endpoint,
+    validate_plant_details
+)
+from utils.cache import make_key
+from utils.fanout import fan_out_async
+from utils.governor import QuotaExceeded
+from utils import timing
+
+# one event loop multiplexes every in-flight call, so the pool can be far larger than the threaded one
+PERENUAL_ASYNC_POOL_SIZE = int(os.getenv('PERENUAL_ASYNC_POOL_SIZE', 200))
+
+# what a failed upstream call raises; routes treat these like requests' RequestException
+UPSTREAM_ERRORS = (httpx.HTTPError, PerenualQuotaExceeded)
+
+logger = logging.getLogger(__name__)
+
+_client = None
+
+
+def get_client():
+    """returns the shared async perenual client; it belongs to the loop that first used it"""
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            base_url=API_BASE_URL,
+            headers={'Accept': 'application/json'},
+            timeout=httpx.Timeout(PERENUAL_READ_TIMEOUT, connect=PERENUAL_CONNECT_TIMEOUT),
+            limits=httpx.Limits(max_connections=PERENUAL_ASYNC_POOL_SIZE,
+                                max_keepalive_connections=PERENUAL_ASYNC_POOL_SIZE),
+        )
+    return _client
+
+
+async def aclose():
+    """closes the shared client; called when the asgi server shuts down"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def _retry_delay(attempt, response):
+    retry_after = response.headers.get('Retry-After') if response is not None else None
+    if retry_after and retry_after.isdigit():
+        return float(retry_after)
+    return PERENUAL_BACKOFF_FACTOR * 2 ** attempt + random.uniform(0, PERENUAL_BACKOFF_JITTER)
+
+
+async def _send(path, params):
+    """GET with the same retry policy as the threaded session: 429/5xx and transport errors back off"""
+    params = {name: value for name, value in params.items() if value is not None}
+    for attempt in range(PERENUAL_MAX_RETRIES + 1):
+        response = None
+        try:
+            response = await get_client().get(f"/{path}", params=params)
+            if response.status_code not in RETRY_STATUS_CODES or attempt == PERENUAL_MAX_RETRIES:
+                return response
+        except httpx.TransportError:
+            if attempt == PERENUAL_MAX_RETRIES:
+                raise
+        await asyncio.sleep(_retry_delay(attempt, response))
+
+
+async def _get_json(path, params):
+    """issues a GET through the governor and returns the decoded body, raising on 4xx/5xx"""
+    # keyed exactly like the threaded client, so both modes coalesce and cache alike
+    key = make_key(path, {name: value for name, value in params.items() if name != 'key'})
+
+    async def request():
+        with timing.timer(timing.UPSTREAM_SECONDS, 'upstream', upstream_endpoint(path)):
+            response = await _send(path, params)
+        response.raise_for_status()
+        return response.json()
+
+    try:
+        return await get_governor().call_async(key, request)
+    except QuotaExceeded as e:
+        raise PerenualQuotaExceeded(str(e))
+
+
+async def _request_species_page(page):
+    data = await _get_json('species-list', {'key': API_KEY, 'page': page})
+    if 'data' in data and data['data']:
+        return data['data']
+    logger.error("Missing or empty 'data' key in response")
+    return []
+
+
+async def fetch_species_list(page=1):
+    """fetches paginated list of plant species from perenual api; empty pages are not cached"""
+    try:
+        return await get_cache().get_or_fetch_async('species_list', {'page': page},
+                                                    lambda: _request_species_page(page), cache_if=bool)
+    except UPSTREAM_ERRORS as e:
+        logger.error("Error fetching species list: %s", e)
+        return None
+
+
+async def fetch_plant_details_payload(plant_id):
+    """raw species details payload, served from cache when possible; api errors are never cached"""
+    return await get_cache().get_or_fetch_async(
+        'details',
+        {'id': plant_id},
+        lambda: _get_json(f"species/details/{plant_id}", {'key': API_KEY}),
+        cache_if=lambda payload: isinstance(payload, dict) and 'error' not in payload
+    )
+
+
+async def fetch_plant_details_by_id(plant_id):
+    """fetches detailed plant information by id with validation"""
+    try:
+        plant_data = await fetch_plant_details_payload(plant_id)
+    except UPSTREAM_ERRORS as e:
+        logger.error("Error fetching plant details for ID %s: %s", plant_id, e)
+        return None
+
+    return validate_plant_details(plant_id, plant_data)
+
+
+async def fetch_plant_diseases(species_id):
+    try:
+        return await get_cache().get_or_fetch_async(
+            'diseases', {'id': species_id},
+            lambda: _data(_get_json('pest-disease-list', {'key': API_KEY, 'id': species_id})))
+    except UPSTREAM_ERRORS as e:
+        logger.error("Error fetching diseases for species ID %s: %s", species_id, e)
+        raise
+
+
+async def fetch_plant_guides(species_id, guide_type=None):
+    params = {'key': API_KEY, 'species_id': species_id}
+    if guide_type:
+        params['type'] = guide_type
+    try:
+        return await get_cache().get_or_fetch_async(
+            'guides', {'species_id': species_id, 'type': guide_type},
+            lambda: _data(_get_json('species-care-guide-list', params)))
+    except UPSTREAM_ERRORS as e:
+        logger.error("Error fetching plant guides for species ID %s: %s", species_id, e)
+        raise
+
+
+async def fetch_random_plant():
+    random_id = random.randint(1, 10102)
+    logger.info("Fetching random plant details for ID: %s", random_id)
+    try:
+        plant_data = await fetch_plant_details_payload(random_id)
+    except UPSTREAM_ERRORS as e:
+        logger.error("Error fetching random plant details for ID %s: %s", random_id, e)
+        raise
+    try:
+        return plant_loader.load(plant_data)
+    except ValidationError as e:
+        logger.error("Validation error while fetching random plant data: %s", e.messages)
+        return None
+
+
+async def fetch_plant_page(plant_id, guide_type=None, local_lookup=None):
+    """
+    fetch_plant_page on the event loop: the upstream parts are awaited together
+    and `local_lookup`, a blocking database call, runs in a thread alongside them
+    """
+    started = time.perf_counter()
+    parts = {
+        'details': lambda: _validated_details(plant_id),
+        'diseases': lambda: fetch_plant_diseases(plant_id),
+        'guides': lambda: fetch_plant_guides(plant_id, guide_type),
+    }
+    if local_lookup is not None:
+        parts['local'] = lambda: asyncio.to_thread(local_lookup, plant_id)
+    results, errors = await fan_out_async(parts, PLANT_PAGE_TIMEOUTS)
+    logger.info("Fetched plant page %s in %.3fs.", plant_id, time.perf_counter() - started)
+    return merge_plant_page(plant_id, results, errors)
+
+
+async def _validated_details(plant_id):
+    return validate_plant_details(plant_id, await fetch_plant_details_payload(plant_id))
+
+
+async def _data(body):
+    return (await body).get('data', [])
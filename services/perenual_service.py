@@ -1,103 +1,258 @@
 # services/perenual_service.py
 import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
 import requests
 import logging
 from dotenv import load_dotenv
 from marshmallow import ValidationError
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from schemas import PlantSchema
+from utils.schema_compiler import compiled_schema
+from utils.cache import TieredCache, make_key
+from utils.fanout import fan_out
+from utils.governor import BULK, OutboundGovernor, QuotaExceeded, priority
+from utils.prefetch import Prefetcher
+from utils import timing
 
 load_dotenv()
 
-API_BASE_URL = 'https://perenual.com/api'
+# overridable so load tests can point at a local mock server
+API_BASE_URL = os.getenv('PERENUAL_API_BASE_URL', 'https://perenual.com/api')
 API_KEY = os.getenv('PERENUAL_API_KEY')
 
-logging.basicConfig(level=logging.DEBUG)
+# http client tuning - timeouts are (connect, read) in seconds
+PERENUAL_CONNECT_TIMEOUT = float(os.getenv('PERENUAL_CONNECT_TIMEOUT', 3.05))
+PERENUAL_READ_TIMEOUT = float(os.getenv('PERENUAL_READ_TIMEOUT', 10))
+PERENUAL_MAX_RETRIES = int(os.getenv('PERENUAL_MAX_RETRIES', 3))
+PERENUAL_BACKOFF_FACTOR = float(os.getenv('PERENUAL_BACKOFF_FACTOR', 0.5))
+PERENUAL_BACKOFF_JITTER = float(os.getenv('PERENUAL_BACKOFF_JITTER', 0.5))
+PERENUAL_POOL_SIZE = int(os.getenv('PERENUAL_POOL_SIZE', 20))
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# read-through cache for details, diseases and guides - ttls are in seconds
+PERENUAL_CACHE_PATH = os.getenv('PERENUAL_CACHE_PATH', 'perenual_cache.db')
+PERENUAL_CACHE_TTLS = {
+    'details': int(os.getenv('PERENUAL_CACHE_TTL_DETAILS', 7 * 86400)),
+    'diseases': int(os.getenv('PERENUAL_CACHE_TTL_DISEASES', 3 * 86400)),
+    'guides': int(os.getenv('PERENUAL_CACHE_TTL_GUIDES', 3 * 86400)),
+    'species_list': int(os.getenv('PERENUAL_CACHE_TTL_SPECIES_LIST', 86400)),
+}
+PERENUAL_CACHE_STALE_TTL = int(os.getenv('PERENUAL_CACHE_STALE_TTL', 86400))
+PERENUAL_CACHE_MEMORY_ENTRIES = int(os.getenv('PERENUAL_CACHE_MEMORY_ENTRIES', 2048))
+PERENUAL_CACHE_DISK_ENTRIES = int(os.getenv('PERENUAL_CACHE_DISK_ENTRIES', 50000))
+
+# outbound governor - unset PERENUAL_DAILY_BUDGET means no daily cap
+PERENUAL_MAX_RPS = float(os.getenv('PERENUAL_MAX_RPS', 5))
+PERENUAL_BURST = float(os.getenv('PERENUAL_BURST', 10))
+PERENUAL_DAILY_BUDGET = int(os.environ['PERENUAL_DAILY_BUDGET']) if os.getenv('PERENUAL_DAILY_BUDGET') else None
+PERENUAL_USAGE_PATH = os.getenv('PERENUAL_USAGE_PATH', 'perenual_usage.db')
+
+# species-list read-ahead - 0 pages turns it off; warming details costs one call per species
+PERENUAL_PREFETCH_PAGES = int(os.getenv('PERENUAL_PREFETCH_PAGES', 2))
+PERENUAL_PREFETCH_WORKERS = int(os.getenv('PERENUAL_PREFETCH_WORKERS', 2))
+PERENUAL_PREFETCH_IDLE_SECONDS = int(os.getenv('PERENUAL_PREFETCH_IDLE_SECONDS', 120))
+PERENUAL_PREFETCH_WARM_DETAILS = os.getenv('PERENUAL_PREFETCH_WARM_DETAILS', 'false').lower() in ('1', 'true', 'yes')
+
+# plant page fan-out - how long each part may take, in seconds, before the page goes without it
+PLANT_PAGE_TIMEOUTS = {
+    'details': float(os.getenv('PLANT_PAGE_TIMEOUT_DETAILS', 8)),
+    'diseases': float(os.getenv('PLANT_PAGE_TIMEOUT_DISEASES', 5)),
+    'guides': float(os.getenv('PLANT_PAGE_TIMEOUT_GUIDES', 5)),
+    'local': float(os.getenv('PLANT_PAGE_TIMEOUT_LOCAL', 3)),
+}
+# a part that times out keeps its worker until its upstream call gives up, so page parts read
+# with their own timeout rather than PERENUAL_READ_TIMEOUT; size the pool for the pages in
+# flight times their parts, or parts start queueing and are reported as "no worker free"
+PLANT_PAGE_WORKERS = int(os.getenv('PLANT_PAGE_WORKERS', 32))
+
 logger = logging.getLogger(__name__)
 
-plant_schema = PlantSchema()
+plant_loader = compiled_schema(PlantSchema)
+
+_session = None
+_session_lock = threading.Lock()
+# read timeout for calls made inside a plant page part, which runs in its own context
+_part_read_timeout = ContextVar('perenual_part_read_timeout', default=None)
+
+def _build_session():
+    """creates a keep-alive session that retries 429/5xx with jittered exponential backoff"""
+    retry = Retry(
+        total=PERENUAL_MAX_RETRIES,
+        connect=PERENUAL_MAX_RETRIES,
+        read=PERENUAL_MAX_RETRIES,
+        status=PERENUAL_MAX_RETRIES,
+        backoff_factor=PERENUAL_BACKOFF_FACTOR,
+        backoff_jitter=PERENUAL_BACKOFF_JITTER,
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=frozenset(['GET']),
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(
+        pool_connections=PERENUAL_POOL_SIZE,
+        pool_maxsize=PERENUAL_POOL_SIZE,
+        max_retries=retry
+    )
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({'Accept': 'application/json'})
+    return session
+
+def get_session():
+    """returns the shared perenual http session, creating it on first use"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_cache():
+    """returns the shared perenual response cache, opening the disk tier on first use"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = TieredCache(
+                    PERENUAL_CACHE_PATH,
+                    ttls=PERENUAL_CACHE_TTLS,
+                    stale_ttl=PERENUAL_CACHE_STALE_TTL,
+                    memory_entries=PERENUAL_CACHE_MEMORY_ENTRIES,
+                    disk_entries=PERENUAL_CACHE_DISK_ENTRIES
+                )
+    return _cache
+
+class PerenualQuotaExceeded(requests.exceptions.RequestException):
+    """raised instead of calling perenual once the daily budget is spent"""
+
+_governor = None
+_governor_lock = threading.Lock()
+
+def get_governor():
+    """returns the shared outbound governor that every perenual call passes through"""
+    global _governor
+    if _governor is None:
+        with _governor_lock:
+            if _governor is None:
+                _governor = OutboundGovernor(
+                    rate_per_sec=PERENUAL_MAX_RPS,
+                    burst=PERENUAL_BURST,
+                    daily_budget=PERENUAL_DAILY_BUDGET,
+                    usage_path=PERENUAL_USAGE_PATH
+                )
+    return _governor
+
+def get_quota_stats():
+    """outbound quota and coalescing metrics for the perenual api"""
+    return get_governor().stats()
+
+def upstream_endpoint(path):
+    """metric label for an api path, with ids folded so every plant shares one series"""
+    return re.sub(r'/\d+', '/{id}', path)
+
+def _send(path, params, timeout):
+    with timing.timer(timing.UPSTREAM_SECONDS, 'upstream', upstream_endpoint(path)):
+        return get_session().get(
+            f"{API_BASE_URL}/{path}",
+            params=params,
+            timeout=timeout or (PERENUAL_CONNECT_TIMEOUT, _part_read_timeout.get() or PERENUAL_READ_TIMEOUT)
+        )
+
+def _get(path, params=None, timeout=None):
+    """issues a GET against the perenual api through the governor and the shared session"""
+    # identical concurrent requests share one upstream call; the api key is left out of the key
+    key = make_key(path, {name: value for name, value in (params or {}).items() if name != 'key'})
+    try:
+        return get_governor().call(key, lambda: _send(path, params, timeout))
+    except QuotaExceeded as e:
+        raise PerenualQuotaExceeded(str(e))
+
+def _request_species_page(page):
+    response = _get("species-list", params={'key': API_KEY, 'page': page})
+    response.raise_for_status()
+    data = response.json()
+
+    # verify response structure and return data if valid
+    if 'data' in data and data['data']:
+        return data['data']
+    logger.error("Missing or empty 'data' key in response")
+    return []
 
 # fetch species list from perenual api
 def fetch_species_list(page=1):
-    """fetches paginated list of plant species from perenual api"""
+    """fetches paginated list of plant species from perenual api; empty pages are not cached"""
     try:
-        params = {
-            'key': API_KEY,
-            'page': page
-        }
-        
-        # log full request details for debugging
-        logger.debug(f"Fetching species list with URL: {API_BASE_URL}/species-list, params: {params}")
-        
-        response = requests.get(f"{API_BASE_URL}/species-list", params=params)
-        logger.debug(f"Response Status Code: {response.status_code}")
-        logger.debug(f"Response Content: {response.text}")
-        
-        response.raise_for_status()
-        data = response.json()
-        
-        # verify response structure and return data if valid
-        if 'data' in data and data['data']:
-            logger.debug(f"Species Data: {data['data']}")
-            return data['data']
-        else:
-            logger.error("Missing or empty 'data' key in response")
-            return []
-        
+        return get_cache().get_or_fetch('species_list', {'page': page},
+                                        lambda: _request_species_page(page), cache_if=bool)
     except requests.exceptions.RequestException as e:
-        logger.error(f"Error fetching species list: {e}")
+        logger.error("Error fetching species list: %s", e)
         return None
 
+def _request_details_payload(plant_id):
+    response = _get(f"species/details/{plant_id}", params={'key': API_KEY})
+    response.raise_for_status()
+    return response.json()
+
+def fetch_plant_details_payload(plant_id):
+    """raw species details payload, served from cache when possible; api errors are never cached"""
+    return get_cache().get_or_fetch(
+        'details',
+        {'id': plant_id},
+        lambda: _request_details_payload(plant_id),
+        cache_if=lambda payload: isinstance(payload, dict) and 'error' not in payload
+    )
+
+def validate_plant_details(plant_id, plant_data):
+    """validated details payload, the raw payload if it fails validation, or None for an api error"""
+    try:
+        # check for api error response
+        if 'error' in plant_data:
+            logger.error("API returned an error: %s", plant_data['error'])
+            return None
+
+        # validate data structure, being lenient with missing fields
+        validated_data = plant_loader.load(plant_data, partial=True)
+        logger.info("Data validation successful for plant ID %s", plant_id)
+        return validated_data
+
+    except ValidationError as e:
+        # log validation issues but return raw data as fallback
+        logger.error("Validation error details: %s", e.messages)
+        logger.error("Failed fields: %s", e.valid_data)
+        logger.warning("Returning raw data due to validation failure")
+        return plant_data
+
 # fetch plant details by id
 def fetch_plant_details_by_id(plant_id):
     """fetches detailed plant information by id with validation"""
     try:
-        logger.info(f"Fetching plant details from Perenual API for plant ID: {plant_id}")
-        
-        url = f"{API_BASE_URL}/species/details/{plant_id}"
-        params = {'key': API_KEY}
-        
-        # log request details for debugging
-        logger.debug(f"Request URL: {url}")
-        logger.debug(f"Request params: {params}")
-        
-        response = requests.get(url, params=params)
-        logger.debug(f"Response Status Code: {response.status_code}")
-        logger.debug(f"Response Headers: {dict(response.headers)}")
-        logger.debug(f"Raw Response Content: {response.text[:1000]}...")
-        
-        response.raise_for_status()
-        plant_data = response.json()
-        
-        try:
-            # check for api error response
-            if 'error' in plant_data:
-                logger.error(f"API returned an error: {plant_data['error']}")
-                return None
-                
-            # validate data structure, being lenient with missing fields
-            validated_data = plant_schema.load(plant_data, partial=True)
-            logger.info(f"Data validation successful for plant ID {plant_id}")
-            return validated_data
-            
-        except ValidationError as e:
-            # log validation issues but return raw data as fallback
-            logger.error(f"Validation error details: {e.messages}")
-            logger.error(f"Failed fields: {e.valid_data}")
-            logger.warning("Returning raw data due to validation failure")
-            return plant_data
+        logger.info("Fetching plant details from Perenual API for plant ID: %s", plant_id)
+        return validate_plant_details(plant_id, fetch_plant_details_payload(plant_id))
 
     except requests.exceptions.RequestException as e:
-        logger.error(f"Error fetching plant details for ID {plant_id}: {e}")
+        logger.error("Error fetching plant details for ID %s: %s", plant_id, e)
         return None
 
 # plant disease by plant ID
 def fetch_plant_diseases(species_id):
-    try:
-        response = requests.get(f"{API_BASE_URL}/pest-disease-list", params={'key': API_KEY, 'id': species_id})
+    def request_diseases():
+        response = _get("pest-disease-list", params={'key': API_KEY, 'id': species_id})
         response.raise_for_status()
         return response.json().get('data', [])
+
+    try:
+        return get_cache().get_or_fetch('diseases', {'id': species_id}, request_diseases)
     except requests.exceptions.RequestException as e:
-        logger.error(f"Error fetching diseases for species ID {species_id}: {e}")
+        logger.error("Error fetching diseases for species ID %s: %s", species_id, e)
         raise
 
 # plant guides by plant ID
@@ -105,28 +260,152 @@ def fetch_plant_guides(species_id, guide_type=None):
     params = {'key': API_KEY, 'species_id': species_id}
     if guide_type:
         params['type'] = guide_type
-    try:
-        response = requests.get(f"{API_BASE_URL}/species-care-guide-list", params=params)
+
+    def request_guides():
+        response = _get("species-care-guide-list", params=params)
         response.raise_for_status()
         return response.json().get('data', [])
+
+    try:
+        return get_cache().get_or_fetch(
+            'guides', {'species_id': species_id, 'type': guide_type}, request_guides)
     except requests.exceptions.RequestException as e:
-        logger.error(f"Error fetching plant guides for species ID {species_id}: {e}")
+        logger.error("Error fetching plant guides for species ID %s: %s", species_id, e)
         raise
 
 # random plant from perenual
 def fetch_random_plant():
     import random
     random_id = random.randint(1, 10102)
-    logger.info(f"Fetching random plant details for ID: {random_id}")
+    logger.info("Fetching random plant details for ID: %s", random_id)
     try:
-        response = requests.get(f"{API_BASE_URL}/species/details/{random_id}", params={'key': API_KEY})
-        response.raise_for_status()
+        plant_data = fetch_plant_details_payload(random_id)
         try:
-            validated_data = plant_schema.load(response.json())
+            validated_data = plant_loader.load(plant_data)
             return validated_data
         except ValidationError as e:
-            logger.error(f"Validation error while fetching random plant data: {e.messages}")
+            logger.error("Validation error while fetching random plant data: %s", e.messages)
             return None
     except requests.exceptions.RequestException as e:
-        logger.error(f"Error fetching random plant details for ID {random_id}: {e}")
-        raise
\ No newline at end of file
+        logger.error("Error fetching random plant details for ID %s: %s", random_id, e)
+        raise
+
+_page_executor = None
+_page_executor_lock = threading.Lock()
+
+def get_page_executor():
+    """returns the shared thread pool that plant page parts run on"""
+    global _page_executor
+    if _page_executor is None:
+        with _page_executor_lock:
+            if _page_executor is None:
+                _page_executor = ThreadPoolExecutor(max_workers=PLANT_PAGE_WORKERS,
+                                                    thread_name_prefix='plant-page')
+    return _page_executor
+
+def _page_part(name, fn):
+    """caps the read timeout of upstream calls a page part makes at the part's own timeout"""
+    def run():
+        _part_read_timeout.set(PLANT_PAGE_TIMEOUTS[name])
+        return fn()
+    return run
+
+def describe_part_error(error):
+    """short reason a plant page part is missing; upstream urls carry the api key, so they are left out"""
+    if isinstance(error, (TimeoutError, PerenualQuotaExceeded)):
+        return str(error)
+    response = getattr(error, 'response', None)
+    if response is not None:
+        return f"Perenual returned HTTP {response.status_code}"
+    return f"{type(error).__name__} while fetching"
+
+def merge_plant_page(plant_id, results, errors):
+    """
+    One plant page from whichever parts answered. Missing parts are null and
+    explained under `errors`; (status, page or error message) is returned.
+    """
+    for name, error in errors.items():
+        logger.warning("Plant page %s: %s failed: %s", plant_id, name, error)
+    if not results:
+        return 502, f'Could not load any part of plant {plant_id}'
+    if results.get('details') is None and 'details' not in errors and not results.get('local'):
+        return 404, f'Plant with ID {plant_id} not found'
+
+    page = {'plant_id': plant_id}
+    for name in PLANT_PAGE_TIMEOUTS:
+        if name in results or name in errors:
+            page[name] = results.get(name)
+    page['errors'] = {name: describe_part_error(error) for name, error in errors.items()}
+    page['partial'] = bool(errors)
+    return 200, page
+
+# Plant page: details, diseases, guides and optionally the local row, fetched concurrently
+def fetch_plant_page(plant_id, guide_type=None, local_lookup=None):
+    """the page takes as long as its slowest part instead of the sum of all of them"""
+    started = time.perf_counter()
+    parts = {
+        'details': lambda: validate_plant_details(plant_id, fetch_plant_details_payload(plant_id)),
+        'diseases': lambda: fetch_plant_diseases(plant_id),
+        'guides': lambda: fetch_plant_guides(plant_id, guide_type),
+    }
+    if local_lookup is not None:
+        parts['local'] = lambda: local_lookup(plant_id)
+    parts = {name: _page_part(name, fn) for name, fn in parts.items()}
+    results, errors = fan_out(parts, PLANT_PAGE_TIMEOUTS, get_page_executor())
+    logger.info("Fetched plant page %s in %.3fs.", plant_id, time.perf_counter() - started)
+    return merge_plant_page(plant_id, results, errors)
+
+def _prefetch_species_page(page, cancelled):
+    # read-ahead queues behind interactive requests for the perenual budget
+    with priority(BULK):
+        return fetch_species_list(page)
+
+def _warm_species_details(species, cancelled):
+    warmed = 0
+    with priority(BULK):
+        for item in species:
+            if cancelled():
+                break
+            if item.get('id') is None:
+                continue
+            try:
+                fetch_plant_details_payload(item['id'])
+                warmed += 1
+            except requests.exceptions.RequestException as e:
+                logger.warning("Failed to warm details for species ID %s: %s", item['id'], e)
+                if isinstance(e, PerenualQuotaExceeded):
+                    break
+    return warmed
+
+_prefetcher = None
+_prefetcher_lock = threading.Lock()
+
+def get_prefetcher():
+    """returns the shared species-list prefetcher, or None when read-ahead is off"""
+    global _prefetcher
+    if _prefetcher is None and PERENUAL_PREFETCH_PAGES > 0:
+        with _prefetcher_lock:
+            if _prefetcher is None:
+                _prefetcher = Prefetcher(
+                    _prefetch_species_page,
+                    depth=PERENUAL_PREFETCH_PAGES,
+                    workers=PERENUAL_PREFETCH_WORKERS,
+                    idle_seconds=PERENUAL_PREFETCH_IDLE_SECONDS,
+                    warm=_warm_species_details if PERENUAL_PREFETCH_WARM_DETAILS else None
+                )
+    return _prefetcher
+
+# Species-list read-ahead for clients paging through the catalog
+def prefetch_species_pages(client, page):
+    """queues the pages after `page` for `client` and reports whether `page` itself was prefetched"""
+    prefetcher = get_prefetcher()
+    if prefetcher is None:
+        return False
+    return prefetcher.after_read(client, page)
+
+def get_prefetch_stats():
+    prefetcher = get_prefetcher()
+    if prefetcher is None:
+        return {'enabled': False}
+    return {'enabled': True, 'depth': prefetcher.depth,
+            'warm_details': PERENUAL_PREFETCH_WARM_DETAILS, **prefetcher.stats()}
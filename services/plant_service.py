@@ -1,34 +1,109 @@
+import base64
+import gzip
+import hashlib
 import logging
 import json
-from db import get_connection
+import os
+import tempfile
+import threading
+import time
+import uuid
+from functools import lru_cache
+from config import PLANT_INSERT_ROWS_PER_STATEMENT, PLANT_STAGE_THRESHOLD_ROWS, PLANT_EXPORT_FETCH_SIZE
+from db import pooled_connection
 from schemas import PlantSchema
+from utils.schema_compiler import compiled_schema
 from marshmallow import ValidationError
+from utils.cache import LRUCache, make_key
+from utils.search_index import SearchIndex
+from utils.filters import PlantSnapshot, FIELD_TYPES, parse_filters, compile_sql
+from utils.fast_json import RawJSON
+from services.analytics_service import AGGREGATE_COLUMNS, aggregates_enabled, record_plant_changes
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 plant_schema = PlantSchema()
+plant_loader = compiled_schema(PlantSchema)
+
+# Fields that should be arrays in Snowflake
+ARRAY_FIELDS = [
+    "scientific_name", "other_name", "origin", "sunlight",
+    "propagation", "pest_susceptibility", "fruit_color", 
+    "leaf_color", "pruning_month", "pruning_count",
+    "volume_water_requirement", "depth_water_requirement"
+]
+
+# Fields that should be objects in Snowflake
+OBJECT_FIELDS = [
+    "hardiness", "hardiness_location", "dimensions",
+    "default_image", "watering_general_benchmark", 
+    "plant_anatomy"
+]
+
+# Columns written by the batch insert path, in schema order
+PLANT_COLUMNS = list(plant_schema.fields)
+
+# Every column of the plants table that clients may project
+SELECTABLE_COLUMNS = PLANT_COLUMNS + [
+    "care_guides", "volume_water_requirement", "depth_water_requirement",
+    "pruning_month", "pruning_count", "watering_period", "watering_general_benchmark",
+    "maintenance", "plant_anatomy", "seeds"
+]
+
+# Small projection used by list views unless the client asks for more
+DEFAULT_LIST_FIELDS = [
+    "id", "common_name", "scientific_name", "family", "cycle",
+    "watering", "sunlight", "care_level"
+]
+
+def parse_fields(raw):
+    """
+    Turns a comma separated ?fields= value into a column list.
+    Returns None for '*' (every column); unknown names raise ValueError.
+    """
+    if raw is None:
+        return None
+    raw = raw.strip()
+    if raw == '*':
+        return None
+    fields = []
+    for name in raw.split(','):
+        name = name.strip().lower()
+        if not name:
+            continue
+        if name not in SELECTABLE_COLUMNS:
+            raise ValueError(f"Unknown field: {name}")
+        if name not in fields:
+            fields.append(name)
+    if not fields:
+        raise ValueError("At least one field must be requested")
+    return fields
+
+def _projected_columns(fields, required=()):
+    columns = list(fields)
+    for column in required:
+        if column not in columns:
+            columns.append(column)
+    return columns
+
+def _projection(fields, required=()):
+    """SELECT list for `fields`; `required` columns are always included"""
+    if fields is None:
+        return "*"
+    return ", ".join(_projected_columns(fields, required))
+
+# Batch writes also store a hash of the plant content so re-ingestion can skip unchanged rows
+WRITE_COLUMNS = PLANT_COLUMNS + ['content_hash']
+
+def content_hash(plant):
+    """stable sha256 over the schema columns of a validated plant"""
+    payload = json.dumps([plant.get(column) for column in PLANT_COLUMNS],
+                         sort_keys=True, default=str, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
 
 def add_plant(data):
     try:
-        validated_data = plant_schema.load(data)
-        conn = get_connection()
-        cursor = conn.cursor()
-
-        # Fields that should be arrays in Snowflake
-        array_fields = [
-            "scientific_name", "other_name", "origin", "sunlight",
-            "propagation", "pest_susceptibility", "fruit_color", 
-            "leaf_color", "pruning_month", "pruning_count",
-            "volume_water_requirement", "depth_water_requirement"
-        ]
-
-        # Fields that should be objects in Snowflake
-        object_fields = [
-            "hardiness", "hardiness_location", "dimensions",
-            "default_image", "watering_general_benchmark", 
-            "plant_anatomy"
-        ]
+        validated_data = plant_loader.load(data)
 
         final_values = {}
         fields = []
@@ -37,7 +112,7 @@ def add_plant(data):
         for key, value in validated_data.items():
             fields.append(key)
             
-            if key in array_fields:
+            if key in ARRAY_FIELDS:
                 if value and len(value) > 0:
                     # Create named parameters for each array element
                     array_params = [f"%({key}_{i})s" for i in range(len(value))]
@@ -46,7 +121,7 @@ def add_plant(data):
                         final_values[f"{key}_{i}"] = item
                 else:
                     values.append("ARRAY_CONSTRUCT()")
-            elif key in object_fields:
+            elif key in OBJECT_FIELDS:
                 if value is None:
                     value = {}
                 values.append(f"PARSE_JSON(%({key})s)")
@@ -55,176 +130,725 @@ def add_plant(data):
                 values.append(f"%({key})s")
                 final_values[key] = value
 
+        fields.append('content_hash')
+        values.append("%(content_hash)s")
+        final_values['content_hash'] = content_hash(validated_data)
+
         sql = f"""
             INSERT INTO plants ({', '.join(fields)})
             VALUES ({', '.join(values)})
         """
 
-        logger.debug(f"SQL Query: {sql}")
-        logger.debug(f"Values: {final_values}")
-
-        cursor.execute(sql, final_values)
-        conn.commit()
-
-        cursor.close()
-        conn.close()
-
+        with pooled_connection(operation='add_plant') as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(sql, final_values)
+                conn.commit()
+                _invalidate_read_caches()
+            finally:
+                cursor.close()
+
+        _index_plants([validated_data])
+        record_plant_changes([(None, validated_data)])
         return validated_data
 
     except Exception as e:
-        if 'conn' in locals():
-            conn.rollback()
-        logger.error(f"Error adding plant: {str(e)}")
+        logger.error("Error adding plant: %s", str(e))
         raise e
 
-# Find all plants with pagination
-def find_all_plants_with_pagination(limit=10, offset=0, search_term=None, filters=None):
+def _select_expression(position, column):
+    """column expression for INSERT ... SELECT FROM VALUES, where every bound value is a scalar"""
+    if column in ARRAY_FIELDS:
+        return f"PARSE_JSON(${position})::ARRAY"
+    if column in OBJECT_FIELDS:
+        return f"PARSE_JSON(${position})::OBJECT"
+    return f"${position}"
+
+def _row_params(plant):
+    """bind values for one WRITE_COLUMNS row"""
+    params = [_bind_value(column, plant.get(column)) for column in PLANT_COLUMNS]
+    params.append(content_hash(plant))
+    return params
+
+def _values_clause(row_count):
+    row_placeholder = "(" + ", ".join(["%s"] * len(WRITE_COLUMNS)) + ")"
+    return ", ".join([row_placeholder] * row_count)
+
+def _bind_value(column, value):
+    if column in ARRAY_FIELDS:
+        return json.dumps(value or [])
+    if column in OBJECT_FIELDS:
+        return json.dumps(value or {})
+    if isinstance(value, (list, dict)):
+        return json.dumps(value)
+    return value
+
+@lru_cache(maxsize=None)
+def _multi_row_insert_sql(row_count):
+    """
+    INSERT ... SELECT FROM VALUES keeps one statement shape per row count;
+    Snowflake rejects PARSE_JSON inside a multi-row VALUES list, so the
+    conversions are applied in the SELECT.
+    """
+    expressions = [_select_expression(i + 1, column) for i, column in enumerate(WRITE_COLUMNS)]
+    return f"""
+        INSERT INTO plants ({', '.join(WRITE_COLUMNS)})
+        SELECT {', '.join(expressions)}
+        FROM VALUES {_values_clause(row_count)}
+    """
+
+@lru_cache(maxsize=None)
+def _merge_sql(row_count):
+    """
+    Set-based upsert on id. Matched rows are only rewritten when their stored
+    content hash differs, so unchanged plants cost no write.
+    """
+    source_columns = [f"{_select_expression(i + 1, column)} AS {column}"
+                      for i, column in enumerate(WRITE_COLUMNS)]
+    updates = [f"{column} = s.{column}" for column in WRITE_COLUMNS if column != 'id']
+    return f"""
+        MERGE INTO plants t
+        USING (
+            SELECT {', '.join(source_columns)}
+            FROM VALUES {_values_clause(row_count)}
+        ) s
+        ON t.id = s.id
+        WHEN MATCHED AND (t.content_hash IS NULL OR t.content_hash <> s.content_hash) THEN
+            UPDATE SET {', '.join(updates)}
+        WHEN NOT MATCHED THEN
+            INSERT ({', '.join(WRITE_COLUMNS)})
+            VALUES ({', '.join(f"s.{column}" for column in WRITE_COLUMNS)})
+    """
+
+def validate_plants(records):
+    """
+    Validates a batch of plant records with the compiled schema.
+    Returns (valid_records, errors) where errors maps input index to marshmallow messages.
+    """
+    return plant_loader.load_many(records)
+
+def _insert_chunk(conn, cursor, chunk):
+    params = [value for plant in chunk for value in _row_params(plant)]
+    cursor.execute(_multi_row_insert_sql(len(chunk)), params)
+    conn.commit()
+
+def _insert_rows(conn, cursor, plants):
+    """
+    Inserts in fixed-size multi-row statements so the statement text repeats;
+    a chunk that fails is retried row by row so only the bad rows are lost.
+    """
+    inserted = 0
+    failed = {}
+    for start in range(0, len(plants), PLANT_INSERT_ROWS_PER_STATEMENT):
+        chunk = plants[start:start + PLANT_INSERT_ROWS_PER_STATEMENT]
+        try:
+            _insert_chunk(conn, cursor, chunk)
+            inserted += len(chunk)
+        except Exception as e:
+            conn.rollback()
+            logger.warning("Batch insert of %s plants failed, retrying per row: %s", len(chunk), e)
+            for plant in chunk:
+                try:
+                    _insert_chunk(conn, cursor, [plant])
+                    inserted += 1
+                except Exception as row_error:
+                    conn.rollback()
+                    failed[plant['id']] = str(row_error)
+    return inserted, failed
+
+def _staged_record(plant):
+    record = {}
+    for column in PLANT_COLUMNS:
+        value = plant.get(column)
+        if value is None and column in ARRAY_FIELDS:
+            value = []
+        elif value is None and column in OBJECT_FIELDS:
+            value = {}
+        record[column] = value
+    record['content_hash'] = content_hash(plant)
+    return record
+
+def _copy_via_stage(conn, cursor, plants):
+    """writes plants to a gzipped NDJSON file, PUTs it to the table stage and runs COPY INTO"""
+    file_name = f"plants_{uuid.uuid4().hex}.ndjson.gz"
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, file_name)
+        with gzip.open(path, 'wt', encoding='utf-8') as f:
+            for plant in plants:
+                f.write(json.dumps(_staged_record(plant), default=str))
+                f.write("\n")
+
+        cursor.execute(f"PUT 'file://{path}' @%plants AUTO_COMPRESS=FALSE OVERWRITE=TRUE")
+        cursor.execute(f"""
+            COPY INTO plants
+            FROM @%plants
+            FILES = ('{file_name}')
+            FILE_FORMAT = (TYPE = JSON COMPRESSION = GZIP)
+            MATCH_BY_COLUMN_NAME = CASE_INSENSITIVE
+            ON_ERROR = ABORT_STATEMENT
+            PURGE = TRUE
+        """)
+        # COPY returns one row per file: (file, status, rows_parsed, rows_loaded, ...)
+        loaded = sum(row[3] for row in cursor.fetchall())
+        conn.commit()
+    return loaded
+
+# Add many plants using batched inserts, or a staged COPY for large batches
+def add_plants(records):
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
+        started = time.monotonic()
+        validated, errors = validate_plants(records)
+        if errors:
+            logger.warning("Skipping %s invalid plant records in batch.", len(errors))
+
+        method = 'insert'
+        inserted = 0
+        failed = {}
+        with pooled_connection(operation='add_plants') as conn:
+            cursor = conn.cursor()
+            try:
+                if len(validated) >= PLANT_STAGE_THRESHOLD_ROWS:
+                    try:
+                        inserted = _copy_via_stage(conn, cursor, validated)
+                        method = 'copy'
+                    except Exception as e:
+                        conn.rollback()
+                        logger.warning("Staged COPY failed, falling back to batched inserts: %s", e)
+                if method == 'insert':
+                    inserted, failed = _insert_rows(conn, cursor, validated)
+            finally:
+                cursor.close()
+        _invalidate_read_caches()
+        written = [plant for plant in validated if plant['id'] not in failed]
+        _index_plants(written)
+        record_plant_changes((None, plant) for plant in written)
+
+        elapsed = time.monotonic() - started
+        rows_per_sec = inserted / elapsed if elapsed else 0.0
+        logger.info("Inserted %s plants via %s in %.2fs (%.1f rows/sec).",
+                    inserted, method, elapsed, rows_per_sec)
+        return {
+            'inserted': inserted,
+            'errors': errors,
+            'failed': failed,
+            'method': method,
+            'elapsed': elapsed,
+            'rows_per_sec': rows_per_sec
+        }
 
-        query = "SELECT * FROM plants"
-        query_conditions = []
-        query_params = {}
+    except Exception as e:
+        logger.error("Error adding plants in batch: %s", e)
+        raise
 
-        # Search term if available
-        if search_term:
-            query_conditions.append("common_name ILIKE %(search_term)s")
-            query_params['search_term'] = f"%{search_term}%"
+# Upsert many plants with MERGE, skipping rows whose content has not changed
+def upsert_plants(records):
+    try:
+        started = time.monotonic()
+        validated, errors = validate_plants(records)
+        if errors:
+            logger.warning("Skipping %s invalid plant records in upsert.", len(errors))
+
+        # MERGE rejects a source that matches a target row twice, so keep the last copy of each id
+        unique = list({plant['id']: plant for plant in validated}.values())
+
+        counts = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+        # analytics are adjusted by diffing each row against what it replaces
+        track_changes = aggregates_enabled()
+        changes = []
+        with pooled_connection(operation='upsert_plants') as conn:
+            cursor = conn.cursor()
+            try:
+                for start in range(0, len(unique), PLANT_INSERT_ROWS_PER_STATEMENT):
+                    chunk = unique[start:start + PLANT_INSERT_ROWS_PER_STATEMENT]
+                    if track_changes:
+                        previous = _fetch_plants_by_id(cursor, [plant['id'] for plant in chunk],
+                                                       AGGREGATE_COLUMNS)
+                        changes.extend((previous.get(plant['id']), plant) for plant in chunk)
+                    params = [value for plant in chunk for value in _row_params(plant)]
+                    cursor.execute(_merge_sql(len(chunk)), params)
+                    # Snowflake reports (rows inserted, rows updated) for a MERGE
+                    inserted, updated = cursor.fetchone()[:2]
+                    counts['inserted'] += inserted
+                    counts['updated'] += updated
+                    counts['unchanged'] += len(chunk) - inserted - updated
+                conn.commit()
+                _invalidate_read_caches()
+            finally:
+                cursor.close()
+
+        _index_plants(unique)
+        record_plant_changes(changes)
+
+        elapsed = time.monotonic() - started
+        logger.info("Upserted %s plants in %.2fs: %s inserted, %s updated, %s unchanged.",
+                    len(unique), elapsed, counts['inserted'], counts['updated'], counts['unchanged'])
+        counts['errors'] = errors
+        return counts
 
-        # Additional filters if available
-        if filters:
-            for key, value in filters.items():
-                query_conditions.append(f"{key} = %({key})s")
-                query_params[key] = value
+    except Exception as e:
+        logger.error("Error upserting plants: %s", e)
+        raise
 
-        # Add conditions to the query
-        if query_conditions:
-            query += " WHERE " + " AND ".join(query_conditions)
+# Snowflake returns ARRAY/OBJECT columns as JSON text; responses embed it as-is
+VARIANT_COLUMNS = frozenset(ARRAY_FIELDS + OBJECT_FIELDS)
+
+def _rows_to_dicts(cursor, rows):
+    """snowflake reports unquoted identifiers in upper case, plant dicts use the schema's lower case"""
+    columns = [desc[0].lower() for desc in cursor.description]
+    variant_positions = [i for i, column in enumerate(columns) if column in VARIANT_COLUMNS]
+    plants = []
+    for row in rows:
+        if variant_positions:
+            row = list(row)
+            for i in variant_positions:
+                if isinstance(row[i], str):
+                    row[i] = RawJSON(row[i])
+        plants.append(dict(zip(columns, row)))
+    return plants
+
+# Sort keys allowed for keyset pagination; every ordering is tie-broken on id
+SORT_COLUMNS = {
+    'id': 'id',
+    'common_name': "COALESCE(common_name, '')",
+    'family': "COALESCE(family, '')",
+    'cycle': "COALESCE(cycle, '')",
+    'watering': "COALESCE(watering, '')",
+    'care_level': "COALESCE(care_level, '')",
+}
+
+class InvalidCursor(ValueError):
+    pass
+
+def encode_cursor(sort, plant):
+    """opaque continuation token pointing just past `plant` in `sort` order"""
+    value = plant.get('id') if sort == 'id' else (plant.get(sort) or '')
+    raw = json.dumps([sort, value, plant.get('id')], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(token):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        sort, value, last_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError, UnicodeDecodeError):
+        raise InvalidCursor("Malformed pagination cursor")
+    if sort not in SORT_COLUMNS or not isinstance(last_id, int):
+        raise InvalidCursor("Malformed pagination cursor")
+    return sort, value, last_id
+
+# Totals are cached briefly per WHERE clause and dropped on any write
+COUNT_CACHE_TTL = 60  # seconds
+_count_cache = LRUCache(max_entries=256)
+
+def _invalidate_read_caches():
+    global _snapshot_stale
+    _count_cache.clear()
+    _snapshot_stale = True
+
+# In-memory snapshot of the filterable and list columns, so hot filtered list
+# queries are answered without a warehouse round trip. It is rebuilt in the
+# background after local writes or once it is older than the refresh interval;
+# until a fresh one is ready, queries fall through to SQL.
+SNAPSHOT_COLUMNS = list(dict.fromkeys(['id'] + DEFAULT_LIST_FIELDS + list(FIELD_TYPES)))
+SNAPSHOT_REFRESH_SECONDS = 300
+_snapshot = None
+_snapshot_built_at = 0.0
+_snapshot_stale = False
+_snapshot_building = False
+_snapshot_lock = threading.Lock()
+
+def _build_snapshot():
+    global _snapshot, _snapshot_built_at, _snapshot_stale, _snapshot_building
+    try:
+        # writes that land while the snapshot loads leave it marked stale
+        _snapshot_stale = False
+        rows = []
+        with pooled_connection(operation='build_snapshot') as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(f"SELECT {', '.join(SNAPSHOT_COLUMNS)} FROM plants")
+                while True:
+                    batch = cursor.fetchmany(1000)
+                    if not batch:
+                        break
+                    rows.extend(_rows_to_dicts(cursor, batch))
+            finally:
+                cursor.close()
+        _snapshot = PlantSnapshot(rows, SNAPSHOT_COLUMNS)
+        _snapshot_built_at = time.monotonic()
+        logger.info("Built plant snapshot with %s rows.", len(rows))
+    except Exception as e:
+        _snapshot_stale = True
+        logger.error("Error building plant snapshot: %s", e)
+    finally:
+        _snapshot_building = False
+
+def _current_snapshot():
+    """the snapshot if it is fresh, otherwise None after kicking off a rebuild"""
+    global _snapshot_building
+    if (_snapshot is not None and not _snapshot_stale
+            and time.monotonic() - _snapshot_built_at < SNAPSHOT_REFRESH_SECONDS):
+        return _snapshot
+    with _snapshot_lock:
+        start_build = not _snapshot_building
+        _snapshot_building = True
+    if start_build:
+        threading.Thread(target=_build_snapshot, daemon=True).start()
+    return None
+
+def _escape_like(term):
+    """escapes LIKE wildcards so user input only ever matches itself"""
+    return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+def _build_where(search_term=None, conditions=()):
+    """WHERE clause shared by the page query and its count"""
+    query_conditions = []
+    query_params = {}
+
+    # Search term if available, matched literally as the snapshot does
+    if search_term:
+        query_conditions.append("common_name ILIKE %(search_term)s ESCAPE '\\\\'")
+        query_params['search_term'] = f"%{_escape_like(search_term)}%"
+
+    # Structured filters, compiled to bound parameters
+    filter_conditions, filter_params = compile_sql(conditions)
+    query_conditions.extend(filter_conditions)
+    query_params.update(filter_params)
+
+    return query_conditions, query_params
+
+def _count_plants(cursor, query_conditions, query_params):
+    where = " WHERE " + " AND ".join(query_conditions) if query_conditions else ""
+    key = make_key(where, query_params)
+    entry = _count_cache.get(key)
+    now = time.time()
+    if entry is not None and now < entry[2]:
+        return entry[0]
+
+    cursor.execute(f"SELECT COUNT(*) FROM plants{where}", query_params)
+    total_count = cursor.fetchone()[0]
+    _count_cache.set(key, (total_count, now, now + COUNT_CACHE_TTL))
+    return total_count
+
+def _page_result(plants, sort, limit, include_count, total_count):
+    result = {'plants': plants}
+    result['next_cursor'] = encode_cursor(sort, plants[-1]) if len(plants) == limit else None
+    if include_count:
+        result['count'] = total_count
+    logger.info("Retrieved %s plants with pagination.", len(plants))
+    return result
 
-        # Add pagination
-        query += " LIMIT %(limit)s OFFSET %(offset)s"
-        query_params['limit'] = limit
-        query_params['offset'] = offset
+# Find all plants with pagination
+def find_all_plants_with_pagination(limit=10, offset=0, search_term=None, filters=None,
+                                    after=None, sort='id', include_count=True, fields=None):
+    """
+    Pages through plants either by offset or, when `after` is a cursor from a
+    previous page, by keyset so deep pages cost the same as the first one.
+    The total is only counted when `include_count` is set, and `fields`
+    limits the selected columns (None selects all of them).
+    """
+    try:
+        if after:
+            sort, after_value, after_id = decode_cursor(after)
+        elif sort not in SORT_COLUMNS:
+            raise ValueError(f"Unsupported sort key: {sort}")
+        sort_expression = SORT_COLUMNS[sort]
+
+        conditions = parse_filters(filters)
+
+        # id and the sort column are needed to build the next cursor
+        required = ('id',) if sort == 'id' else ('id', sort)
+        if fields is not None:
+            columns = _projected_columns(fields, required)
+            snapshot = _current_snapshot()
+            if snapshot is not None and snapshot.covers(columns, conditions, sort):
+                plants, total_count = snapshot.query(
+                    conditions, search_term=search_term, sort=sort,
+                    after=(after_value, after_id) if after else None,
+                    limit=limit, offset=offset, fields=columns, include_count=include_count)
+                return _page_result(plants, sort, limit, include_count, total_count)
+
+        query_conditions, query_params = _build_where(search_term, conditions)
+        page_conditions = list(query_conditions)
+
+        if after:
+            if sort == 'id':
+                page_conditions.append("id > %(after_id)s")
+            else:
+                page_conditions.append(
+                    f"({sort_expression} > %(after_value)s OR "
+                    f"({sort_expression} = %(after_value)s AND id > %(after_id)s))")
+                query_params['after_value'] = after_value
+            query_params['after_id'] = after_id
 
-        cursor.execute(query, query_params)
-        rows = cursor.fetchall()
-        plants = [dict(zip([desc[0] for desc in cursor.description], row))
-                  for row in rows]
+        query = f"SELECT {_projection(fields, required)} FROM plants"
+        if page_conditions:
+            query += " WHERE " + " AND ".join(page_conditions)
 
-        # Count total
-        cursor.execute("SELECT COUNT(*) FROM plants")
-        total_count = cursor.fetchone()[0]
+        order = "id" if sort == 'id' else f"{sort_expression}, id"
+        query += f" ORDER BY {order}"
 
-        logger.info(f"Retrieved {len(plants)} plants with pagination.")
-        return {'plants': plants, 'count': total_count}
+        # Add pagination
+        page_params = dict(query_params)
+        query += " LIMIT %(limit)s"
+        page_params['limit'] = limit
+        if not after:
+            query += " OFFSET %(offset)s"
+            page_params['offset'] = offset
+
+        with pooled_connection(operation='find_all_plants_with_pagination') as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(query, page_params)
+                plants = _rows_to_dicts(cursor, cursor.fetchall())
+
+                total_count = None
+                if include_count:
+                    count_params = {key: value for key, value in query_params.items()
+                                    if not key.startswith('after_')}
+                    total_count = _count_plants(cursor, query_conditions, count_params)
+            finally:
+                cursor.close()
+
+        return _page_result(plants, sort, limit, include_count, total_count)
 
     except Exception as e:
-        logger.error(f"Error retrieving plants with pagination: {e}")
+        logger.error("Error retrieving plants with pagination: %s", e)
         raise
-    finally:
-        if 'cursor' in locals():
-            cursor.close()
-        if 'conn' in locals():
-            conn.close()
 
-# Fetch plant by ID from the database
-def get_plant_by_any_id(plant_id):
-    try:
-        conn = get_connection()
+# Stream plants for export
+def stream_plants(fields=None, search_term=None, filters=None, batch_size=PLANT_EXPORT_FETCH_SIZE):
+    """
+    Returns (columns, batches) for every plant matching the search and filters,
+    in id order. Arguments are validated up front; `batches` is a generator that
+    holds one pooled connection while it runs and yields lists of at most
+    `batch_size` plant dicts fetched from a server-side cursor, so memory stays
+    flat however large the table is.
+    """
+    columns = list(fields) if fields is not None else SELECTABLE_COLUMNS
+    conditions = parse_filters(filters)
+    query_conditions, query_params = _build_where(search_term, conditions)
+    query = f"SELECT {', '.join(columns)} FROM plants"
+    if query_conditions:
+        query += " WHERE " + " AND ".join(query_conditions)
+    query += " ORDER BY id"
+
+    def batches():
+        exported = 0
+        with pooled_connection(operation='stream_plants') as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(query, query_params)
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    exported += len(rows)
+                    yield _rows_to_dicts(cursor, rows)
+            finally:
+                cursor.close()
+        logger.info("Exported %s plants.", exported)
+
+    return columns, batches()
+
+def _fetch_plant(cursor, plant_id, fields=None):
+    """loads a single plant row as a dict using an already-open cursor"""
+    cursor.execute(f"SELECT {_projection(fields)} FROM plants WHERE id = %s", (plant_id,))
+    row = cursor.fetchone()
+    if row:
+        return _rows_to_dicts(cursor, [row])[0]
+    return None
+
+# Name search index, built from the plants table on first use and kept current by the write paths
+def _fetch_plants_by_id(cursor, plant_ids, fields):
+    """loads the given columns of several plants at once, keyed by id"""
+    if not plant_ids:
+        return {}
+    placeholders = ', '.join(['%s'] * len(plant_ids))
+    cursor.execute(f"SELECT {_projection(fields, ('id',))} FROM plants WHERE id IN ({placeholders})",
+                   list(plant_ids))
+    return {plant['id']: plant for plant in _rows_to_dicts(cursor, cursor.fetchall())}
+
+SEARCH_FIELDS = ['id', 'common_name', 'scientific_name', 'other_name']
+# other workers write too, so each worker rebuilds its copy in the background this often
+SEARCH_INDEX_REFRESH_SECONDS = 600
+_search_index = None
+_search_index_built_at = 0.0
+_search_index_refreshing = False
+_search_index_lock = threading.Lock()
+
+def _load_search_index():
+    index = SearchIndex()
+    with pooled_connection(operation='load_search_index') as conn:
         cursor = conn.cursor()
+        try:
+            cursor.execute(f"SELECT {', '.join(SEARCH_FIELDS)} FROM plants")
+            while True:
+                rows = cursor.fetchmany(1000)
+                if not rows:
+                    break
+                for plant in _rows_to_dicts(cursor, rows):
+                    index.add(plant)
+        finally:
+            cursor.close()
+    logger.info("Built search index over %s plants.", len(index))
+    return index
 
-        cursor.execute("SELECT * FROM plants WHERE id = %s", (plant_id,))
-        row = cursor.fetchone()
+def _refresh_search_index():
+    global _search_index, _search_index_built_at, _search_index_refreshing
+    try:
+        index = _load_search_index()
+        with _search_index_lock:
+            _search_index = index
+            _search_index_built_at = time.monotonic()
+    except Exception as e:
+        logger.error("Error refreshing search index: %s", e)
+    finally:
+        _search_index_refreshing = False
+
+def get_search_index():
+    global _search_index, _search_index_built_at, _search_index_refreshing
+    if _search_index is None:
+        with _search_index_lock:
+            if _search_index is None:
+                _search_index = _load_search_index()
+                _search_index_built_at = time.monotonic()
+    elif time.monotonic() - _search_index_built_at > SEARCH_INDEX_REFRESH_SECONDS:
+        with _search_index_lock:
+            start_refresh = not _search_index_refreshing
+            _search_index_refreshing = True
+        if start_refresh:
+            threading.Thread(target=_refresh_search_index, daemon=True).start()
+    return _search_index
+
+def _index_plants(plants):
+    # nothing to maintain until the index has been built; the build reads current rows
+    if _search_index is None:
+        return
+    for plant in plants:
+        _search_index.add(plant)
+
+def _reindex_updated_plant(before, changes):
+    if _search_index is None or not any(field in changes for field in SEARCH_FIELDS):
+        return
+    merged = {field: before.get(field) for field in SEARCH_FIELDS}
+    merged.update({field: changes[field] for field in SEARCH_FIELDS if field in changes})
+    _search_index.add(merged)
+
+def _unindex_plant(plant_id):
+    if _search_index is not None:
+        _search_index.remove(plant_id)
+
+def search_plants(query, limit=10):
+    """ranked, prefix-aware name search served from the in-process index"""
+    return get_search_index().search(query, limit=limit)
 
-        if row:
-            plant_data = dict(zip([desc[0]
-                              for desc in cursor.description], row))
-            logger.info(f"Plant found: {plant_data['common_name']}")
+# Fetch plant by ID from the database
+def get_plant_by_any_id(plant_id, fields=None):
+    try:
+        with pooled_connection(operation='get_plant_by_any_id') as conn:
+            cursor = conn.cursor()
+            try:
+                plant_data = _fetch_plant(cursor, plant_id, fields)
+            finally:
+                cursor.close()
+
+        if plant_data:
+            logger.info("Plant found: %s", plant_data.get('common_name', plant_id))
             return plant_data
         else:
-            logger.warning(f"Plant with ID {plant_id} not found.")
+            logger.warning("Plant with ID %s not found.", plant_id)
             return None
 
     except Exception as e:
-        logger.error(f"Error fetching plant with ID {plant_id}: {e}")
+        logger.error("Error fetching plant with ID %s: %s", plant_id, e)
+        raise
+
+# Content hash of a stored plant, used as a cheap version for http revalidation
+def get_plant_version(plant_id):
+    try:
+        with pooled_connection(operation='get_plant_version') as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute("SELECT content_hash FROM plants WHERE id = %s", (plant_id,))
+                row = cursor.fetchone()
+            finally:
+                cursor.close()
+        return row[0] if row else None
+
+    except Exception as e:
+        logger.error("Error fetching version of plant with ID %s: %s", plant_id, e)
         raise
-    finally:
-        if 'cursor' in locals():
-            cursor.close()
-        if 'conn' in locals():
-            conn.close()
 
 # Update plant details in the database
 def update_plant_details(api_id, update_data):
     try:
-        plant = get_plant_by_any_id(api_id)
+        validated_update_data = plant_loader.load(update_data, partial=True)
 
-        if not plant:
-            raise ValueError(f"Plant with ID {api_id} not found.")
+        # Generate update statements dynamically
+        # a local edit invalidates the stored content hash so the next MERGE rewrites the row
+        update_statements = ", ".join(
+            [f"{key} = %({key})s" for key in validated_update_data.keys()] + ["content_hash = NULL"])
 
-        validated_update_data = plant_schema.load(update_data, partial=True)
+        # the existence check and the update share one borrowed connection
+        with pooled_connection(operation='update_plant_details') as conn:
+            cursor = conn.cursor()
+            try:
+                plant = _fetch_plant(cursor, api_id)
 
-        conn = get_connection()
-        cursor = conn.cursor()
+                if not plant:
+                    raise ValueError(f"Plant with ID {api_id} not found.")
 
-        # Generate update statements dynamically
-        update_statements = ", ".join(
-            [f"{key} = %({key})s" for key in validated_update_data.keys()])
-        validated_update_data['id'] = api_id
+                validated_update_data['id'] = api_id
 
-        cursor.execute(f"""
-            UPDATE plants
-            SET {update_statements}
-            WHERE id = %(id)s;
-        """, validated_update_data)
+                cursor.execute(f"""
+                    UPDATE plants
+                    SET {update_statements}
+                    WHERE id = %(id)s;
+                """, validated_update_data)
 
-        conn.commit()
-        logger.info(f"Successfully updated plant with ID {api_id}")
+                conn.commit()
+                _invalidate_read_caches()
+            finally:
+                cursor.close()
+
+        _reindex_updated_plant(plant, validated_update_data)
+        record_plant_changes([(plant, {**plant, **validated_update_data})])
+        logger.info("Successfully updated plant with ID %s", api_id)
         return validated_update_data
 
     except ValidationError as e:
-        logger.error(f"Validation error while updating plant: {e.messages}")
+        logger.error("Validation error while updating plant: %s", e.messages)
         raise
     except Exception as e:
-        if 'conn' in locals():
-            conn.rollback()
-        logger.error(f"Error updating plant with ID {api_id}: {e}")
+        logger.error("Error updating plant with ID %s: %s", api_id, e)
         raise
-    finally:
-        if 'cursor' in locals():
-            cursor.close()
-        if 'conn' in locals():
-            conn.close()
 
 # Remove plant from the database
 def remove_plant_from_db(api_id):
     try:
-        plant = get_plant_by_any_id(api_id)
-
-        if not plant:
-            logger.warning(f"Plant with ID {api_id} not found for deletion.")
-            return None
-
-        conn = get_connection()
-        cursor = conn.cursor()
-
-        cursor.execute("DELETE FROM plants WHERE id = %s", (api_id,))
-        conn.commit()
-
-        logger.info(f"Successfully removed plant with ID {api_id}")
+        with pooled_connection(operation='remove_plant_from_db') as conn:
+            cursor = conn.cursor()
+            try:
+                plant = _fetch_plant(cursor, api_id)
+
+                if not plant:
+                    logger.warning("Plant with ID %s not found for deletion.", api_id)
+                    return None
+
+                cursor.execute("DELETE FROM plants WHERE id = %s", (api_id,))
+                conn.commit()
+                _invalidate_read_caches()
+            finally:
+                cursor.close()
+
+        _unindex_plant(api_id)
+        record_plant_changes([(plant, None)])
+        logger.info("Successfully removed plant with ID %s", api_id)
         return plant
 
     except Exception as e:
-        if 'conn' in locals():
-            conn.rollback()
-        logger.error(f"Error removing plant with ID {api_id}: {e}")
+        logger.error("Error removing plant with ID %s: %s", api_id, e)
         raise
-    finally:
-        if 'cursor' in locals():
-            cursor.close()
-        if 'conn' in locals():
-            conn.close()
 
 # Fetch a random plant and add to the database (example use case)
 def add_random_plant():
@@ -233,5 +857,5 @@ def add_random_plant():
         new_plant = add_plant(random_plant_data)
         return new_plant
     except Exception as e:
-        logger.error(f"Error adding random plant to the database: {e}")
+        logger.error("Error adding random plant to the database: %s", e)
         raise
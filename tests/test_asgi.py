@@ -0,0 +1,119 @@
+# tests/test_asgi.py
+import asyncio
+import os
+import sys
+
+import httpx
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import asgi
+import routes
+from services import perenual_async_service, perenual_service
+from utils.cache import TieredCache
+from utils.governor import OutboundGovernor
+
+FIR = {'id': 7, 'common_name': 'Fir', 'scientific_name': ['Abies'], 'cycle': 'Perennial'}
+
+
+def mock_perenual(calls, delay=0.05, in_flight=None):
+    """stands in for perenual: species details for any id, counting upstream calls"""
+    in_flight = in_flight if in_flight is not None else {'now': 0, 'max': 0}
+
+    async def handler(request):
+        calls.append(request.url.path)
+        in_flight['now'] += 1
+        in_flight['max'] = max(in_flight['max'], in_flight['now'])
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            in_flight['now'] -= 1
+        if request.url.path.startswith('/species/details/'):
+            return httpx.Response(200, json={**FIR, 'id': int(request.url.path.rsplit('/', 1)[1])})
+        if request.url.path == '/pest-disease-list':
+            return httpx.Response(200, json={'data': [{'id': 1, 'common_name': 'Rust'}]})
+        if request.url.path == '/species-care-guide-list' and request.url.params['species_id'] != '13':
+            return httpx.Response(200, json={'data': [{'id': 2, 'type': 'watering'}]})
+        return httpx.Response(404, json={'message': 'Not found'})
+    return httpx.MockTransport(handler)
+
+
+def run(calls, requests, delay=0.05, in_flight=None):
+    """
+    sends `requests` concurrently to the asgi app with fresh perenual client
+    state; `in_flight` records the most upstream calls that were open at once
+    """
+    async def main():
+        routes._limiter_backend = None
+        perenual_service._cache = TieredCache(None)
+        perenual_service._governor = OutboundGovernor(rate_per_sec=10000, burst=10000)
+        perenual_async_service._client = httpx.AsyncClient(base_url='http://perenual.test',
+                                                           transport=mock_perenual(calls, delay, in_flight))
+        transport = httpx.ASGITransport(app=asgi.app, client=('10.0.0.1', 1234))
+        async with httpx.AsyncClient(transport=transport, base_url='http://app.test') as client:
+            try:
+                return await asyncio.gather(*(client.get(path, headers=headers)
+                                              for path, headers in requests))
+            finally:
+                await perenual_async_service.aclose()
+    return asyncio.run(main())
+
+
+def test_concurrent_details_share_one_upstream_call():
+    calls = []
+    responses = run(calls, [('/api/plants/perenual/7', {})] * 20 + [('/api/plants/perenual/8', {})])
+    assert [response.status_code for response in responses] == [200] * 21
+    assert sorted(calls) == ['/species/details/7', '/species/details/8']
+    body = responses[0].json()
+    assert body['data']['common_name'] == 'Fir'
+    assert 'timestamp' not in body
+    assert responses[0].headers['Cache-Control'] == 'public, max-age=86400, stale-while-revalidate=3600'
+    assert responses[0].headers['X-RateLimit-Limit'] == '100'
+
+
+def test_requests_overlap_instead_of_queueing():
+    in_flight = {'now': 0, 'max': 0}
+    responses = run([], [(f'/api/plants/perenual/{plant_id}/diseases', {}) for plant_id in range(1, 51)],
+                    delay=0.2, in_flight=in_flight)
+    assert all(response.json()['data']['diseases'][0]['common_name'] == 'Rust' for response in responses)
+    assert in_flight['max'] >= 10  # serialized calls would never overlap
+
+
+def test_errors_validation_and_revalidation_match_flask_routes():
+    first, = run([], [('/api/plants/perenual/7', {})])
+    not_modified, bad_id, bad_guide, upstream_error, quota = run([], [
+        ('/api/plants/perenual/7', {'If-None-Match': first.headers['ETag']}),
+        ('/api/plants/perenual/2000000', {}),
+        ('/api/plants/perenual/7/guides?type=misting', {}),
+        ('/api/plants/perenual/13/guides', {}),
+        ('/api/plants/perenual/quota', {}),  # not proxied, so served by flask
+    ], delay=0)
+    assert not_modified.status_code == 304 and not_modified.content == b''
+    assert bad_id.status_code == 400 and bad_id.json()['error'] == 'Invalid ID value'
+    assert bad_guide.status_code == 400 and bad_guide.json()['error'] == 'Invalid guide type'
+    assert upstream_error.status_code == 500
+    assert quota.status_code == 200 and quota.json()['data']['upstream_calls'] == 0
+
+
+def test_plant_page_fetches_parts_in_parallel_and_tolerates_failures(monkeypatch):
+    in_flight = {'now': 0, 'max': 0}
+    full, partial = run([], [('/api/plants/perenual/7/full', {}), ('/api/plants/perenual/13/full', {})],
+                        delay=0.3, in_flight=in_flight)
+    assert in_flight['max'] >= 3  # a page's parts were upstream at the same time
+
+    page = full.json()['data']
+    assert page['details']['common_name'] == 'Fir'
+    assert page['diseases'][0]['common_name'] == 'Rust'
+    assert page['guides'] == [{'id': 2, 'type': 'watering'}]
+    assert page['errors'] == {} and not page['partial'] and 'local' not in page
+    assert full.headers['Cache-Control'].startswith('public')
+
+    page = partial.json()['data']
+    assert partial.status_code == 200 and page['partial']
+    assert page['guides'] is None
+    assert page['errors'] == {'guides': 'Perenual returned HTTP 404'}
+    assert partial.headers['Cache-Control'] == 'no-store'
+
+    monkeypatch.setitem(perenual_service.PLANT_PAGE_TIMEOUTS, 'diseases', 0.1)
+    slow, = run([], [('/api/plants/perenual/8/full', {})], delay=0.3)
+    assert slow.json()['data']['errors'] == {'diseases': 'timed out after 0.1s'}
@@ -0,0 +1,115 @@
+# tests/test_cache.py
+import asyncio
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.cache import TieredCache, make_key
+
+
+def expire(cache, endpoint, params, ago):
+    """backdates an entry so it expired `ago` seconds ago"""
+    key = make_key(endpoint, params)
+    value, stored_at, expires_at = cache.memory.get(key)
+    cache.memory.set(key, (value, stored_at - ago, time.time() - ago))
+    if cache.disk is not None:
+        cache.disk.set(key, (value, stored_at - ago, time.time() - ago))
+
+
+def test_misses_fetch_once_then_hit():
+    cache = TieredCache(None)
+    calls = []
+    fetch = lambda: calls.append(1) or {'id': 7}
+    assert cache.get_or_fetch('details', {'id': 7}, fetch) == {'id': 7}
+    assert cache.get_or_fetch('details', {'id': 7}, fetch) == {'id': 7}
+    assert len(calls) == 1
+    assert cache.stats()['memory_hits'] == 1 and cache.stats()['misses'] == 1
+
+
+def test_disk_tier_survives_a_restart(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    TieredCache(path).get_or_fetch('details', {'id': 7}, lambda: {'id': 7})
+    restarted = TieredCache(path)
+    assert restarted.get_or_fetch('details', {'id': 7}, lambda: 1 / 0) == {'id': 7}
+    assert restarted.stats()['disk_hits'] == 1
+
+
+def test_cache_if_returns_but_does_not_store_rejected_values():
+    cache = TieredCache(None)
+    assert cache.get_or_fetch('species_list', {'page': 9}, lambda: [], cache_if=bool) == []
+    assert cache.get_or_fetch('species_list', {'page': 9}, lambda: [1], cache_if=bool) == [1]
+    assert cache.get_or_fetch('species_list', {'page': 9}, lambda: 1 / 0, cache_if=bool) == [1]
+    assert cache.stats()['misses'] == 2
+
+
+def test_stale_entries_are_served_while_one_refresh_runs():
+    cache = TieredCache(None, default_ttl=60, stale_ttl=60)
+    cache.get_or_fetch('details', {'id': 7}, lambda: 'old')
+    expire(cache, 'details', {'id': 7}, ago=10)
+
+    release, calls = threading.Event(), []
+
+    def slow_fetch():
+        calls.append(1)
+        release.wait(5)
+        return 'new'
+
+    assert cache.get_or_fetch('details', {'id': 7}, slow_fetch) == 'old'
+    assert cache.get_or_fetch('details', {'id': 7}, slow_fetch) == 'old'
+    release.set()
+    for _ in range(100):
+        if cache.stats()['refreshes']:
+            break
+        time.sleep(0.01)
+    assert calls == [1]
+    assert cache.get_or_fetch('details', {'id': 7}, lambda: 1 / 0) == 'new'
+    assert cache.stats()['stale_hits'] == 2
+
+
+def test_failed_or_rejected_refreshes_keep_the_stale_value():
+    cache = TieredCache(None, default_ttl=60, stale_ttl=60)
+    cache.get_or_fetch('details', {'id': 7}, lambda: {'id': 7})
+    expire(cache, 'details', {'id': 7}, ago=10)
+    cache._refresh(make_key('details', {'id': 7}), 'details', lambda: {'error': 'quota'},
+                   lambda payload: 'error' not in payload)
+    cache._refresh(make_key('details', {'id': 7}), 'details', lambda: 1 / 0, None)
+    assert cache.stats()['refresh_errors'] == 1
+    assert cache.get_or_fetch('details', {'id': 7}, lambda: 1 / 0) == {'id': 7}
+
+
+def test_entries_past_the_stale_window_are_fetched_inline():
+    cache = TieredCache(None, default_ttl=60, stale_ttl=60)
+    cache.get_or_fetch('details', {'id': 7}, lambda: 'old')
+    expire(cache, 'details', {'id': 7}, ago=120)
+    assert cache.get_or_fetch('details', {'id': 7}, lambda: 'new') == 'new'
+    assert cache.stats()['stale_hits'] == 0
+
+
+def test_async_callers_share_entries_and_refresh_with_a_task(tmp_path):
+    cache = TieredCache(str(tmp_path / 'cache.db'), default_ttl=60, stale_ttl=60)
+    cache.get_or_fetch('details', {'id': 7}, lambda: 'old')
+    expire(cache, 'details', {'id': 7}, ago=10)
+
+    async def fetch():
+        return 'new'
+
+    async def main():
+        stale = await cache.get_or_fetch_async('details', {'id': 7}, fetch)
+        await asyncio.gather(*cache._tasks)
+        return stale, await cache.get_or_fetch_async('details', {'id': 7}, fetch)
+
+    assert asyncio.run(main()) == ('old', 'new')
+
+
+def test_lru_tier_evicts_least_recently_used():
+    cache = TieredCache(None, memory_entries=2)
+    for plant_id in (1, 2):
+        cache.get_or_fetch('details', {'id': plant_id}, lambda: plant_id)
+    cache.get_or_fetch('details', {'id': 1}, lambda: 1 / 0)  # 1 is now most recent
+    cache.get_or_fetch('details', {'id': 3}, lambda: 3)
+    assert cache.memory.get(make_key('details', {'id': 2})) is None
+    assert cache.memory.get(make_key('details', {'id': 1})) is not None
+    assert cache.stats()['memory_evictions'] == 1
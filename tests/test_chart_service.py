@@ -0,0 +1,77 @@
+# tests/test_chart_service.py
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import routes
+from app import create_app
+from services import chart_service
+
+KEY = 'a' * 32
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(chart_service, 'CHART_CACHE_DIR', str(tmp_path))
+    return tmp_path
+
+
+def test_status_follows_a_render_started_by_another_worker(cache_dir):
+    # another process claimed the key, so this one has nothing in _pending
+    assert chart_service.chart_status(KEY) == 'missing'
+    assert chart_service._claim(KEY)
+    assert chart_service.chart_status(KEY) == 'pending'
+    (cache_dir / f'{KEY}.png').write_bytes(b'png')
+    chart_service._release(KEY)
+    assert chart_service.chart_status(KEY) == 'ready'
+
+
+def test_abandoned_renders_are_not_reported_as_pending(monkeypatch):
+    assert chart_service._claim(KEY)
+    monkeypatch.setattr(chart_service, 'CHART_PENDING_STALE_SECONDS', 0)
+    assert chart_service.chart_status(KEY) == 'missing'
+    # a stale claim is taken over by the next render
+    assert chart_service._claim(KEY)
+
+
+def test_pending_charts_answer_at_once_with_retry_after(cache_dir, monkeypatch):
+    monkeypatch.setattr(routes, '_limiter_backend', None)
+    client = create_app().test_client()
+    assert chart_service._claim(KEY)
+
+    # the route no longer waits for the render to finish, it says when to come back
+    response = client.get(f'/api/analytics/charts/{KEY}.png')
+    assert response.status_code == 202
+    assert response.headers['Retry-After'] == str(routes.CHART_RETRY_AFTER_SECONDS)
+    assert response.headers['Cache-Control'] == 'no-store'
+
+    (cache_dir / f'{KEY}.png').write_bytes(b'png')
+    chart_service._release(KEY)
+    response = client.get(f'/api/analytics/charts/{KEY}.png')
+    assert response.status_code == 200 and response.data == b'png'
+    assert client.get(f"/api/analytics/charts/{'b' * 32}.png").status_code == 404
+
+
+def test_a_chart_claimed_elsewhere_is_not_rendered_again(monkeypatch):
+    submitted = []
+    monkeypatch.setattr(chart_service, '_submit', lambda *args: submitted.append(args))
+    monkeypatch.setattr(chart_service, 'CHARTS', ['hardiness_zones'])
+    stats = {'hardiness_zones': {'1': 2, '2': 3}}
+    key = chart_service.chart_key('hardiness_zones', *chart_service.chart_data('hardiness_zones', stats))
+    assert chart_service._claim(key)  # a different worker got there first
+
+    assert chart_service.request_charts(stats) == {'hardiness_zones': (key, False)}
+    assert submitted == []
+
+
+def test_chart_list_is_not_cached_until_every_chart_is_ready(monkeypatch):
+    monkeypatch.setattr(routes, '_limiter_backend', None)
+    charts = {'cycle': {'title': 'Cycle', 'url': f'/api/analytics/charts/{KEY}.png', 'ready': False}}
+    monkeypatch.setattr(routes, 'analytics_charts', lambda: charts)
+    client = create_app().test_client()
+    assert client.get('/api/analytics/charts').headers['Cache-Control'] == 'no-store'
+    charts['cycle']['ready'] = True
+    assert client.get('/api/analytics/charts').headers['Cache-Control'] == 'public, max-age=60'
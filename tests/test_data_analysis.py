@@ -0,0 +1,246 @@
+# tests/test_data_analysis.py
+import json
+import os
+import sys
+from collections import Counter
+from contextlib import contextmanager
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.data_analysis import (
+    CatalogAggregates, contributions, counts_to_stats, zone_histogram, zone_range
+)
+
+FIR = {
+    'id': 1, 'watering': 'Frequent', 'cycle': 'Perennial', 'care_level': 'Medium', 'family': 'Pinaceae',
+    'sunlight': ['full sun', 'Part shade'], 'poisonous_to_humans': 0, 'poisonous_to_pets': 1,
+    'hardiness': {'min': '4', 'max': '6'},
+}
+# the same shape as a row read back from snowflake, with VARIANTs as JSON text
+ROSE_ROW = {
+    'id': 2, 'watering': 'Average', 'cycle': 'Perennial', 'care_level': None, 'family': 'Rosaceae',
+    'sunlight': json.dumps(['full sun']), 'poisonous_to_humans': True, 'poisonous_to_pets': True,
+    'hardiness': json.dumps({'min': '9', 'max': '5'}),
+}
+
+
+def full_count(plants):
+    counts = Counter()
+    for plant in plants:
+        counts.update(contributions(plant))
+    return counts_to_stats(counts)
+
+
+def test_zone_range_matches_histogram():
+    mins, maxs = [4, 9, np.nan, 0, 12], [6, 5, 3, 2, 20]
+    expected = np.zeros(13, dtype=np.int64)
+    for low, high in zip(mins, maxs):
+        for zone in zone_range({'min': low, 'max': high}):
+            expected[zone - 1] += 1
+    assert list(zone_histogram(mins, maxs)) == list(expected)
+
+
+def test_incremental_changes_match_a_full_recount():
+    aggregates = CatalogAggregates(full_count([]))
+    aggregates.apply([(None, FIR), (None, ROSE_ROW)])
+    assert aggregates.snapshot() == full_count([FIR, ROSE_ROW])
+
+    watered = {**ROSE_ROW, 'watering': 'Minimum', 'poisonous_to_pets': False}
+    aggregates.apply([(ROSE_ROW, watered)])
+    assert aggregates.snapshot() == full_count([FIR, watered])
+
+    aggregates.apply([(FIR, None)])
+    stats = aggregates.snapshot()
+    assert stats == full_count([watered])
+    assert stats['total'] == 1
+    assert stats['toxicity']['toxic_to_both'] == 0
+    assert 'Frequent' not in stats['watering']
+
+
+def test_changes_during_reconcile_are_replayed():
+    aggregates = CatalogAggregates(full_count([FIR]))
+    as_of = aggregates.begin_reconcile()
+    aggregates.apply([(None, ROSE_ROW)])
+    # the recount read the table as of as_of, before the rose was written
+    aggregates.finish_reconcile(full_count([FIR]), as_of)
+    assert aggregates.snapshot() == full_count([FIR, ROSE_ROW])
+
+
+def test_writes_the_recount_saw_are_not_replayed():
+    aggregates = CatalogAggregates(full_count([]))
+    as_of = aggregates.begin_reconcile()
+    # the fir committed before the recount's instant and is in the recount; the rose came after
+    aggregates.apply([(None, FIR)], committed_at=as_of - 0.5)
+    aggregates.apply([(None, ROSE_ROW)], committed_at=as_of + 0.5)
+    aggregates.finish_reconcile(full_count([FIR]), as_of)
+    stats = aggregates.snapshot()
+    assert stats == full_count([FIR, ROSE_ROW])
+    assert stats['total'] == 2
+
+
+def test_recount_reads_every_query_as_of_one_instant(monkeypatch):
+    from services import analytics_service
+
+    executed = []
+
+    class Cursor:
+        description = [('ZONE_MIN',), ('ZONE_MAX',)]
+
+        def execute(self, query, params=None):
+            executed.append((query, params))
+
+        def fetchmany(self, size):
+            return []
+
+        def close(self):
+            pass
+
+    class Connection:
+        def cursor(self):
+            return Cursor()
+
+    @contextmanager
+    def connection(timeout=None, operation=None):
+        yield Connection()
+
+    monkeypatch.setattr(analytics_service, 'installed_pandas', False)
+    monkeypatch.setattr(analytics_service, 'pooled_connection', connection)
+    analytics_service.compute_catalog_stats(as_of=1700000000.0)
+    assert len(executed) == 3
+    for query, params in executed:
+        assert 'plants AT(TIMESTAMP => TO_TIMESTAMP_LTZ(%(as_of)s))' in query
+        assert params == {'as_of': 1700000000.0}
+
+
+def test_write_landing_before_the_recount_reads_counts_once(monkeypatch):
+    from services import analytics_service
+
+    def recount(as_of):
+        # the rose commits after the recount's instant but before its queries run;
+        # reading as of `as_of` leaves it out, and the journal replays it exactly once
+        analytics_service.record_plant_changes([(None, ROSE_ROW)])
+        return full_count([FIR])
+
+    monkeypatch.setattr(analytics_service, '_aggregates', CatalogAggregates(full_count([FIR])))
+    monkeypatch.setattr(analytics_service, 'compute_catalog_stats', recount)
+    analytics_service._reconcile_aggregates()
+    assert analytics_service._aggregates.snapshot() == full_count([FIR, ROSE_ROW])
+
+
+def _number(value):
+    try:
+        return float(str(value).strip())
+    except ValueError:
+        return None
+
+
+class WarehouseCursor:
+    """
+    Answers the three analytics queries the way snowflake would for `plants`,
+    handing rows back in fetchmany() batches or as Arrow-style DataFrames.
+    """
+
+    def __init__(self, plants, batch_rows=2):
+        self.plants = plants
+        self.batch_rows = batch_rows
+        self.frames = 0
+
+    def execute(self, query, params=None):
+        from utils.data_analysis import DISTRIBUTION_COLUMNS
+
+        if 'GROUPING SETS' in query:
+            flags = [f'g_{column}' for column in DISTRIBUTION_COLUMNS] + ['g_toxicity']
+            columns = DISTRIBUTION_COLUMNS + ['poisonous_to_humans', 'poisonous_to_pets']
+            sets = [[column] for column in DISTRIBUTION_COLUMNS] + [columns[-2:]]
+            rows = []
+            for position, grouped_by in enumerate(sets):
+                groups = Counter(tuple(plant[column] for column in grouped_by) for plant in self.plants)
+                for key, count in groups.items():
+                    values = dict(zip(grouped_by, key))
+                    # GROUPING() is 0 for the set a row belongs to; the toxicity flag is a bitmask
+                    row_flags = [int(index != position) for index in range(len(DISTRIBUTION_COLUMNS))]
+                    row_flags.append(0 if position == len(DISTRIBUTION_COLUMNS) else 3)
+                    rows.append(tuple(values.get(column) for column in columns) + tuple(row_flags) + (count,))
+            names = columns + flags + ['plants']
+        elif 'FLATTEN' in query:
+            holders = {}
+            for plant in self.plants:
+                for light in json.loads(plant['sunlight'] or '[]'):
+                    holders.setdefault(light.strip().lower(), set()).add(plant['id'])
+            rows = [(light, 0, len(ids)) for light, ids in holders.items()]
+            names = ['sunlight', 'g_sunlight', 'plants']
+        else:
+            rows = []
+            for plant in self.plants:
+                if plant['hardiness'] is not None:
+                    hardiness = json.loads(plant['hardiness'])
+                    rows.append((_number(hardiness.get('min')), _number(hardiness.get('max'))))
+            names = ['zone_min', 'zone_max']
+        self.description = [(name.upper(),) for name in names]
+        self.rows = rows
+
+    def fetchmany(self, size):
+        batch, self.rows = self.rows[:self.batch_rows], self.rows[self.batch_rows:]
+        return batch
+
+    def fetch_pandas_batches(self):
+        import pandas as pd
+
+        columns = [desc[0] for desc in self.description]
+        while self.rows:
+            self.frames += 1
+            yield pd.DataFrame.from_records(self.fetchmany(self.batch_rows), columns=columns)
+
+    def close(self):
+        pass
+
+
+def stored(plant):
+    """a plant as the warehouse holds it: VARIANT columns as JSON text"""
+    return {**plant, 'sunlight': json.dumps(plant['sunlight']), 'hardiness': json.dumps(plant['hardiness'])}
+
+
+CATALOG = [
+    stored(FIR),
+    ROSE_ROW,
+    stored({**FIR, 'id': 3, 'family': None, 'sunlight': [' FULL SUN '], 'poisonous_to_humans': None,
+            'hardiness': {'min': 'n/a', 'max': '7'}}),
+    {**ROSE_ROW, 'id': 4, 'watering': None, 'sunlight': None, 'hardiness': None,
+     'poisonous_to_humans': False, 'poisonous_to_pets': None},
+]
+
+
+def run_warehouse_stats(monkeypatch, plants, arrow):
+    from services import analytics_service
+
+    cursor = WarehouseCursor(plants)
+
+    class Connection:
+        def cursor(self):
+            return cursor
+
+    @contextmanager
+    def connection(timeout=None, operation=None):
+        yield Connection()
+
+    monkeypatch.setattr(analytics_service, 'installed_pandas', arrow)
+    monkeypatch.setattr(analytics_service, 'pooled_connection', connection)
+    return analytics_service.compute_catalog_stats(), cursor
+
+
+def test_warehouse_queries_match_a_row_by_row_count(monkeypatch):
+    for arrow in (False, True):
+        stats, cursor = run_warehouse_stats(monkeypatch, CATALOG, arrow)
+        assert stats == full_count(CATALOG)
+        assert (cursor.frames > 1) == arrow  # results arrive in more than one batch
+    assert stats['total'] == 4
+    assert stats['sunlight'] == {'full sun': 3, 'part shade': 1}
+    assert stats['toxicity']['humans'] == {'toxic': 1, 'non_toxic': 2, 'unknown': 1}
+
+
+def test_an_empty_catalog_has_zero_counts(monkeypatch):
+    stats, _ = run_warehouse_stats(monkeypatch, [], False)
+    assert stats == full_count([])
+    assert stats['total'] == 0 and set(stats['hardiness_zones'].values()) == {0}
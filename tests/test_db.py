@@ -0,0 +1,86 @@
+# tests/test_db.py
+import os
+import sqlite3
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from db import ConnectionPool, PoolTimeout
+
+
+def sqlite_connect():
+    return sqlite3.connect(':memory:', check_same_thread=False)
+
+
+def test_connections_are_reused():
+    pool = ConnectionPool(sqlite_connect, max_size=2)
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        pass
+    assert first is second
+    assert pool.stats()['created'] == 1
+
+
+def test_checkout_times_out_when_exhausted():
+    pool = ConnectionPool(sqlite_connect, max_size=1, checkout_timeout=0.05)
+    conn = pool.acquire()
+    with pytest.raises(PoolTimeout):
+        pool.acquire()
+    pool.release(conn)
+    assert pool.stats()['checkout_timeouts'] == 1
+
+
+def test_waiter_gets_released_connection():
+    pool = ConnectionPool(sqlite_connect, max_size=1, checkout_timeout=2)
+    conn = pool.acquire()
+    borrowed = []
+
+    worker = threading.Thread(target=lambda: borrowed.append(pool.acquire()))
+    worker.start()
+    pool.release(conn)
+    worker.join()
+
+    assert borrowed == [conn]
+    assert pool.stats()['checkout_waits'] == 1
+
+
+def test_expired_connections_are_recycled():
+    pool = ConnectionPool(sqlite_connect, max_size=1, max_lifetime=0)
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        pass
+    assert first is not second
+    assert pool.stats()['recycled'] >= 1
+
+
+def test_failed_health_check_replaces_connection():
+    def broken_check(conn):
+        raise sqlite3.OperationalError("gone away")
+
+    pool = ConnectionPool(sqlite_connect, max_size=1, ping_interval=0,
+                          health_check=broken_check)
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        second.execute("SELECT 1")
+    assert first is not second
+    assert pool.stats()['failed_health_checks'] == 1
+
+
+def test_error_rolls_back_and_returns_connection():
+    pool = ConnectionPool(sqlite_connect, max_size=1)
+    with pool.connection() as conn:
+        conn.execute("CREATE TABLE plants (id INTEGER PRIMARY KEY)")
+        conn.commit()
+    with pytest.raises(RuntimeError):
+        with pool.connection() as conn:
+            conn.execute("INSERT INTO plants (id) VALUES (1)")
+            raise RuntimeError("boom")
+    with pool.connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM plants").fetchone()[0] == 0
+    assert pool.stats()['in_use'] == 0
@@ -0,0 +1,122 @@
+# tests/test_export_service.py
+import csv
+import gzip
+import io
+import json
+import os
+import sqlite3
+import sys
+from contextlib import contextmanager
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import routes
+from app import create_app
+from services import export_service, plant_service
+from services.export_service import ExportError, export_plants
+
+FIELDS = ['id', 'common_name', 'sunlight', 'indoor']
+ROWS = [(plant_id, f'Plant {plant_id}', json.dumps(['full sun']), plant_id % 2) for plant_id in range(1, 6)]
+
+
+class CountingCursor(sqlite3.Cursor):
+    fetches = 0
+
+    def fetchmany(self, size):
+        CountingCursor.fetches += 1
+        return super().fetchmany(size)
+
+
+class CountingConnection(sqlite3.Connection):
+    def cursor(self, factory=CountingCursor):
+        return super().cursor(factory)
+
+
+@pytest.fixture
+def warehouse(monkeypatch):
+    conn = sqlite3.connect(':memory:', factory=CountingConnection, check_same_thread=False)
+    conn.execute(f"CREATE TABLE plants ({', '.join(FIELDS)})")
+    conn.executemany("INSERT INTO plants VALUES (?, ?, ?, ?)", ROWS)
+
+    @contextmanager
+    def connection(timeout=None, operation=None):
+        yield conn
+
+    CountingCursor.fetches = 0
+    monkeypatch.setattr(plant_service, 'pooled_connection', connection)
+    # two rows per fetch, so five plants take three batches
+    monkeypatch.setattr(export_service, 'stream_plants',
+                        lambda **kwargs: plant_service.stream_plants(batch_size=2, **kwargs))
+    return conn
+
+
+def export(export_format, **kwargs):
+    content_type, filename, chunks = export_plants(export_format, fields=FIELDS, **kwargs)
+    return content_type, filename, b''.join(chunks)
+
+
+def test_ndjson_streams_one_batch_at_a_time(warehouse):
+    _, _, chunks = export_plants('ndjson', fields=FIELDS)
+    assert CountingCursor.fetches == 0  # nothing is read until the response is consumed
+    first = next(chunks)
+    assert CountingCursor.fetches == 1
+    lines = (first + b''.join(chunks)).decode('utf-8').splitlines()
+    assert json.loads(lines[0]) == {'id': 1, 'common_name': 'Plant 1', 'sunlight': ['full sun'], 'indoor': 1}
+    assert len(lines) == 5 and first.count(b'\n') == 2
+
+
+def test_csv_has_one_header_and_arrays_as_json_text(warehouse):
+    content_type, filename, body = export('csv')
+    assert (content_type, filename) == ('text/csv; charset=utf-8', 'plants.csv')
+    rows = list(csv.reader(io.StringIO(body.decode('utf-8'))))
+    assert rows[0] == FIELDS
+    assert rows[1] == ['1', 'Plant 1', '["full sun"]', '1']
+    assert len(rows) == 6
+
+
+def test_gzip_wraps_the_stream(warehouse):
+    content_type, filename, body = export('ndjson', compress=True)
+    assert (content_type, filename) == ('application/gzip', 'plants.ndjson.gz')
+    assert len(gzip.decompress(body).decode('utf-8').splitlines()) == 5
+
+
+@pytest.mark.parametrize('export_format, kwargs, error', [
+    ('xml', {}, 'Unsupported export format: xml'),
+    ('ndjson', {'filters': '{"no_such_field": 1}'}, 'Cannot filter on field: no_such_field'),
+])
+def test_bad_requests_fail_before_any_row_is_read(warehouse, export_format, kwargs, error):
+    with pytest.raises(ValueError, match=error):
+        export_plants(export_format, fields=FIELDS, **kwargs)
+    assert CountingCursor.fetches == 0
+
+
+def test_parquet_needs_pyarrow_and_is_never_gzipped(warehouse, monkeypatch):
+    monkeypatch.setattr(export_service, 'pyarrow', None)
+    with pytest.raises(ExportError, match='requires pyarrow'):
+        export_plants('parquet', fields=FIELDS)
+    monkeypatch.setattr(export_service, 'pyarrow', object())
+    with pytest.raises(ExportError, match='already compressed'):
+        export_plants('parquet', fields=FIELDS, compress=True)
+    assert CountingCursor.fetches == 0
+
+
+def test_parquet_writes_a_row_group_per_batch(warehouse):
+    pyarrow = pytest.importorskip('pyarrow')
+    import pyarrow.parquet
+
+    content_type, filename, body = export('parquet')
+    assert (content_type, filename) == ('application/vnd.apache.parquet', 'plants.parquet')
+    table = pyarrow.parquet.read_table(pyarrow.BufferReader(body))
+    assert table.column('id').to_pylist() == [1, 2, 3, 4, 5]
+    assert table.column('indoor').to_pylist() == [True, False, True, False, True]
+    assert pyarrow.parquet.ParquetFile(pyarrow.BufferReader(body)).num_row_groups == 3
+
+
+def test_export_route_streams_an_attachment(warehouse, monkeypatch):
+    monkeypatch.setattr(routes, '_limiter_backend', None)
+    response = create_app().test_client().get('/api/plants/export?format=csv&fields=id,common_name')
+    assert response.status_code == 200 and response.is_streamed
+    assert response.headers['Content-Disposition'] == 'attachment; filename="plants.csv"'
+    assert response.get_data(as_text=True).splitlines()[:2] == ['id,common_name', '1,Plant 1']
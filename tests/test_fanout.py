@@ -0,0 +1,117 @@
+# tests/test_fanout.py
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import routes
+from app import create_app
+from services import perenual_service
+from utils.cache import TieredCache
+from utils.fanout import fan_out
+from utils.governor import OutboundGovernor
+
+FIR = {'id': 7, 'common_name': 'Fir', 'scientific_name': ['Abies'], 'cycle': 'Perennial'}
+
+
+class FakeResponse:
+    def __init__(self, status_code, payload):
+        self.status_code = status_code
+        self._payload = payload
+
+    def json(self):
+        return self._payload
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise perenual_service.requests.exceptions.HTTPError(f"{self.status_code}", response=self)
+
+
+class FakeSession:
+    """stands in for the perenual session; calls wait at `barrier`, or for `release` if `held`"""
+
+    def __init__(self, barrier, held=None):
+        self.barrier = barrier
+        self.held = held
+        self.release = threading.Event()
+        self.timeouts = []
+
+    def get(self, url, params=None, timeout=None):
+        self.timeouts.append(timeout)
+        path = url.split('/api/', 1)[-1]
+        if path == self.held:
+            self.release.wait(5)
+        else:
+            self.barrier.wait()
+        if path.startswith('species/details/'):
+            return FakeResponse(200, FIR)
+        if path == 'pest-disease-list':
+            return FakeResponse(200, {'data': [{'id': 1, 'common_name': 'Rust'}]})
+        return FakeResponse(200, {'data': [{'id': 2, 'type': 'watering'}]})
+
+
+@pytest.fixture
+def perenual(monkeypatch):
+    monkeypatch.setattr(routes, '_limiter_backend', None)
+    monkeypatch.setattr(perenual_service, '_cache', TieredCache(None))
+    monkeypatch.setattr(perenual_service, '_governor', OutboundGovernor(rate_per_sec=10000, burst=10000))
+    monkeypatch.setattr(perenual_service, '_page_executor', ThreadPoolExecutor(4))
+
+
+def test_parts_past_their_timeout_are_reported():
+    release = threading.Event()
+    results, errors = fan_out({'fast': lambda: 1, 'slow': release.wait},
+                              {'fast': 1, 'slow': 0.05}, ThreadPoolExecutor(2))
+    release.set()
+    assert results == {'fast': 1}
+    assert str(errors['slow']) == 'timed out after 0.05s'
+
+
+def test_parts_that_never_get_a_worker_are_told_apart():
+    release = threading.Event()
+    executor = ThreadPoolExecutor(1)
+    executor.submit(release.wait)  # an earlier page's part still holds the only worker
+    ran = []
+    _, errors = fan_out({'queued': lambda: ran.append(True)}, {'queued': 0.05}, executor)
+    release.set()
+    executor.shutdown(wait=True)
+    assert str(errors['queued']) == 'no worker free within 0.05s'
+    assert ran == []
+
+
+def test_flask_plant_page_fetches_parts_concurrently(perenual, monkeypatch):
+    # the barrier only opens once all three upstream calls are in flight at the same time
+    session = FakeSession(threading.Barrier(3, timeout=5))
+    monkeypatch.setattr(perenual_service, '_session', session)
+    monkeypatch.setitem(perenual_service.PLANT_PAGE_TIMEOUTS, 'details', 10)
+    monkeypatch.setitem(perenual_service.PLANT_PAGE_TIMEOUTS, 'diseases', 10)
+    monkeypatch.setitem(perenual_service.PLANT_PAGE_TIMEOUTS, 'guides', 10)
+
+    response = create_app().test_client().get('/api/plants/perenual/7/full')
+    page = response.get_json()['data']
+    assert response.status_code == 200 and page['errors'] == {}
+    assert page['details']['common_name'] == 'Fir'
+    assert page['diseases'][0]['common_name'] == 'Rust'
+    assert page['guides'] == [{'id': 2, 'type': 'watering'}]
+    # each part reads with its own timeout, so a timed-out part frees its worker soon after
+    assert sorted(timeout[1] for timeout in session.timeouts) == [10, 10, 10]
+
+
+def test_flask_plant_page_reports_parts_that_time_out(perenual, monkeypatch):
+    session = FakeSession(threading.Barrier(2, timeout=5), held='species-care-guide-list')
+    monkeypatch.setattr(perenual_service, '_session', session)
+    monkeypatch.setitem(perenual_service.PLANT_PAGE_TIMEOUTS, 'details', 5)
+    monkeypatch.setitem(perenual_service.PLANT_PAGE_TIMEOUTS, 'diseases', 5)
+    monkeypatch.setitem(perenual_service.PLANT_PAGE_TIMEOUTS, 'guides', 0.1)
+
+    response = create_app().test_client().get('/api/plants/perenual/7/full')
+    page = response.get_json()['data']
+    assert response.status_code == 200 and page['partial']
+    assert response.headers['Cache-Control'] == 'no-store'
+    assert page['errors'] == {'guides': 'timed out after 0.1s'}
+    assert page['details']['common_name'] == 'Fir'
+    session.release.set()
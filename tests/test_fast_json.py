@@ -0,0 +1,90 @@
+# tests/test_fast_json.py
+import json
+import os
+import sys
+
+from flask import Flask, jsonify
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services import plant_service
+from utils import fast_json
+from utils.fast_json import FastJSONProvider, RawJSON, make_encoder
+
+SUNLIGHT = '[\n  "full sun",\n  "part shade"\n]'
+DIMENSIONS = '{\n  "max": 8,\n  "min": 5,\n  "unit": "feet"\n}'
+EXPECTED = {'id': 7, 'common_name': 'Fir', 'sunlight': ['full sun', 'part shade'],
+            'dimensions': {'max': 8, 'min': 5, 'unit': 'feet'}, 'hardiness': None}
+
+
+class FakeCursor:
+    """a snowflake cursor: upper case column names, VARIANT columns as JSON text"""
+    description = [('ID',), ('COMMON_NAME',), ('SUNLIGHT',), ('DIMENSIONS',), ('HARDINESS',)]
+
+
+def snowflake_rows(count=1):
+    rows = [(7, 'Fir', SUNLIGHT, DIMENSIONS, None)] * count
+    return plant_service._rows_to_dicts(FakeCursor(), rows)
+
+
+def contains_raw(obj):
+    if isinstance(obj, RawJSON):
+        return True
+    if isinstance(obj, dict):
+        return any(contains_raw(value) for value in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return any(contains_raw(item) for item in obj)
+    return False
+
+
+def spy_app(monkeypatch):
+    """a fast-json app whose encoders record everything they are asked to serialize"""
+    seen = []
+    real_dumps = json.dumps
+
+    def spying_dumps(obj, *args, **kwargs):
+        seen.append(obj)
+        return real_dumps(obj, *args, **kwargs)
+
+    monkeypatch.setattr(json, 'dumps', spying_dumps)
+    app = Flask(__name__)
+    app.json = FastJSONProvider(app)
+    backend = app.json._dumps
+    app.json._dumps = lambda obj: seen.append(obj) or backend(obj)
+
+    @app.route('/plants/<int:count>')
+    def plants(count):
+        return jsonify({'plants': snowflake_rows(count), 'count': count})
+
+    return app.test_client(), seen
+
+
+def test_variant_columns_are_embedded_not_escaped():
+    plant, = snowflake_rows()
+    assert type(plant['sunlight']) is RawJSON and plant['hardiness'] is None
+    assert json.loads(make_encoder()(plant)) == EXPECTED
+    # the stdlib encoder sees a str and escapes it, so clients would get a string back
+    assert json.loads(json.dumps(plant))['sunlight'] == SUNLIGHT
+
+
+def test_raw_values_nest_inside_lists_tuples_and_dicts():
+    encode = make_encoder()
+    obj = {'a': [RawJSON('[1]'), (2, RawJSON('{"b": null}'))], 3: {'c': RawJSON('true')}, 'd': 'x'}
+    assert json.loads(encode(obj)) == {'a': [[1], [2, {'b': None}]], '3': {'c': True}, 'd': 'x'}
+    assert encode(RawJSON('[]')) == '[]' and encode([]) == '[]' and encode({}) == '{}'
+
+
+def test_responses_never_hand_rows_to_a_json_encoder(monkeypatch):
+    client, seen = spy_app(monkeypatch)
+    response = client.get('/plants/2')
+    assert response.get_json() == {'plants': [EXPECTED] * 2, 'count': 2}
+    assert seen and not any(contains_raw(obj) for obj in seen)
+
+
+def test_long_lists_stream_with_the_same_encoding(monkeypatch):
+    client, seen = spy_app(monkeypatch)
+    count = fast_json.STREAM_MIN_ITEMS + 1
+    response = client.get(f'/plants/{count}')
+    assert response.is_streamed
+    assert response.get_json() == {'plants': [EXPECTED] * count, 'count': count}
+    assert not any(contains_raw(obj) for obj in seen)
@@ -0,0 +1,185 @@
+# tests/test_filters.py
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+from contextlib import contextmanager
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services import plant_service
+from utils.filters import FilterError, PlantSnapshot, compile_sql, parse_filters
+
+COLUMNS = ['id', 'common_name', 'family', 'cycle', 'sunlight', 'poisonous_to_pets', 'indoor']
+PLANTS = [
+    (1, 'Fir', 'Pinaceae', 'Perennial', ['full sun', 'part shade'], 1, 0),
+    (2, 'rose', 'rosaceae', 'perennial', ['full sun'], 0, None),
+    (3, None, None, 'Annual', None, None, 1),
+    (4, 'Basil', 'Lamiaceae', 'Annual', ['Full Sun'], 0, 1),
+    (5, 'Fir', 'Pinaceae', None, [], 1, 0),
+    (6, 'aloe', 'Asphodelaceae', 'Perennial', ['part shade'], None, 1),
+]
+
+
+class SnowflakeDialectCursor(sqlite3.Cursor):
+    """runs the snowflake SQL compile_sql and plant_service emit against sqlite"""
+
+    def execute(self, sql, params=()):
+        sql = re.sub(r'%\((\w+)\)s', r':\1', sql).replace('::VARIANT', '').replace(' ILIKE ', ' LIKE ')
+        # backslash escapes inside snowflake string literals, so '\\' there is a single backslash
+        sql = sql.replace("ESCAPE '\\\\'", "ESCAPE '\\'")
+        return super().execute(sql, params)
+
+
+class SnowflakeDialectConnection(sqlite3.Connection):
+    def cursor(self, factory=SnowflakeDialectCursor):
+        return super().cursor(factory)
+
+
+def _json_array_function(fn):
+    # snowflake array functions return NULL for a NULL array
+    return lambda *args: None if args[-1] is None else fn(*args)
+
+
+@pytest.fixture
+def warehouse():
+    conn = sqlite3.connect(':memory:', factory=SnowflakeDialectConnection, check_same_thread=False)
+    conn.create_function('ARRAY_CONSTRUCT', -1, lambda *items: json.dumps(list(items)))
+    conn.create_function('ARRAY_CONTAINS', 2,
+                         _json_array_function(lambda value, array: value in json.loads(array)))
+    conn.create_function('ARRAYS_OVERLAP', 2, lambda array, other: None if array is None else
+                         bool(set(json.loads(array)) & set(json.loads(other))))
+    conn.execute(f"CREATE TABLE plants ({', '.join(COLUMNS)})")
+    conn.executemany(f"INSERT INTO plants VALUES ({', '.join('?' * len(COLUMNS))})", [
+        row[:4] + (None if row[4] is None else json.dumps(row[4]),) + row[5:] for row in PLANTS])
+    return conn
+
+
+def stored_rows(conn):
+    """rows the way the snapshot is built from the warehouse: arrays as JSON text, booleans as 0/1"""
+    cursor = conn.execute(f"SELECT {', '.join(COLUMNS)} FROM plants")
+    return [dict(zip(COLUMNS, row)) for row in cursor.fetchall()]
+
+
+def sql_ids(conn, conditions):
+    clauses, params = compile_sql(conditions)
+    where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+    return [row[0] for row in conn.cursor().execute(f"SELECT id FROM plants{where} ORDER BY id", params)]
+
+
+def snapshot_ids(conn, conditions):
+    plants, _ = PlantSnapshot(stored_rows(conn), COLUMNS).query(conditions, limit=100, fields=['id'])
+    return [plant['id'] for plant in plants]
+
+
+@pytest.mark.parametrize('raw, error', [
+    ({'description': 'x'}, 'Cannot filter on field: description'),
+    ({'no_such_field': 1}, 'Cannot filter on field: no_such_field'),
+    ({'family': {'gt': 'a'}}, 'Operator gt is not supported for field: family'),
+    ({'sunlight': {'eq': 'full sun'}}, 'Operator eq is not supported for field: sunlight'),
+    ({'indoor': {'in': [True]}}, 'Operator in is not supported for field: indoor'),
+    ({'id': 'ten'}, 'Filter on id expects an integer'),
+    ({'id': True}, 'Filter on id expects an integer'),
+    ({'indoor': 'maybe'}, 'Filter on indoor expects a boolean'),
+    ({'family': 3}, 'Filter on family expects a string'),
+    ({'cycle': {'in': []}}, 'Filter on cycle expects a non-empty list'),
+    ({'cycle': {}}, 'Empty filter for field: cycle'),
+    ('[1, 2]', 'Filters must be a JSON object'),
+    ('{not json', 'Filters must be a JSON object'),
+])
+def test_parse_filters_rejects_bad_specs(raw, error):
+    with pytest.raises(FilterError, match=re.escape(error)):
+        parse_filters(raw)
+
+
+def test_parse_filters_normalizes_values():
+    conditions = parse_filters('{"family": "PINACEAE", "id": {"gte": "2"}, "indoor": "true", '
+                               '"sunlight": "Full Sun"}')
+    assert [tuple(condition) for condition in conditions] == [
+        ('family', 'eq', 'pinaceae'), ('id', 'gte', 2), ('indoor', 'eq', True),
+        ('sunlight', 'contains', 'Full Sun'),
+    ]
+
+
+@pytest.mark.parametrize('raw', [
+    {},
+    {'family': 'pinaceae'},
+    {'family': 'ROSACEAE'},
+    {'cycle': {'in': ['annual', 'Perennial']}},
+    {'id': {'gt': 1, 'lte': 4}},
+    {'sunlight': 'full sun'},
+    {'sunlight': {'contains_any': ['Full Sun', 'part shade']}},
+    {'poisonous_to_pets': False},
+    {'poisonous_to_pets': 1},
+    {'indoor': True},
+    {'indoor': 'false'},
+    {'cycle': 'annual', 'indoor': True},
+])
+def test_sql_and_snapshot_agree(warehouse, raw):
+    conditions = parse_filters(raw)
+    assert sql_ids(warehouse, conditions) == snapshot_ids(warehouse, conditions)
+
+
+def test_nulls_and_case_match_the_same_rows(warehouse):
+    # string equality ignores case, array membership does not, and NULLs never match
+    assert snapshot_ids(warehouse, parse_filters({'cycle': 'PERENNIAL'})) == [1, 2, 6]
+    assert snapshot_ids(warehouse, parse_filters({'sunlight': 'full sun'})) == [1, 2]
+    assert snapshot_ids(warehouse, parse_filters({'indoor': False})) == [1, 5]
+    assert sql_ids(warehouse, parse_filters({'indoor': False})) == [1, 5]
+
+
+@pytest.mark.parametrize('sort, raw', [
+    ('common_name', None),
+    ('family', None),
+    ('cycle', '{"sunlight": {"contains_any": ["full sun", "part shade"]}}'),
+    ('id', '{"indoor": true}'),
+])
+def test_keyset_pages_agree(warehouse, monkeypatch, sort, raw):
+    @contextmanager
+    def connection(timeout=None, operation=None):
+        yield warehouse
+
+    monkeypatch.setattr(plant_service, 'pooled_connection', connection)
+    plant_service._count_cache.clear()
+
+    def walk(fields):
+        ids, cursor = [], None
+        while True:
+            page = plant_service.find_all_plants_with_pagination(
+                limit=2, filters=raw, sort=sort, after=cursor, include_count=False, fields=fields)
+            ids.extend(plant['id'] for plant in page['plants'])
+            cursor = page['next_cursor']
+            if cursor is None:
+                return ids
+
+    # fields=None always runs the SQL query; a projection is served from a fresh snapshot
+    from_sql = walk(None)
+    monkeypatch.setattr(plant_service, '_snapshot', PlantSnapshot(stored_rows(warehouse), COLUMNS))
+    monkeypatch.setattr(plant_service, '_snapshot_built_at', time.monotonic())
+    monkeypatch.setattr(plant_service, '_snapshot_stale', False)
+    monkeypatch.setattr(plant_service, 'pooled_connection', None)  # the snapshot must not query
+    from_snapshot = walk(['id'] + COLUMNS[1:])
+    assert from_sql == from_snapshot
+    assert sorted(from_sql) == sql_ids(warehouse, parse_filters(raw))
+
+
+SEARCH_NAMES = ['a_b', 'axb', 'A_B tree', '50% shade', '500 shade', 'back\\slash', 'backxslash']
+
+
+@pytest.mark.parametrize('term', ['a_b', '_', '50%', '%', 'back\\slash', '\\', 'SHADE', 'x'])
+def test_search_terms_match_literally_in_sql_and_snapshot(warehouse, term):
+    warehouse.executemany("INSERT INTO plants (id, common_name) VALUES (?, ?)",
+                          list(enumerate(SEARCH_NAMES, start=100)))
+    clauses, params = plant_service._build_where(term, [])
+    sql = f"SELECT id FROM plants WHERE {' AND '.join(clauses)} ORDER BY id"
+    from_sql = [row[0] for row in warehouse.cursor().execute(sql, params)]
+    plants, _ = PlantSnapshot(stored_rows(warehouse), COLUMNS).query(
+        [], search_term=term, limit=100, fields=['id'])
+    assert from_sql == [plant['id'] for plant in plants]
+    expected = [plant_id for plant_id, name in enumerate(SEARCH_NAMES, start=100)
+                if term.lower() in name.lower()]
+    assert from_sql == expected
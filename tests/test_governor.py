@@ -0,0 +1,147 @@
+# tests/test_governor.py
+import asyncio
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.governor import BULK, INTERACTIVE, OutboundGovernor, QuotaExceeded, priority
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out waiting'
+        time.sleep(0.005)
+
+
+def start(target, *args):
+    thread = threading.Thread(target=target, args=args)
+    thread.start()
+    return thread
+
+
+def test_concurrent_calls_for_one_key_share_a_single_upstream_call():
+    governor = OutboundGovernor(rate_per_sec=1000, burst=1000)
+    release, upstream, results = threading.Event(), [], []
+
+    def fetch():
+        upstream.append(1)
+        release.wait(5)
+        return {'id': 7}
+
+    threads = [start(lambda: results.append(governor.call('details:7', fetch))) for _ in range(5)]
+    wait_until(lambda: governor.stats()['coalesced'] == 4)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert upstream == [1] and results == [{'id': 7}] * 5
+    assert governor.stats()['upstream_calls'] == 1 and governor.stats()['in_flight'] == 0
+    # the next call after the flight lands goes upstream again
+    governor.call('details:7', fetch)
+    assert len(upstream) == 2
+
+
+def test_coalesced_callers_share_the_leaders_error():
+    governor = OutboundGovernor(rate_per_sec=1000, burst=1000)
+    release, errors = threading.Event(), []
+
+    def fail():
+        release.wait(5)
+        raise ConnectionError('upstream down')
+
+    def call():
+        try:
+            governor.call('details:7', fail)
+        except ConnectionError as e:
+            errors.append(str(e))
+
+    threads = [start(call) for _ in range(3)]
+    wait_until(lambda: governor.stats()['coalesced'] == 2)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert errors == ['upstream down'] * 3
+
+
+def test_interactive_calls_overtake_queued_bulk_work():
+    # no tokens and no refill: callers queue until a token is handed out by hand
+    governor = OutboundGovernor(rate_per_sec=0.001, burst=1)
+    governor._tokens = 0
+    order = []
+
+    def call(name, level):
+        with priority(level):
+            governor.call(name, lambda: order.append(name))
+
+    threads = [start(call, 'bulk-1', BULK), start(call, 'bulk-2', BULK)]
+    wait_until(lambda: governor.stats()['queued_bulk'] == 2)
+    threads.append(start(call, 'interactive', INTERACTIVE))
+    wait_until(lambda: governor.stats()['queued'] == 3)
+
+    for served in range(1, 4):
+        with governor._cond:
+            governor._tokens = 1
+            governor._cond.notify_all()
+        wait_until(lambda: len(order) == served)
+    for thread in threads:
+        thread.join()
+    assert order == ['interactive', 'bulk-1', 'bulk-2']
+    assert governor.stats()['throttled'] == 3
+
+
+def test_daily_budget_is_shared_and_rejects_without_calling_upstream(tmp_path):
+    path = str(tmp_path / 'usage.db')
+    first = OutboundGovernor(rate_per_sec=1000, burst=1000, daily_budget=2, usage_path=path)
+    second = OutboundGovernor(rate_per_sec=1000, burst=1000, daily_budget=2, usage_path=path)
+    upstream = []
+    first.call('a', lambda: upstream.append('a'))
+    second.call('b', lambda: upstream.append('b'))
+    with pytest.raises(QuotaExceeded):
+        first.call('c', lambda: upstream.append('c'))
+    assert upstream == ['a', 'b']
+    stats = first.stats()
+    assert (stats['used_today'], stats['remaining_today'], stats['rejected']) == (2, 0, 1)
+
+
+def test_memory_budget_counts_every_upstream_call():
+    governor = OutboundGovernor(rate_per_sec=1000, burst=1000, daily_budget=1)
+    governor.call('a', lambda: None)
+    with pytest.raises(QuotaExceeded):
+        governor.call('b', lambda: None)
+    assert governor.stats()['remaining_today'] == 0
+
+
+def test_cancelled_async_callers_do_not_cancel_the_shared_call():
+    governor = OutboundGovernor(rate_per_sec=1000, burst=1000)
+    upstream = []
+
+    async def fetch():
+        upstream.append(1)
+        await asyncio.sleep(0.05)
+        return {'id': 7}
+
+    async def main():
+        impatient = asyncio.ensure_future(governor.call_async('details:7', fetch))
+        patient = asyncio.ensure_future(governor.call_async('details:7', fetch))
+        await asyncio.sleep(0.01)
+        impatient.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await impatient
+        result = await patient
+
+        # with every caller gone the upstream call still finishes and frees its key
+        abandoned = asyncio.ensure_future(governor.call_async('details:8', fetch))
+        await asyncio.sleep(0.01)
+        abandoned.cancel()
+        await asyncio.sleep(0.1)
+        return result
+
+    assert asyncio.run(main()) == {'id': 7}
+    assert upstream == [1, 1]
+    stats = governor.stats()
+    assert (stats['coalesced'], stats['upstream_calls'], stats['in_flight']) == (1, 2, 0)
@@ -0,0 +1,100 @@
+# tests/test_ingest_service.py
+import os
+import sys
+
+import pytest
+import requests
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services import ingest_service
+from services.ingest_service import bulk_ingest, load_checkpoint
+from utils.governor import BULK, current_priority
+
+LAST_PAGE = 5  # two species per page, then an empty page
+
+
+class FakePerenual:
+    def __init__(self):
+        self.pages = []
+        self.details = []
+        self.batches = []
+        self.priorities = set()
+        self.fail_upsert_on_batch = None
+
+    def fetch_species_list(self, page):
+        self.pages.append(page)
+        self.priorities.add(current_priority())
+        if page > LAST_PAGE:
+            return []
+        return [{'id': page * 10 + i} for i in (1, 2)]
+
+    def fetch_plant_details_payload(self, species_id):
+        self.details.append(species_id)
+        self.priorities.add(current_priority())
+        if species_id == 31:
+            raise requests.exceptions.ConnectionError('reset')
+        if species_id == 32:
+            return {'error': 'Upgrade plan'}
+        return {'id': species_id}
+
+    def upsert_plants(self, records):
+        self.batches.append(sorted(record['id'] for record in records))
+        if self.fail_upsert_on_batch == len(self.batches):
+            raise RuntimeError('warehouse unavailable')
+        return {'inserted': len(records), 'updated': 0, 'unchanged': 0, 'errors': []}
+
+
+@pytest.fixture
+def perenual(monkeypatch):
+    fake = FakePerenual()
+    for name in ('fetch_species_list', 'fetch_plant_details_payload', 'upsert_plants'):
+        monkeypatch.setattr(ingest_service, name, getattr(fake, name))
+    return fake
+
+
+def test_ingests_every_page_in_bounded_batches(perenual, tmp_path):
+    checkpoint = str(tmp_path / 'checkpoint.json')
+    state = bulk_ingest(workers=4, pages_per_round=2, batch_size=3, checkpoint_path=checkpoint)
+    assert (state['fetched'], state['inserted'], state['failed'], state['done']) == (8, 8, 2, True)
+    assert state['next_page'] == 7
+    assert sorted(perenual.pages) == [1, 2, 3, 4, 5, 6]
+    assert all(len(batch) <= 3 for batch in perenual.batches)
+    assert perenual.priorities == {BULK}
+    assert load_checkpoint(checkpoint) == state
+    assert os.listdir(tmp_path) == ['checkpoint.json']  # the temp file was renamed into place
+
+
+def test_a_killed_run_resumes_from_the_last_committed_round(perenual, tmp_path):
+    checkpoint = str(tmp_path / 'checkpoint.json')
+    perenual.fail_upsert_on_batch = 2  # round one commits, round two fails mid-write
+    with pytest.raises(RuntimeError):
+        bulk_ingest(workers=1, pages_per_round=2, batch_size=10, checkpoint_path=checkpoint)
+    assert load_checkpoint(checkpoint)['next_page'] == 3
+    assert load_checkpoint(checkpoint)['inserted'] == 4
+
+    perenual.pages, perenual.fail_upsert_on_batch = [], None
+    state = bulk_ingest(workers=1, pages_per_round=2, batch_size=10, checkpoint_path=checkpoint)
+    assert sorted(perenual.pages) == [3, 4, 5, 6]
+    assert (state['inserted'], state['done']) == (8, True)
+
+    # a finished checkpoint is a no-op until a start page is given
+    perenual.pages = []
+    assert bulk_ingest(checkpoint_path=checkpoint) == state and perenual.pages == []
+    bulk_ingest(start_page=5, pages_per_round=2, checkpoint_path=checkpoint)
+    assert sorted(perenual.pages) == [5, 6]
+
+
+def test_max_pages_stops_short_and_reports_progress(perenual):
+    rounds = []
+    state = bulk_ingest(max_pages=3, pages_per_round=2, checkpoint_path=None, progress=rounds.append)
+    assert sorted(perenual.pages) == [1, 2, 3]
+    assert [progress['next_page'] for progress in rounds] == [3, 4]
+    assert not state['done']
+
+
+def test_missing_species_list_page_aborts_the_run(perenual, monkeypatch, tmp_path):
+    monkeypatch.setattr(ingest_service, 'fetch_species_list', lambda page: None)
+    with pytest.raises(RuntimeError, match='species list page 1'):
+        bulk_ingest(checkpoint_path=str(tmp_path / 'checkpoint.json'))
+    assert load_checkpoint(str(tmp_path / 'checkpoint.json')) is None
@@ -0,0 +1,67 @@
+# tests/test_log_config.py
+import json
+import logging
+import os
+import queue
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils import log_config
+from utils.log_config import JSONFormatter, redact, truncate
+
+
+def test_redact_masks_keys_and_env_secrets(monkeypatch):
+    monkeypatch.setenv('PERENUAL_API_KEY', 'sk-plant-1234')
+    text = ("GET https://perenual.com/api/species-list?key=abc123&page=2 "
+            "{'Authorization': 'Bearer xyz'} failed with sk-plant-1234")
+    cleaned = redact(text)
+    assert 'abc123' not in cleaned and 'xyz' not in cleaned and 'sk-plant-1234' not in cleaned
+    assert 'page=2' in cleaned
+
+
+def test_truncate_reports_cut_length():
+    assert truncate('a' * 10, limit=4) == 'aaaa... [6 more chars]'
+    assert truncate('short', limit=10) == 'short'
+
+
+def test_json_formatter_keeps_extras():
+    record = logging.LogRecord('pyplant.requests', logging.INFO, __file__, 1, 'GET %s %s',
+                               ('/api/plants?token=t0k', 200), None)
+    record.status = 200
+    entry = json.loads(JSONFormatter().format(record))
+    assert entry['message'] == 'GET /api/plants?token=*** 200'
+    assert entry['status'] == 200 and entry['level'] == 'INFO'
+
+
+def test_request_sampling_keeps_errors_and_slow_requests(monkeypatch, caplog):
+    monkeypatch.setattr(log_config, 'LOG_REQUEST_SAMPLE_RATES', {'api.fetch': 0.0})
+    with caplog.at_level(logging.INFO, logger='pyplant.requests'):
+        log_config.log_request('api.fetch', 'GET', '/api/plants/fetch', 200, 5.0)
+        log_config.log_request('api.fetch', 'GET', '/api/plants/fetch', 502, 5.0)
+        log_config.log_request('api.fetch', 'GET', '/api/plants/fetch', 200,
+                               log_config.LOG_SLOW_REQUEST_MS + 1)
+    assert [record.status for record in caplog.records] == [502, 200]
+
+
+def test_queued_records_snapshot_message_and_traceback():
+    log_queue = queue.Queue()
+    logger = logging.getLogger('test_log_config.snapshot')
+    handler = log_config.LazyQueueHandler(log_queue)
+    logger.addHandler(handler)
+    logger.propagate = False
+    try:
+        plant = {'watering': 'Frequent'}
+        logger.warning('plant %s', plant)
+        plant['watering'] = 'Minimum'
+        try:
+            raise ValueError('bad row')
+        except ValueError:
+            logger.exception('failed')
+    finally:
+        logger.removeHandler(handler)
+
+    first, second = log_queue.get_nowait(), log_queue.get_nowait()
+    assert first.getMessage() == "plant {'watering': 'Frequent'}"
+    assert second.exc_info is None and 'ValueError: bad row' in second.exc_text
+    assert 'ValueError: bad row' in json.loads(JSONFormatter().format(second))['exc_info']
@@ -0,0 +1,85 @@
+# tests/test_perenual_service.py
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services import perenual_service
+
+
+class FlakyPerenual(BaseHTTPRequestHandler):
+    """answers the first `failures` requests with `status`, then with species details"""
+    protocol_version = 'HTTP/1.1'  # keep-alive
+    failures = 2
+    status = 503
+    requests = []
+
+    def do_GET(self):
+        FlakyPerenual.requests.append(self.client_address)
+        if len(FlakyPerenual.requests) <= FlakyPerenual.failures:
+            body, status = b'{"message": "busy"}', FlakyPerenual.status
+        else:
+            body, status = json.dumps({'id': 7}).encode(), 200
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        if status == 429:
+            self.send_header('Retry-After', '0')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    FlakyPerenual.requests = []
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FlakyPerenual)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(perenual_service, 'PERENUAL_BACKOFF_FACTOR', 0.01)
+    monkeypatch.setattr(perenual_service, 'PERENUAL_BACKOFF_JITTER', 0)
+    try:
+        yield f'http://127.0.0.1:{server.server_address[1]}'
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_session_is_built_once_and_shared_between_threads(monkeypatch):
+    monkeypatch.setattr(perenual_service, '_session', None)
+    sessions = []
+    threads = [threading.Thread(target=lambda: sessions.append(perenual_service.get_session()))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len({id(session) for session in sessions}) == 1
+
+    retry = sessions[0].get_adapter('https://perenual.com/api').max_retries
+    assert retry.total == perenual_service.PERENUAL_MAX_RETRIES
+    assert set(retry.status_forcelist) == {429, 500, 502, 503, 504}
+    assert retry.allowed_methods == frozenset(['GET'])
+
+
+@pytest.mark.parametrize('status', [503, 429])
+def test_transient_errors_are_retried_over_one_connection(upstream, status, monkeypatch):
+    monkeypatch.setattr(FlakyPerenual, 'status', status)
+    response = perenual_service._build_session().get(f'{upstream}/species/details/7', timeout=5)
+    assert response.status_code == 200 and response.json() == {'id': 7}
+    assert len(FlakyPerenual.requests) == 3
+    # every attempt reused the same keep-alive socket
+    assert len(set(FlakyPerenual.requests)) == 1
+
+
+def test_retries_give_up_with_the_last_response(upstream, monkeypatch):
+    monkeypatch.setattr(FlakyPerenual, 'failures', 10)
+    response = perenual_service._build_session().get(f'{upstream}/species/details/7', timeout=5)
+    assert response.status_code == 503
+    assert len(FlakyPerenual.requests) == perenual_service.PERENUAL_MAX_RETRIES + 1
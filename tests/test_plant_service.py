@@ -0,0 +1,251 @@
+# tests/test_plant_service.py
+import base64
+import gzip
+import json
+import os
+import re
+import sys
+from contextlib import contextmanager
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services import plant_service
+
+
+def plant(plant_id, **fields):
+    return {'id': plant_id, 'common_name': f'Plant {plant_id}', 'sunlight': ['full sun'],
+            'dimensions': {'min': 1, 'max': 2}, **fields}
+
+
+class FakeWarehouse:
+    """
+    Records the statements plant_service sends. Statements matching `fail`
+    raise, as snowflake would for a bad row; a PUT reads back the staged file.
+    """
+
+    def __init__(self, fail=None):
+        self.fail = fail
+        self.statements = []
+        self.staged = []
+        self.commits = 0
+        self.rollbacks = 0
+        self.merge_counts = []  # (inserted, updated) reported for each MERGE
+
+    @contextmanager
+    def connection(self, timeout=None, operation=None):
+        yield self
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql, params=None):
+        self.statements.append((sql, params))
+        if self.fail is not None and self.fail(sql, params):
+            raise RuntimeError('statement failed')
+        if sql.startswith('PUT'):
+            path = re.match(r"PUT 'file://(.+?)'", sql).group(1)
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                self.staged = [json.loads(line) for line in f]
+
+    def fetchone(self):
+        return self.merge_counts.pop(0)
+
+    def fetchall(self):
+        return [('plants.ndjson.gz', 'LOADED', len(self.staged), len(self.staged))]
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        pass
+
+    def inserted_ids(self, params):
+        # id is the first write column, so every row's bind values start with it
+        return params[::len(plant_service.WRITE_COLUMNS)]
+
+    def inserts(self):
+        return [(sql, params) for sql, params in self.statements if 'INSERT INTO plants' in sql]
+
+
+@pytest.fixture
+def warehouse(monkeypatch):
+    fake = FakeWarehouse()
+    monkeypatch.setattr(plant_service, 'pooled_connection', fake.connection)
+    monkeypatch.setattr(plant_service, 'PLANT_INSERT_ROWS_PER_STATEMENT', 3)
+    monkeypatch.setattr(plant_service, 'PLANT_STAGE_THRESHOLD_ROWS', 5)
+    return fake
+
+
+# batched and staged inserts
+
+def test_small_batches_use_fixed_size_multi_row_inserts(warehouse):
+    result = plant_service.add_plants([plant(i) for i in range(1, 5)] + [{'id': 'bad'}])
+    assert (result['inserted'], result['method'], list(result['errors'])) == (4, 'insert', [4])
+    (first_sql, first_params), (second_sql, second_params) = warehouse.inserts()
+    width = len(plant_service.WRITE_COLUMNS)
+    assert (len(first_params), len(second_params)) == (3 * width, width)
+    # statements are cached per row count, so repeated batches send identical text
+    assert first_sql is plant_service._multi_row_insert_sql(3)
+    assert first_params[:2] == [1, 'Plant 1'] and '["full sun"]' in first_params
+
+
+def test_a_failing_chunk_is_retried_row_by_row(warehouse):
+    warehouse.fail = lambda sql, params: 'INSERT INTO plants' in sql and 2 in warehouse.inserted_ids(params)
+    result = plant_service.add_plants([plant(i) for i in range(1, 4)])
+    assert result['inserted'] == 2 and list(result['failed']) == [2]
+    assert warehouse.rollbacks == 2  # the chunk, then the bad row
+
+
+def test_large_batches_are_staged_and_copied(warehouse):
+    plants = [plant(i) for i in range(1, 7)]
+    result = plant_service.add_plants(plants)
+    assert (result['inserted'], result['method']) == (6, 'copy')
+    assert warehouse.inserts() == []
+    staged = warehouse.staged[0]
+    assert staged['sunlight'] == ['full sun'] and staged['origin'] == [] and staged['hardiness'] == {}
+    assert staged['content_hash'] == plant_service.content_hash(plant_service.plant_loader.load(plants[0]))
+    assert any(sql.strip().startswith('COPY INTO plants') for sql, _ in warehouse.statements)
+
+
+def test_a_failed_copy_falls_back_to_batched_inserts(warehouse):
+    warehouse.fail = lambda sql, params: sql.strip().startswith('COPY INTO')
+    result = plant_service.add_plants([plant(i) for i in range(1, 7)])
+    assert (result['inserted'], result['method']) == (6, 'insert')
+    assert warehouse.rollbacks == 1 and len(warehouse.inserts()) == 2
+
+
+# content-hash MERGE upserts
+
+def test_content_hash_covers_schema_columns_only():
+    validated = plant_service.plant_loader.load(plant(1))
+    same = dict(reversed(list(validated.items())), dimensions={'max': 2, 'min': 1})
+    assert plant_service.content_hash(same) == plant_service.content_hash(validated)
+    assert plant_service.content_hash({**validated, 'seeds': 3}) == plant_service.content_hash(validated)
+    assert plant_service.content_hash({**validated, 'watering': 'Minimum'}) != plant_service.content_hash(validated)
+
+
+def test_merge_only_rewrites_rows_whose_hash_changed():
+    sql = plant_service._merge_sql(2)
+    width = len(plant_service.WRITE_COLUMNS)
+    assert sql is plant_service._merge_sql(2)
+    assert sql.count('%s') == 2 * width
+    assert 'ON t.id = s.id' in sql
+    assert 'WHEN MATCHED AND (t.content_hash IS NULL OR t.content_hash <> s.content_hash)' in sql
+    assert 'id = s.id' not in sql.split('UPDATE SET', 1)[1].split('WHEN NOT MATCHED')[0]
+    assert 'PARSE_JSON($3)::ARRAY AS scientific_name' in sql
+
+
+def test_upsert_keeps_the_last_copy_of_each_id_and_counts_outcomes(warehouse):
+    warehouse.merge_counts = [(1, 1), (0, 0)]
+    records = [plant(1), plant(2, watering='Frequent'), plant(1, watering='Minimum'), plant(3), plant(4)]
+    result = plant_service.upsert_plants(records + [{'id': 'bad'}])
+    assert (result['inserted'], result['updated'], result['unchanged']) == (1, 1, 2)
+    assert list(result['errors']) == [5]
+    merges = [params for sql, params in warehouse.statements if 'MERGE INTO plants' in sql]
+    assert [warehouse.inserted_ids(params) for params in merges] == [[1, 2, 3], [4]]
+    assert 'Minimum' in merges[0] and warehouse.commits == 1
+
+
+# keyset pagination cursors and cached totals
+
+@pytest.mark.parametrize('sort, row, value', [
+    ('id', {'id': 42, 'common_name': 'Fir'}, 42),
+    ('common_name', {'id': 42, 'common_name': 'Érable ~ "maple"'}, 'Érable ~ "maple"'),
+    ('family', {'id': 42, 'family': None}, ''),
+])
+def test_cursors_round_trip_as_url_safe_tokens(sort, row, value):
+    token = plant_service.encode_cursor(sort, row)
+    assert re.fullmatch(r'[A-Za-z0-9_-]+', token)
+    assert plant_service.decode_cursor(token) == (sort, value, 42)
+
+
+@pytest.mark.parametrize('token', [
+    'not a cursor!',
+    '',
+    plant_service.encode_cursor('id', {'id': 1})[:-2],
+    base64.urlsafe_b64encode(b'["description","x",1]').decode(),
+    base64.urlsafe_b64encode(b'["id",1,"1"]').decode(),
+    base64.urlsafe_b64encode(b'["id",1]').decode(),
+    base64.urlsafe_b64encode(b'{"sort":"id"}').decode(),
+])
+def test_tampered_cursors_are_rejected(token):
+    with pytest.raises(plant_service.InvalidCursor, match='Malformed pagination cursor'):
+        plant_service.decode_cursor(token)
+
+
+class CountingCursor:
+    def __init__(self, total):
+        self.total = total
+        self.counts = 0
+
+    def execute(self, sql, params):
+        assert sql.startswith('SELECT COUNT(*) FROM plants')
+        self.counts += 1
+
+    def fetchone(self):
+        return (self.total,)
+
+
+def test_totals_are_cached_per_where_clause_until_a_write(monkeypatch):
+    plant_service._count_cache.clear()
+    cursor = CountingCursor(7)
+    conditions = ["family = %(f0)s"]
+    assert plant_service._count_plants(cursor, conditions, {'f0': 'pinaceae'}) == 7
+    assert plant_service._count_plants(cursor, conditions, {'f0': 'pinaceae'}) == 7
+    assert cursor.counts == 1
+    plant_service._count_plants(cursor, conditions, {'f0': 'rosaceae'})
+    plant_service._count_plants(cursor, [], {})
+    assert cursor.counts == 3
+
+    plant_service._invalidate_read_caches()
+    cursor.total = 8
+    assert plant_service._count_plants(cursor, conditions, {'f0': 'pinaceae'}) == 8
+
+    monkeypatch.setattr(plant_service, 'COUNT_CACHE_TTL', -1)  # already expired when stored
+    plant_service._count_cache.clear()
+    plant_service._count_plants(cursor, [], {})
+    plant_service._count_plants(cursor, [], {})
+    assert cursor.counts == 6
+
+
+# sparse fieldsets
+
+@pytest.mark.parametrize('raw, fields', [
+    (None, None),
+    ('*', None),
+    (' * ', None),
+    ('id,common_name', ['id', 'common_name']),
+    (' Common_Name , ID,,common_name ', ['common_name', 'id']),
+    ('seeds,care_guides', ['seeds', 'care_guides']),
+])
+def test_parse_fields_normalizes_requested_columns(raw, fields):
+    assert plant_service.parse_fields(raw) == fields
+
+
+@pytest.mark.parametrize('raw, error', [
+    ('id,password', 'Unknown field: password'),
+    ('id; DROP TABLE plants', 'Unknown field: id; drop table plants'),
+    (',', 'At least one field must be requested'),
+    ('', 'At least one field must be requested'),
+])
+def test_parse_fields_rejects_unknown_or_empty_lists(raw, error):
+    with pytest.raises(ValueError, match=re.escape(error)):
+        plant_service.parse_fields(raw)
+
+
+def test_projection_always_selects_the_columns_paging_needs():
+    assert plant_service._projection(None, ('id',)) == '*'
+    assert plant_service._projection(['family'], ('id', 'family')) == 'family, id'
+    assert plant_service._projection(['id', 'cycle'], ('id',)) == 'id, cycle'
+
+
+def test_plant_lookups_select_only_the_requested_columns(warehouse):
+    warehouse.fetchone = lambda: None
+    assert plant_service.get_plant_by_any_id(7, fields=['common_name', 'sunlight']) is None
+    sql, params = warehouse.statements[-1]
+    assert sql == 'SELECT common_name, sunlight FROM plants WHERE id = %s' and params == (7,)
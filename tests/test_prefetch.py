@@ -0,0 +1,83 @@
+# tests/test_prefetch.py
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.prefetch import Prefetcher
+
+
+def wait_idle(prefetcher, timeout=5):
+    deadline = time.monotonic() + timeout
+    while prefetcher.stats()['pending'] and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_sequential_reads_hit_prefetched_pages():
+    fetched = []
+    prefetcher = Prefetcher(lambda page, cancelled: fetched.append(page) or [page], depth=2,
+                            warm=lambda species, cancelled: len(species))
+    try:
+        for page in range(1, 6):
+            prefetcher.after_read('ip:1', page)
+            wait_idle(prefetcher)
+        stats = prefetcher.stats()
+    finally:
+        prefetcher.shutdown()
+    assert sorted(fetched) == [2, 3, 4, 5, 6, 7]
+    assert (stats['hits'], stats['misses']) == (4, 1)
+    assert stats['hit_rate'] == 0.8
+    assert stats['warmed'] == 6
+
+
+def test_jumping_away_cancels_queued_pages():
+    release = threading.Event()
+    fetched = []
+
+    def fetch(page, cancelled):
+        release.wait(5)
+        fetched.append(page)
+        return [page]
+
+    prefetcher = Prefetcher(fetch, depth=3, workers=1)
+    try:
+        prefetcher.after_read('ip:1', 1)  # page 2 starts, 3 and 4 wait for the single worker
+        prefetcher.after_read('ip:1', 50)
+        release.set()
+        wait_idle(prefetcher)
+        stats = prefetcher.stats()
+    finally:
+        prefetcher.shutdown()
+    assert 3 not in fetched and 4 not in fetched
+    assert sorted(fetched)[-3:] == [51, 52, 53]
+    assert stats['cancelled'] >= 2
+
+
+def test_reads_of_pages_still_in_flight_are_misses():
+    release = threading.Event()
+    prefetcher = Prefetcher(lambda page, cancelled: release.wait(5) and [page], depth=1)
+    try:
+        prefetcher.after_read('ip:1', 1)
+        # page 2 is still being fetched, so this read went upstream on its own
+        assert prefetcher.after_read('ip:1', 2) is False
+        release.set()
+        wait_idle(prefetcher)
+        stats = prefetcher.stats()
+    finally:
+        prefetcher.shutdown()
+    assert (stats['hits'], stats['misses']) == (0, 2)
+
+
+def test_pages_fetched_for_idle_clients_are_wasted():
+    prefetcher = Prefetcher(lambda page, cancelled: [page], depth=2, idle_seconds=0.2)
+    try:
+        prefetcher.after_read('ip:1', 1)
+        wait_idle(prefetcher)
+        assert prefetcher.stats()['prefetched'] == 2
+        time.sleep(0.3)
+        stats = prefetcher.stats()
+    finally:
+        prefetcher.shutdown()
+    assert (stats['wasted'], stats['clients']) == (2, 0)
@@ -0,0 +1,77 @@
+# tests/test_rate_limit.py
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import routes
+from utils.rate_limit import MemoryBackend, SQLiteBackend, _decide
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def backend(request, tmp_path):
+    if request.param == 'memory':
+        return MemoryBackend()
+    return SQLiteBackend(str(tmp_path / 'rate_limits.db'))
+
+
+def test_decide_counts_allowed_hits_only():
+    allowed, current, result = _decide(0, 0, 0, 0, limit=2, period=60)
+    assert (allowed, current, result.remaining, result.reset) == (True, 1, 1, 60)
+
+    # half of the previous window still overlaps: 10 * 0.5 + 4 + 1 <= 10
+    allowed, current, result = _decide(10, 4, 0, 30, limit=10, period=60)
+    assert (allowed, current, result.remaining) == (True, 5, 0)
+
+    allowed, current, result = _decide(10, 5, 0, 30, limit=10, period=60)
+    assert (allowed, current, result.remaining, result.reset) == (False, 5, 0, 30)
+
+
+def test_limit_is_enforced_within_a_window(backend):
+    results = [backend.hit('ip:1', 3, 60, now=1 + i) for i in range(4)]
+    assert [result.allowed for result in results] == [True, True, True, False]
+    assert results[-1].remaining == 0
+    assert backend.hit('ip:2', 3, 60, now=5).allowed
+
+
+def test_previous_window_is_weighted_after_rollover(backend):
+    for i in range(3):
+        assert backend.hit('ip:1', 3, 60, now=1 + i).allowed
+    # 30s into the next window the full previous window counts for half: 1.5 + 1 <= 3
+    assert backend.hit('ip:1', 3, 60, now=90).allowed
+    assert not backend.hit('ip:1', 3, 60, now=91).allowed
+    # two windows on, the old counts are forgotten entirely
+    assert all(backend.hit('ip:1', 3, 60, now=200 + i).allowed for i in range(3))
+
+
+def test_backends_prune_quiet_clients(tmp_path):
+    memory = MemoryBackend(prune_every=2)
+    memory.hit('ip:old', 3, 60, now=0)
+    memory.hit('ip:new', 3, 60, now=1000)
+    assert list(memory._windows) == ['ip:new']
+
+    path = str(tmp_path / 'rate_limits.db')
+    shared = SQLiteBackend(path, prune_every=2)
+    shared.hit('ip:old', 3, 60, now=0)
+    shared.hit('ip:new', 3, 60, now=1000)
+    keys = [row[0] for row in sqlite3.connect(path).execute("SELECT key FROM rate_limits")]
+    assert keys == ['ip:new']
+
+
+def test_unknown_api_keys_share_the_ip_bucket(monkeypatch):
+    monkeypatch.setattr(routes, 'RATE_LIMIT_KEY_QUOTAS', {'partner': 1000})
+    assert routes.client_key('partner', '10.0.0.1') == 'key:partner'
+    assert routes.client_key('made-up', '10.0.0.1') == 'ip:10.0.0.1'
+    assert routes.client_key(None, '10.0.0.1') == 'ip:10.0.0.1'
+
+
+def test_key_quota_only_raises_the_global_scope(monkeypatch):
+    monkeypatch.setattr(routes, 'RATE_LIMIT_KEY_QUOTAS', {'partner': 1000})
+    monkeypatch.setattr(routes, '_limiter_backend', MemoryBackend())
+    _, headers = routes.check_rate_limit('key:partner')
+    assert headers['X-RateLimit-Limit'] == '1000'
+    _, headers = routes.check_rate_limit('key:partner', limit=5, scope='bulk_ingest')
+    assert headers['X-RateLimit-Limit'] == '5'
@@ -0,0 +1,125 @@
+# tests/test_routes.py
+import hashlib
+import os
+import sys
+
+import pytest
+from flask import Flask, Response, make_response
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import routes
+from app import create_app
+from routes import create_error_response, create_success_response, http_cache
+from services import ingest_service, plant_service
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(routes, '_limiter_backend', None)
+    return create_app().test_client()
+
+
+# sparse fieldsets
+
+def test_list_views_default_to_the_small_projection(client, monkeypatch):
+    calls = []
+    monkeypatch.setattr(plant_service, 'find_all_plants_with_pagination',
+                        lambda **kwargs: calls.append(kwargs['fields']) or {'plants': []})
+    assert client.get('/api/plants').status_code == 200
+    assert client.get('/api/plants?fields=*').status_code == 200
+    assert client.get('/api/plants?fields=id,family').status_code == 200
+    assert calls == [plant_service.DEFAULT_LIST_FIELDS, None, ['id', 'family']]
+
+    response = client.get('/api/plants?fields=id,secret')
+    assert response.status_code == 400 and response.get_json() == {'error': 'Unknown field: secret'}
+    assert len(calls) == 3
+
+
+# conditional GETs
+
+@pytest.fixture
+def cached_app():
+    app = Flask(__name__)
+
+    @app.route('/plant')
+    @http_cache(max_age=60, stale_while_revalidate=30)
+    def plant():
+        return create_success_response({'id': 7})
+
+    @app.route('/partial')
+    @http_cache(max_age=60)
+    def partial():
+        response = make_response(create_success_response({'id': 7}))
+        response.headers['Cache-Control'] = 'no-store'
+        return response
+
+    @app.route('/missing')
+    @http_cache(max_age=60)
+    def missing():
+        return create_error_response('Plant with ID 7 not found', 404)
+
+    @app.route('/stream')
+    @http_cache(max_age=60)
+    def stream():
+        return Response(iter([b'{"id":', b'7}']), mimetype='application/json')
+
+    @app.route('/versioned')
+    @http_cache(max_age=60)
+    def versioned():
+        response = make_response(create_success_response({'id': 7}))
+        response.set_etag('plant-abc')
+        return response
+
+    return app.test_client()
+
+
+def test_successful_gets_get_a_content_etag_and_revalidate(cached_app):
+    response = cached_app.get('/plant')
+    assert response.headers['ETag'] == f'"{hashlib.sha256(response.get_data()).hexdigest()}"'
+    assert response.headers['Cache-Control'] == 'public, max-age=60, stale-while-revalidate=30'
+    assert 'timestamp' not in response.get_json()  # identical data, identical bytes
+
+    not_modified = cached_app.get('/plant', headers={'If-None-Match': response.headers['ETag']})
+    assert not_modified.status_code == 304 and not_modified.get_data() == b''
+    assert not_modified.headers['ETag'] == response.headers['ETag']
+    assert cached_app.get('/plant', headers={'If-None-Match': '"stale"'}).status_code == 200
+
+
+def test_views_keep_their_own_cache_policy_and_etag(cached_app):
+    assert cached_app.get('/partial').headers['Cache-Control'] == 'no-store'
+    response = cached_app.get('/versioned')
+    assert response.headers['ETag'] == '"plant-abc"'
+    assert cached_app.get('/versioned', headers={'If-None-Match': '"plant-abc"'}).status_code == 304
+
+
+def test_errors_and_streams_are_not_hashed(cached_app):
+    missing = cached_app.get('/missing')
+    assert missing.status_code == 404
+    assert 'ETag' not in missing.headers and 'Cache-Control' not in missing.headers
+
+    stream = cached_app.get('/stream')
+    assert stream.get_data() == b'{"id":7}' and 'ETag' not in stream.headers
+    assert stream.headers['Cache-Control'] == 'public, max-age=60'
+
+
+def test_plant_revalidation_reads_only_the_content_hash(client, monkeypatch):
+    monkeypatch.setattr(plant_service, 'get_plant_version', lambda plant_id: 'abc')
+    monkeypatch.setattr(plant_service, 'get_plant_by_any_id',
+                        lambda plant_id, fields=None: {'id': plant_id, 'content_hash': 'abc'})
+    response = client.get('/api/plants/7')
+    assert response.headers['ETag'] == '"plant-abc"'
+
+    monkeypatch.setattr(plant_service, 'get_plant_by_any_id', lambda plant_id, fields=None: 1 / 0)
+    not_modified = client.get('/api/plants/7', headers={'If-None-Match': '"plant-abc"'})
+    assert not_modified.status_code == 304 and not_modified.headers['ETag'] == '"plant-abc"'
+
+
+# bulk ingest options
+
+@pytest.mark.parametrize('options', [{'workers': True}, {'max_pages': 0}, {'batch_size': 2.5}, {'pages': 1}])
+def test_bulk_ingest_rejects_options_that_are_not_positive_integers(client, monkeypatch, options):
+    started = []
+    monkeypatch.setattr(ingest_service, 'start_bulk_ingest', lambda **kwargs: started.append(kwargs))
+    assert client.post('/api/plants/bulk_ingest', json=options).status_code == 400
+    assert started == []
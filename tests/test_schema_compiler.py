@@ -0,0 +1,72 @@
+# tests/test_schema_compiler.py
+import os
+import sys
+
+import pytest
+from marshmallow import ValidationError
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from schemas import PlantSchema
+from utils.schema_compiler import compiled_schema
+
+VALID = {
+    'id': 1, 'common_name': 'European Silver Fir', 'scientific_name': ['Abies alba'],
+    'dimensions': {'min': 60}, 'drought_tolerant': False, 'poisonous_to_pets': 0,
+    'other_images': 'Upgrade Plans To Premium/Supreme', 'unknown_key': 'ignored',
+}
+
+INVALID = [
+    {'common_name': 'No id'},
+    {'id': 'abc', 'common_name': 'Bad id'},
+    {'id': True, 'common_name': 'Bool id'},
+    {'id': 1, 'common_name': None},
+    {'id': 1, 'common_name': 5, 'sunlight': ['full sun', 3, None]},
+    {'id': 1, 'common_name': 'x', 'origin': 'Europe', 'dimensions': ['not', 'a', 'dict']},
+    {'id': 1, 'common_name': 'x', 'indoor': 'maybe', 'flowers': []},
+    'not a mapping',
+]
+
+
+def loaders():
+    return PlantSchema(), compiled_schema(PlantSchema)
+
+
+def test_schema_is_compiled():
+    assert compiled_schema(PlantSchema).compiled
+
+
+@pytest.mark.parametrize('record', [
+    VALID,
+    {'id': '7', 'common_name': b'bytes name', 'indoor': 'yes', 'sunlight': ('full sun',)},
+])
+def test_valid_records_load_identically(record):
+    schema, compiled = loaders()
+    assert compiled.load(record) == schema.load(record)
+    assert compiled.load({'id': 2}, partial=True) == schema.load({'id': 2}, partial=True)
+
+
+@pytest.mark.parametrize('record', INVALID)
+def test_errors_match_marshmallow(record):
+    schema, compiled = loaders()
+    with pytest.raises(ValidationError) as expected:
+        schema.load(record)
+    with pytest.raises(ValidationError) as actual:
+        compiled.load(record)
+    assert actual.value.messages == expected.value.messages
+    assert actual.value.valid_data == expected.value.valid_data
+
+
+def test_many_errors_match_marshmallow():
+    schema, compiled = loaders()
+    records = [VALID] + INVALID + [VALID]
+    with pytest.raises(ValidationError) as expected:
+        schema.load(records, many=True)
+    with pytest.raises(ValidationError) as actual:
+        compiled.load(records, many=True)
+    assert actual.value.messages == expected.value.messages
+    assert actual.value.valid_data == expected.value.valid_data
+
+    valid, errors = compiled.load_many(records)
+    assert errors == expected.value.messages
+    assert valid == [schema.load(VALID), schema.load(VALID)]
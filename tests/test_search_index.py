@@ -0,0 +1,85 @@
+# tests/test_search_index.py
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.search_index import BENCHMARK_QUERIES, SearchIndex, _synthetic_plants, as_names
+
+# median search time allowed over a perenual-sized catalog, in milliseconds; the benchmark in
+# utils/search_index.py runs well under 5ms, this leaves room for a busy CI box
+SEARCH_LATENCY_BUDGET_MS = float(os.getenv('SEARCH_LATENCY_BUDGET_MS', 25))
+
+PLANTS = [
+    {'id': 1, 'common_name': 'Japanese Maple', 'scientific_name': '["Acer palmatum"]'},
+    {'id': 2, 'common_name': 'Maple', 'scientific_name': ['Acer']},
+    {'id': 3, 'common_name': 'Red Maple Tree', 'scientific_name': ['Acer rubrum'],
+     'other_name': ['Swamp maple']},
+    {'id': 4, 'common_name': 'Érable argenté', 'scientific_name': ['Acer saccharinum']},
+    {'id': 5, 'common_name': 'Basil', 'scientific_name': ['Ocimum basilicum'], 'other_name': None},
+]
+
+
+def build(plants=PLANTS):
+    index = SearchIndex()
+    for plant in plants:
+        index.add(plant)
+    return index
+
+
+def ids(results):
+    return [result['id'] for result in results]
+
+
+def test_whole_name_matches_rank_first():
+    assert ids(build().search('maple')) == [2, 1, 3]
+    assert ids(build().search('red maple')) == [3]
+
+
+def test_last_token_is_a_prefix():
+    assert ids(build().search('japanese ma')) == [1]
+    assert ids(build().search('bas')) == [5]
+    # earlier tokens only prefix-match once they are long enough to mean something
+    assert build().search('ja maple') == []
+
+
+def test_accents_misspellings_and_scientific_names_match():
+    index = build()
+    assert ids(index.search('erable')) == [4]
+    assert ids(index.search('mapple')) == [2, 1, 3]
+    assert ids(index.search('basilicum')) == [5]
+    best = index.search('acer palmatum')[0]
+    assert (best['id'], best['common_name'], best['scientific_name']) == (1, 'Japanese Maple', 'Acer palmatum')
+
+
+def test_updates_and_removals_leave_no_stale_tokens():
+    index = build()
+    index.add({'id': 5, 'common_name': 'Thai Basil', 'scientific_name': ['Ocimum']})
+    assert ids(index.search('thai')) == [5]
+    assert 'basilicum' not in index._vocabulary
+    index.remove(5)
+    index.remove(5)
+    assert index.search('basil') == [] and len(index) == 4
+    assert 'thai' not in index._vocabulary and 'thai' not in index._gram_counts
+
+
+def test_as_names_accepts_every_stored_shape():
+    assert as_names('["Acer", "Abies"]') == ['Acer', 'Abies']
+    assert as_names('[not json') == ['[not json']
+    assert as_names(['Acer', None, '']) == ['Acer']
+    assert as_names(None) == [] and as_names('Fir') == ['Fir']
+
+
+def test_search_is_fast_over_a_perenual_sized_catalog():
+    index = build(_synthetic_plants(10102))
+    medians = {}
+    for query in BENCHMARK_QUERIES:
+        samples = []
+        for _ in range(5):
+            started = time.perf_counter()
+            index.search(query, limit=10)
+            samples.append((time.perf_counter() - started) * 1000)
+        medians[query] = statistics.median(samples)
+    assert max(medians.values()) < SEARCH_LATENCY_BUDGET_MS, medians
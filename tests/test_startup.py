@@ -0,0 +1,41 @@
+# tests/test_startup.py
+import os
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# cumulative `import app` time allowed, in milliseconds; generous enough for a busy CI box
+STARTUP_IMPORT_BUDGET_MS = float(os.getenv('STARTUP_IMPORT_BUDGET_MS', 500))
+
+# dependencies that must load on first use, never while the app starts
+DEFERRED_MODULES = ['snowflake.connector', 'pandas', 'numpy', 'requests', 'sqlalchemy', 'matplotlib']
+
+
+def import_app(cwd):
+    """imports app in a fresh interpreter and returns {module: cumulative import microseconds}"""
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app'],
+                            cwd=cwd, env=env, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        timings[name.strip()] = int(cumulative)
+    return timings
+
+
+def test_app_import_defers_heavy_dependencies(tmp_path):
+    timings = import_app(tmp_path)
+    loaded = [name for name in DEFERRED_MODULES if name in timings]
+    assert loaded == []
+    # nothing is written at import time: no sqlite files, caches or checkpoints
+    assert os.listdir(tmp_path) == []
+
+
+def test_app_import_is_within_budget(tmp_path):
+    import_app(tmp_path)  # warm the bytecode cache so the timed run measures imports only
+    best = min(import_app(tmp_path)['app'] for _ in range(3)) / 1000
+    assert best < STARTUP_IMPORT_BUDGET_MS, f"import app took {best:.0f}ms"
@@ -0,0 +1,67 @@
+# tests/test_timing.py
+import os
+import sqlite3
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import db
+from app import create_app
+from services import plant_service
+from utils import timing
+from utils.timing import Histogram
+
+
+class PyformatCursor(sqlite3.Cursor):
+    def execute(self, sql, params=()):
+        return super().execute(sql.replace('%s', '?'), params)
+
+
+class PyformatConnection(sqlite3.Connection):
+    def cursor(self, factory=PyformatCursor):
+        return super().cursor(factory)
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram('demo_seconds', 'Demo.', ('route',), buckets=(0.1, 1))
+    for seconds in (0.05, 0.5, 5):
+        histogram.observe(seconds, 'a"b')
+    lines = histogram.render()
+    assert 'demo_seconds_bucket{route="a\\"b",le="0.1"} 1' in lines
+    assert 'demo_seconds_bucket{route="a\\"b",le="1"} 2' in lines
+    assert 'demo_seconds_bucket{route="a\\"b",le="+Inf"} 3' in lines
+    assert 'demo_seconds_count{route="a\\"b"} 3' in lines
+    assert histogram.samples('a"b') == (3, 5.55)
+
+
+def test_disabled_timing_adds_nothing():
+    client = create_app().test_client()
+    assert client.get('/metrics').status_code == 404
+    assert 'Server-Timing' not in client.get('/api/plants/perenual/quota').headers
+    assert timing.timer(timing.JSON_ENCODE_SECONDS, 'json') is timing._NOOP
+
+
+def test_requests_and_queries_are_timed(monkeypatch):
+    monkeypatch.setattr(timing, 'TIMING_ENABLED', True)
+    monkeypatch.setattr(db, '_pool', db.ConnectionPool(
+        lambda: sqlite3.connect(':memory:', factory=PyformatConnection, check_same_thread=False),
+        max_size=1))
+    client = create_app().test_client()
+
+    response = client.get('/api/plants/perenual/quota')
+    assert response.headers['Server-Timing'].startswith('json;dur=')
+    assert 'total;dur=' in response.headers['Server-Timing']
+
+    with db.pooled_connection() as conn:
+        conn.cursor().execute("CREATE TABLE plants (id INTEGER, content_hash TEXT)")
+        conn.cursor().execute("INSERT INTO plants VALUES (1, 'abc')")
+    # queries are labelled with the plant_service function that borrowed the connection
+    assert plant_service.get_plant_version(1) == 'abc'
+    assert timing.DB_QUERY_SECONDS.samples('get_plant_version')[0] == 1
+    assert timing.DB_QUERY_SECONDS.samples('other')[0] >= 2
+    assert timing.DB_CHECKOUT_SECONDS.samples()[0] >= 1
+
+    metrics = client.get('/metrics')
+    assert metrics.status_code == 200
+    assert ('pyplant_request_duration_seconds_count{endpoint="api.api_get_perenual_quota",'
+            'method="GET",status="200"}') in metrics.get_data(as_text=True)
@@ -0,0 +1,304 @@
+# utils/cache.py
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+def make_key(endpoint, params=None):
+    """builds a stable cache key from an endpoint name and its query params"""
+    params = params or {}
+    return f"{endpoint}:{json.dumps(params, sort_keys=True, default=str)}"
+
+
+class LRUCache:
+    """thread-safe, size-bounded in-process LRU of (value, stored_at, expires_at) entries"""
+
+    def __init__(self, max_entries=2048):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteCache:
+    """
+    On-disk cache tier backed by a single SQLite file, so entries survive
+    restarts and are shared between workers on the same host. Eviction drops
+    the least recently accessed rows once `max_entries` is exceeded.
+    """
+
+    def __init__(self, path, max_entries=50000):
+        self.path = path
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._writes_since_trim = 0
+        self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False,
+                                     isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                stored_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_cache_last_access ON cache_entries (last_access)")
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, stored_at, expires_at FROM cache_entries WHERE key = ?",
+                (key,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE cache_entries SET last_access = ? WHERE key = ?", (time.time(), key))
+        return json.loads(row[0]), row[1], row[2]
+
+    def set(self, key, entry):
+        value, stored_at, expires_at = entry
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache_entries (key, value, stored_at, expires_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, json.dumps(value), stored_at, expires_at, time.time()))
+            self._writes_since_trim += 1
+            # trimming needs a count, so only do it every few writes
+            if self._writes_since_trim >= 100:
+                self._writes_since_trim = 0
+                self._trim()
+
+    def _trim(self):
+        count = self._conn.execute("SELECT COUNT(*) FROM cache_entries").fetchone()[0]
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM cache_entries WHERE key IN ("
+                "SELECT key FROM cache_entries ORDER BY last_access LIMIT ?)", (overflow,))
+            self.evictions += overflow
+
+    def delete(self, key):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache_entries")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class TieredCache:
+    """
+    Read-through cache with an in-process LRU tier in front of an on-disk tier.
+
+    TTLs are configured per endpoint. Once an entry expires it is still served
+    for up to `stale_ttl` seconds while a background thread refreshes it
+    (stale-while-revalidate); past that window the caller waits for a fresh fetch.
+    """
+
+    def __init__(self, path, ttls=None, default_ttl=86400, stale_ttl=3600,
+                 memory_entries=2048, disk_entries=50000):
+        self.ttls = dict(ttls or {})
+        self.default_ttl = default_ttl
+        self.stale_ttl = stale_ttl
+        self.memory = LRUCache(memory_entries)
+        self.disk = SQLiteCache(path, disk_entries) if path else None
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self._tasks = set()
+        self._counters = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'stale_hits': 0,
+            'misses': 0,
+            'refreshes': 0,
+            'refresh_errors': 0,
+        }
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def _lookup(self, key):
+        entry = self.memory.get(key)
+        if entry is not None:
+            return entry, 'memory_hits'
+        if self.disk is not None:
+            try:
+                entry = self.disk.get(key)
+            except sqlite3.Error as e:
+                logger.warning("Disk cache read failed for %s: %s", key, e)
+                entry = None
+            if entry is not None:
+                self.memory.set(key, entry)
+                return entry, 'disk_hits'
+        return None, None
+
+    def _store(self, key, endpoint, value):
+        now = time.time()
+        entry = (value, now, now + self.ttls.get(endpoint, self.default_ttl))
+        self.memory.set(key, entry)
+        if self.disk is not None:
+            try:
+                self.disk.set(key, entry)
+            except sqlite3.Error as e:
+                logger.warning("Disk cache write failed for %s: %s", key, e)
+
+    def _refresh(self, key, endpoint, fetch, cache_if):
+        try:
+            value = fetch()
+            if cache_if is None or cache_if(value):
+                self._store(key, endpoint, value)
+            self._count('refreshes')
+        except Exception as e:
+            self._count('refresh_errors')
+            logger.warning("Background refresh failed for %s: %s", key, e)
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _revalidate(self, key, endpoint, fetch, cache_if):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        threading.Thread(target=self._refresh, args=(key, endpoint, fetch, cache_if),
+                         daemon=True).start()
+
+    def _refresh_async(self, key, endpoint, fetch, cache_if):
+        async def refresh():
+            try:
+                value = await fetch()
+                if cache_if is None or cache_if(value):
+                    await asyncio.to_thread(self._store, key, endpoint, value)
+                self._count('refreshes')
+            except Exception as e:
+                self._count('refresh_errors')
+                logger.warning("Background refresh failed for %s: %s", key, e)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+                    self._tasks.discard(task)
+
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+            # the loop only keeps weak references to tasks
+            task = asyncio.ensure_future(refresh())
+            self._tasks.add(task)
+
+    def get_or_fetch(self, endpoint, params, fetch, cache_if=None):
+        """
+        Returns the cached value for (endpoint, params), calling `fetch` on a miss.
+        Values for which `cache_if(value)` is false are returned but not stored.
+        """
+        key = make_key(endpoint, params)
+        entry, tier = self._lookup(key)
+        now = time.time()
+
+        if entry is not None:
+            value, _, expires_at = entry
+            if now < expires_at:
+                self._count(tier)
+                return value
+            if now < expires_at + self.stale_ttl:
+                self._count('stale_hits')
+                self._revalidate(key, endpoint, fetch, cache_if)
+                return value
+
+        self._count('misses')
+        value = fetch()
+        if cache_if is None or cache_if(value):
+            self._store(key, endpoint, value)
+        return value
+
+    async def get_or_fetch_async(self, endpoint, params, fetch, cache_if=None):
+        """
+        get_or_fetch for asyncio callers: `fetch` is a coroutine function, the
+        disk tier is read and written off the event loop, and stale entries are
+        refreshed by a task instead of a thread. Both share the same entries.
+        """
+        key = make_key(endpoint, params)
+        entry, tier = self.memory.get(key), 'memory_hits'
+        if entry is None and self.disk is not None:
+            entry, tier = await asyncio.to_thread(self._lookup, key)
+        now = time.time()
+
+        if entry is not None:
+            value, _, expires_at = entry
+            if now < expires_at:
+                self._count(tier)
+                return value
+            if now < expires_at + self.stale_ttl:
+                self._count('stale_hits')
+                self._refresh_async(key, endpoint, fetch, cache_if)
+                return value
+
+        self._count('misses')
+        value = await fetch()
+        if cache_if is None or cache_if(value):
+            await asyncio.to_thread(self._store, key, endpoint, value)
+        return value
+
+    def invalidate(self, endpoint, params=None):
+        key = make_key(endpoint, params)
+        self.memory.delete(key)
+        if self.disk is not None:
+            self.disk.delete(key)
+
+    def clear(self):
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def stats(self):
+        with self._lock:
+            snapshot = dict(self._counters)
+        hits = snapshot['memory_hits'] + snapshot['disk_hits'] + snapshot['stale_hits']
+        lookups = hits + snapshot['misses']
+        snapshot['hit_rate'] = hits / lookups if lookups else 0.0
+        snapshot['memory_entries'] = len(self.memory)
+        snapshot['memory_evictions'] = self.memory.evictions
+        snapshot['disk_evictions'] = self.disk.evictions if self.disk is not None else 0
+        return snapshot
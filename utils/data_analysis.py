@@ -1,20 +1,243 @@
 # utils/data_analysis.py
+import json
+import threading
+import time
+from collections import Counter
+
+import numpy as np
 import pandas as pd
-from models import Plant
-
-def get_plant_data():
-    # Query all plants
-    plants = Plant.query.all()
-    # Convert to DataFrame
-    data = [{
-        'common_name': plant.common_name,
-        'watering_frequency': plant.watering_frequency,
-        'sunlight_requirements': plant.sunlight_requirements
-    } for plant in plants]
-    df = pd.DataFrame(data)
-    return df
-
-def analyze_watering_frequency():
-    df = get_plant_data()
-    analysis = df['watering_frequency'].describe()
-    return analysis
+
+# USDA hardiness zones reported by perenual
+HARDINESS_ZONES = 13
+
+UNKNOWN = 'unknown'
+
+
+def lower_columns(frame):
+    """snowflake names result columns in upper case"""
+    frame.columns = [str(column).lower() for column in frame.columns]
+    return frame
+
+
+def distribution(grouped, column, flag=None):
+    """
+    {value: count} for one grouping set of a GROUPING SETS result. `flag` is the
+    GROUPING() column that is 0 on the rows grouped by `column`.
+    """
+    rows = grouped[grouped[flag or f"g_{column}"] == 0]
+    counts = rows['plants'].to_numpy(dtype=np.int64)
+    labels = rows[column].astype(object).where(rows[column].notna(), UNKNOWN).astype(str)
+    series = pd.Series(counts, index=labels.to_numpy()).groupby(level=0).sum()
+    return {label: int(count) for label, count in series.sort_values(ascending=False).items()}
+
+
+def toxicity_summary(grouped):
+    """marginals and overlaps from the (poisonous_to_humans, poisonous_to_pets) grouping set"""
+    rows = grouped[grouped['g_toxicity'] == 0]
+    counts = rows['plants'].to_numpy(dtype=np.int64)
+    states = {}
+    for target, column in (('humans', 'poisonous_to_humans'), ('pets', 'poisonous_to_pets')):
+        # stored as booleans or 0/1 depending on how the row was written
+        values = pd.to_numeric(rows[column].astype(object), errors='coerce').to_numpy(dtype=float)
+        known = ~np.isnan(values)
+        toxic = known & (np.nan_to_num(values) != 0)
+        states[target] = (known, toxic)
+
+    summary = {}
+    for target, (known, toxic) in states.items():
+        summary[target] = {
+            'toxic': int(counts[toxic].sum()),
+            'non_toxic': int(counts[known & ~toxic].sum()),
+            UNKNOWN: int(counts[~known].sum()),
+        }
+    humans, pets = states['humans'][1], states['pets'][1]
+    summary['toxic_to_either'] = int(counts[humans | pets].sum())
+    summary['toxic_to_both'] = int(counts[humans & pets].sum())
+    return summary
+
+
+def zone_histogram(zone_min, zone_max, zones=HARDINESS_ZONES):
+    """
+    Number of plants hardy in each zone 1..zones, given each plant's min and
+    max zone. Ranges are expanded with a difference array, so the cost is two
+    bincounts regardless of how wide the ranges are.
+    """
+    zone_min = np.asarray(zone_min, dtype=float)
+    zone_max = np.asarray(zone_max, dtype=float)
+    valid = ~(np.isnan(zone_min) | np.isnan(zone_max))
+    low = np.clip(np.minimum(zone_min[valid], zone_max[valid]), 1, zones).astype(np.int64)
+    high = np.clip(np.maximum(zone_min[valid], zone_max[valid]), 1, zones).astype(np.int64)
+    starts = np.bincount(low, minlength=zones + 2)
+    ends = np.bincount(high + 1, minlength=zones + 2)
+    return np.cumsum(starts - ends)[1:zones + 1]
+
+
+# Scalar columns whose value counts are reported
+DISTRIBUTION_COLUMNS = ['watering', 'cycle', 'care_level', 'family']
+
+TOXICITY_TARGETS = {'humans': 'poisonous_to_humans', 'pets': 'poisonous_to_pets'}
+
+
+def _label(value):
+    return UNKNOWN if value is None else str(value)
+
+
+def _as_json(value):
+    """ARRAY/OBJECT values arrive parsed from validation or as JSON text from snowflake"""
+    if isinstance(value, str):
+        try:
+            return json.loads(value)
+        except ValueError:
+            return None
+    return value
+
+
+def _zone(value):
+    try:
+        return float(str(value).strip())
+    except (TypeError, ValueError):
+        return None
+
+
+def zone_range(hardiness):
+    """the zones a plant is hardy in, matching zone_histogram's clipping"""
+    hardiness = _as_json(hardiness)
+    if not isinstance(hardiness, dict):
+        return range(0)
+    low, high = _zone(hardiness.get('min')), _zone(hardiness.get('max'))
+    if low is None or high is None or np.isnan(low) or np.isnan(high):
+        return range(0)
+    low, high = min(low, high), max(low, high)
+    low = int(min(max(low, 1), HARDINESS_ZONES))
+    high = int(min(max(high, 1), HARDINESS_ZONES))
+    return range(low, high + 1)
+
+
+def _toxic_state(value):
+    if value is None:
+        return None
+    return bool(value)
+
+
+def contributions(plant):
+    """the (dimension, label) counters one plant adds to the catalog stats"""
+    keys = [('total', '')]
+    keys.extend((column, _label(plant.get(column))) for column in DISTRIBUTION_COLUMNS)
+
+    sunlight = _as_json(plant.get('sunlight'))
+    if isinstance(sunlight, list):
+        labels = {str(item).strip().lower() for item in sunlight if item is not None}
+        keys.extend(('sunlight', label) for label in labels)
+
+    states = {target: _toxic_state(plant.get(column)) for target, column in TOXICITY_TARGETS.items()}
+    for target, state in states.items():
+        keys.append((f'toxicity.{target}', UNKNOWN if state is None else 'toxic' if state else 'non_toxic'))
+    if any(states.values()):
+        keys.append(('toxicity', 'toxic_to_either'))
+    if all(states.values()):
+        keys.append(('toxicity', 'toxic_to_both'))
+
+    keys.extend(('hardiness_zones', str(zone)) for zone in zone_range(plant.get('hardiness')))
+    return keys
+
+
+def stats_to_counts(stats):
+    """flattens a catalog stats dict into (dimension, label) counters"""
+    counts = Counter({('total', ''): stats['total']})
+    for dimension in DISTRIBUTION_COLUMNS + ['sunlight', 'hardiness_zones']:
+        counts.update({(dimension, label): count for label, count in stats[dimension].items()})
+    toxicity = stats['toxicity']
+    for target in TOXICITY_TARGETS:
+        counts.update({(f'toxicity.{target}', state): count for state, count in toxicity[target].items()})
+    for key in ('toxic_to_either', 'toxic_to_both'):
+        counts[('toxicity', key)] = toxicity[key]
+    return counts
+
+
+def counts_to_stats(counts):
+    """inverse of stats_to_counts, in the shape compute_catalog_stats returns"""
+    grouped = {}
+    for (dimension, label), count in counts.items():
+        if count > 0:
+            grouped.setdefault(dimension, {})[label] = count
+
+    def ranked(dimension):
+        values = grouped.get(dimension, {})
+        return dict(sorted(values.items(), key=lambda item: -item[1]))
+
+    stats = {column: ranked(column) for column in DISTRIBUTION_COLUMNS}
+    stats['total'] = counts.get(('total', ''), 0)
+    stats['sunlight'] = ranked('sunlight')
+    toxicity = {}
+    for target in TOXICITY_TARGETS:
+        values = grouped.get(f'toxicity.{target}', {})
+        toxicity[target] = {state: values.get(state, 0) for state in ('toxic', 'non_toxic', UNKNOWN)}
+    for key in ('toxic_to_either', 'toxic_to_both'):
+        toxicity[key] = counts.get(('toxicity', key), 0)
+    stats['toxicity'] = toxicity
+    zones = grouped.get('hardiness_zones', {})
+    stats['hardiness_zones'] = {str(zone): zones.get(str(zone), 0)
+                                for zone in range(1, HARDINESS_ZONES + 1)}
+    return stats
+
+
+class CatalogAggregates:
+    """
+    Catalog stats kept as counters and adjusted row by row as plants are
+    written, so reads never rescan the table. A full recount replaces the
+    counters periodically. It reads the table as of one instant, and only the
+    changes journaled after that instant are replayed on top, so a write the
+    recount already saw is not counted twice.
+    """
+
+    def __init__(self, stats):
+        self._lock = threading.Lock()
+        self._counts = stats_to_counts(stats)
+        self._journal = None
+        self._cached = None
+
+    def apply(self, changes, committed_at=None):
+        """
+        changes is an iterable of (before, after) plant dicts; either side may
+        be None. committed_at (epoch seconds) defaults to now, which is just
+        after the write committed.
+        """
+        committed_at = time.time() if committed_at is None else committed_at
+        with self._lock:
+            for before, after in changes:
+                if self._journal is not None:
+                    self._journal.append((committed_at, before, after))
+                self._apply_locked(before, after)
+            self._cached = None
+
+    def _apply_locked(self, before, after):
+        if before is not None:
+            self._counts.subtract(contributions(before))
+        if after is not None:
+            self._counts.update(contributions(after))
+
+    def begin_reconcile(self):
+        """starts journaling changes; returns the instant the recount must read the table as of"""
+        with self._lock:
+            self._journal = []
+            return time.time()
+
+    def finish_reconcile(self, stats, as_of):
+        """swaps in a recount taken as of `as_of` and replays the journaled changes it did not see"""
+        with self._lock:
+            journal, self._journal = self._journal or [], None
+            self._counts = stats_to_counts(stats)
+            for committed_at, before, after in journal:
+                if committed_at > as_of:
+                    self._apply_locked(before, after)
+            self._cached = None
+
+    def abort_reconcile(self):
+        with self._lock:
+            self._journal = None
+
+    def snapshot(self):
+        with self._lock:
+            if self._cached is None:
+                self._cached = counts_to_stats(self._counts)
+            return self._cached
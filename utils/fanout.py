@@ -0,0 +1,60 @@
+# utils/fanout.py
+import asyncio
+import contextvars
+import time
+from concurrent.futures import TimeoutError as FutureTimeout
+
+
+def _timed_out(timeout):
+    return TimeoutError(f"timed out after {timeout:g}s")
+
+
+def _not_started(timeout):
+    return TimeoutError(f"no worker free within {timeout:g}s")
+
+
+def fan_out(parts, timeouts, executor):
+    """
+    Runs every {name: fn} in `parts` concurrently on `executor` and waits at
+    most timeouts[name] seconds for each. Returns ({name: result},
+    {name: exception}); a part that times out is reported as a TimeoutError.
+    Parts run in a copy of the caller's context, as asyncio tasks do.
+
+    Threads cannot be cancelled, so a part that times out while running keeps
+    its worker until it returns; parts should bound their own blocking calls
+    by their timeout. A part still queued at its deadline never runs, and is
+    reported as "no worker free", which means the executor is saturated.
+    """
+    started = time.monotonic()
+    futures = {name: executor.submit(contextvars.copy_context().run, fn) for name, fn in parts.items()}
+    results, errors = {}, {}
+    # every part's clock started together, so waiting on the shortest deadline first wastes nothing
+    for name in sorted(futures, key=lambda name: timeouts[name]):
+        remaining = timeouts[name] - (time.monotonic() - started)
+        try:
+            results[name] = futures[name].result(timeout=max(remaining, 0))
+        except FutureTimeout:
+            queued = futures[name].cancel()
+            errors[name] = (_not_started if queued else _timed_out)(timeouts[name])
+        except Exception as e:
+            errors[name] = e
+    return results, errors
+
+
+async def fan_out_async(parts, timeouts):
+    """fan_out for coroutine functions; a part past its timeout is cancelled"""
+    async def run(name, fn):
+        try:
+            return name, await asyncio.wait_for(fn(), timeouts[name]), None
+        except asyncio.TimeoutError:
+            return name, None, _timed_out(timeouts[name])
+        except Exception as e:
+            return name, None, e
+
+    results, errors = {}, {}
+    for name, result, error in await asyncio.gather(*(run(name, fn) for name, fn in parts.items())):
+        if error is None:
+            results[name] = result
+        else:
+            errors[name] = error
+    return results, errors
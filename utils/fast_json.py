@@ -0,0 +1,193 @@
+# utils/fast_json.py
+import json
+import time
+
+from flask.json.provider import DefaultJSONProvider
+
+from utils import timing
+
+try:
+    import orjson
+except ImportError:  # optional speedup, the stdlib encoder is used without it
+    orjson = None
+
+# lists longer than this are streamed instead of being built up in memory
+STREAM_MIN_ITEMS = 500
+STREAM_CHUNK_ITEMS = 100
+
+
+class RawJSON(str):
+    """
+    Text that is already valid JSON, such as a snowflake VARIANT, ARRAY or
+    OBJECT value. It is embedded into responses verbatim instead of being
+    escaped as a string, and still behaves as a plain str everywhere else.
+    """
+    __slots__ = ()
+
+
+def _backend_dumps(default):
+    if orjson is not None:
+        options = orjson.OPT_NON_STR_KEYS
+
+        def dumps(obj):
+            return orjson.dumps(obj, default=default, option=options).decode('utf-8')
+    else:
+        encoder = json.JSONEncoder(default=default, ensure_ascii=False, separators=(',', ':'))
+        dumps = encoder.encode
+    return dumps
+
+
+_key_prefixes = {}
+
+def _key_prefix(key):
+    """',"key":' for a dict key; column names repeat on every row, so they are memoized"""
+    prefix = _key_prefixes.get(key)
+    if prefix is None:
+        prefix = ',' + json.dumps(str(key), ensure_ascii=False) + ':'
+        if len(_key_prefixes) < 4096:
+            _key_prefixes[key] = prefix
+    return prefix
+
+
+_CONTAINERS = (dict, list, tuple)
+
+
+def _is_container(value):
+    return isinstance(value, (dict, list, tuple))
+
+
+def encode(obj, dumps):
+    """
+    Serializes obj with `dumps`, splicing RawJSON values in as-is. Each dict's
+    plain values go through the backend in one call, so a plant row costs one
+    encode however many VARIANT columns it carries.
+    """
+    if isinstance(obj, RawJSON):
+        return str(obj)
+    if isinstance(obj, dict):
+        plain = {}
+        pieces = []
+        for key, value in obj.items():
+            value_type = type(value)
+            if value_type is RawJSON:
+                pieces.append(_key_prefixes.get(key) or _key_prefix(key))
+                pieces.append(value)
+            elif value_type in _CONTAINERS or _is_container(value):
+                pieces.append(_key_prefixes.get(key) or _key_prefix(key))
+                pieces.append(encode(value, dumps))
+            else:
+                plain[key] = value
+        if not pieces:
+            return dumps(plain)
+        if not plain:
+            return '{' + ''.join(pieces)[1:] + '}'
+        return dumps(plain)[:-1] + ''.join(pieces) + '}'
+    if isinstance(obj, (list, tuple)):
+        if not any(isinstance(item, RawJSON) or _is_container(item) for item in obj):
+            return dumps(list(obj))
+        return '[' + ','.join(encode(item, dumps) if isinstance(item, RawJSON) or _is_container(item)
+                              else dumps(item) for item in obj) + ']'
+    return dumps(obj)
+
+
+def make_encoder(default=str):
+    """standalone RawJSON-aware encoder, for JSON written outside a flask response"""
+    dumps = _backend_dumps(default)
+    return lambda obj: encode(obj, dumps)
+
+
+def iter_json_object(obj, stream_key, dumps, chunk_items=STREAM_CHUNK_ITEMS):
+    """yields obj as JSON text, emitting the list under `stream_key` a chunk at a time"""
+    head = {key: value for key, value in obj.items() if key != stream_key}
+    items = obj[stream_key]
+    head_text = encode(head, dumps)
+    yield (head_text[:-1] + ',' if head else '{') + f"{dumps(stream_key)}:["
+    chunk = []
+    first = True
+    for item in items:
+        chunk.append(encode(item, dumps))
+        if len(chunk) >= chunk_items:
+            yield ('' if first else ',') + ','.join(chunk)
+            first = False
+            chunk = []
+    if chunk:
+        yield ('' if first else ',') + ','.join(chunk)
+    yield ']}'
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider that encodes with orjson when it is installed,
+    embeds RawJSON values without a decode/re-encode round trip, and streams
+    responses whose top-level object holds a very long list.
+    """
+    sort_keys = False
+
+    def __init__(self, app):
+        super().__init__(app)
+        self._dumps = _backend_dumps(self.default)
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return encode(obj, self._dumps)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        if isinstance(obj, dict):
+            for key, value in obj.items():
+                if isinstance(value, list) and len(value) >= STREAM_MIN_ITEMS:
+                    return self._app.response_class(
+                        iter_json_object(obj, key, self._dumps), mimetype=self.mimetype)
+        with timing.timer(timing.JSON_ENCODE_SECONDS, 'json'):
+            content = f"{encode(obj, self._dumps)}\n"
+        return self._app.response_class(content, mimetype=self.mimetype)
+
+
+def _benchmark(rounds=200):
+    """times serializing 100 plant rows the old way and through the fast path"""
+    from flask import Flask
+
+    variant = json.dumps({'min': '5', 'max': '8', 'unit': 'feet',
+                          'regular_url': 'https://perenual.com/storage/species_image/1.jpg'}, indent=2)
+    array = json.dumps(['full sun', 'part shade', 'filtered shade'], indent=2)
+
+    def row(i, wrap):
+        return {
+            'id': i, 'common_name': f'Plant {i}', 'family': 'Pinaceae', 'cycle': 'Perennial',
+            'watering': 'Frequent', 'indoor': False, 'care_level': 'Medium',
+            'description': 'A hardy evergreen conifer. ' * 10,
+            **{name: wrap(array) for name in ('scientific_name', 'other_name', 'origin', 'sunlight',
+                                              'propagation', 'pest_susceptibility', 'leaf_color')},
+            **{name: wrap(variant) for name in ('dimensions', 'hardiness', 'hardiness_location',
+                                                'default_image', 'watering_general_benchmark')},
+        }
+
+    strings = {'plants': [row(i, str) for i in range(100)], 'count': 100}
+    raw = {'plants': [row(i, RawJSON) for i in range(100)], 'count': 100}
+
+    default_app = Flask('bench_default')
+    fast_app = Flask('bench_fast')
+    fast_app.json = FastJSONProvider(fast_app)
+
+    def timed(label, fn):
+        fn()
+        started = time.perf_counter()
+        for _ in range(rounds):
+            fn()
+        per_call = (time.perf_counter() - started) / rounds * 1000
+        print(f"{label:<58} {per_call:8.3f} ms / 100 plants")
+
+    print(f"backend: {'orjson ' + orjson.__version__ if orjson else 'stdlib json'}")
+    timed("default provider, VARIANTs re-escaped as strings",
+          lambda: default_app.json.dumps(strings))
+    timed("default provider, VARIANTs decoded then re-encoded",
+          lambda: default_app.json.dumps({'plants': [
+              {k: json.loads(v) if isinstance(v, str) and v[:1] in '[{' else v for k, v in p.items()}
+              for p in strings['plants']], 'count': 100}))
+    timed("fast provider, VARIANTs embedded raw",
+          lambda: fast_app.json.dumps(raw))
+
+
+if __name__ == "__main__":
+    _benchmark()
@@ -0,0 +1,268 @@
+# utils/filters.py
+import bisect
+import json
+from collections import namedtuple
+
+from marshmallow import fields as ma_fields
+from schemas import PlantSchema
+
+Condition = namedtuple('Condition', ['field', 'op', 'value'])
+
+
+class FilterError(ValueError):
+    pass
+
+
+# fields.Field is untyped in the schema; these two hold 0/1 or booleans
+TYPE_OVERRIDES = {
+    'poisonous_to_humans': 'bool',
+    'poisonous_to_pets': 'bool',
+}
+
+# free text or image payloads, not useful to filter on
+UNFILTERABLE = {'description', 'other_images'}
+
+OPERATORS = {
+    'int': {'eq', 'in', 'gt', 'gte', 'lt', 'lte'},
+    'str': {'eq', 'in'},
+    'bool': {'eq'},
+    'array': {'contains', 'contains_any'},
+}
+
+_SQL_COMPARISONS = {'gt': '>', 'gte': '>=', 'lt': '<', 'lte': '<='}
+
+
+def _field_type(name, field):
+    if name in TYPE_OVERRIDES:
+        return TYPE_OVERRIDES[name]
+    if isinstance(field, ma_fields.List):
+        return 'array'
+    if isinstance(field, ma_fields.Boolean):
+        return 'bool'
+    if isinstance(field, ma_fields.Integer):
+        return 'int'
+    if isinstance(field, ma_fields.String):
+        return 'str'
+    return None
+
+
+FIELD_TYPES = {
+    name: field_type
+    for name, field in PlantSchema().fields.items()
+    if name not in UNFILTERABLE and (field_type := _field_type(name, field)) is not None
+}
+
+
+def _coerce(field, field_type, value):
+    if field_type == 'int':
+        if isinstance(value, bool) or not isinstance(value, (int, str)):
+            raise FilterError(f"Filter on {field} expects an integer")
+        try:
+            return int(value)
+        except ValueError:
+            raise FilterError(f"Filter on {field} expects an integer")
+    if field_type == 'bool':
+        if isinstance(value, bool):
+            return value
+        if value in (0, 1):
+            return bool(value)
+        if isinstance(value, str) and value.lower() in ('true', 'false'):
+            return value.lower() == 'true'
+        raise FilterError(f"Filter on {field} expects a boolean")
+    if not isinstance(value, str):
+        raise FilterError(f"Filter on {field} expects a string")
+    # string equality is case-insensitive; array membership is exact
+    return value.lower() if field_type == 'str' else value
+
+
+def _as_list(field, value):
+    if not isinstance(value, list) or not value:
+        raise FilterError(f"Filter on {field} expects a non-empty list")
+    return value
+
+
+def parse_filters(raw):
+    """
+    Parses a filter spec (a JSON string or dict) into a list of Conditions.
+
+    Each key is a plant field; a bare value means equality (or membership for
+    array fields), and an object selects operators, e.g.
+    {"cycle": "Perennial", "id": {"gte": 10}, "sunlight": {"contains": "full sun"}}.
+    """
+    if not raw:
+        return []
+    if isinstance(raw, str):
+        try:
+            raw = json.loads(raw)
+        except ValueError:
+            raise FilterError("Filters must be a JSON object")
+    if not isinstance(raw, dict):
+        raise FilterError("Filters must be a JSON object")
+
+    conditions = []
+    for field, spec in raw.items():
+        field_type = FIELD_TYPES.get(field)
+        if field_type is None:
+            raise FilterError(f"Cannot filter on field: {field}")
+        if not isinstance(spec, dict):
+            spec = {'contains' if field_type == 'array' else 'eq': spec}
+        if not spec:
+            raise FilterError(f"Empty filter for field: {field}")
+        for op, value in spec.items():
+            if op not in OPERATORS[field_type]:
+                raise FilterError(f"Operator {op} is not supported for field: {field}")
+            if op in ('in', 'contains_any'):
+                value = [_coerce(field, field_type, item) for item in _as_list(field, value)]
+            else:
+                value = _coerce(field, field_type, value)
+            conditions.append(Condition(field, op, value))
+    return conditions
+
+
+def compile_sql(conditions, prefix='f'):
+    """returns (sql_conditions, params) using pyformat placeholders"""
+    clauses = []
+    params = {}
+    for i, (field, op, value) in enumerate(conditions):
+        name = f"{prefix}{i}"
+        field_type = FIELD_TYPES[field]
+        column = f"LOWER({field})" if field_type == 'str' else field
+        if op == 'eq':
+            clauses.append(f"{column} = %({name})s")
+            params[name] = value
+        elif op in _SQL_COMPARISONS:
+            clauses.append(f"{column} {_SQL_COMPARISONS[op]} %({name})s")
+            params[name] = value
+        elif op == 'in':
+            names = [f"{name}_{j}" for j in range(len(value))]
+            clauses.append(f"{column} IN ({', '.join(f'%({n})s' for n in names)})")
+            params.update(zip(names, value))
+        elif op == 'contains':
+            clauses.append(f"ARRAY_CONTAINS(%({name})s::VARIANT, {field})")
+            params[name] = value
+        elif op == 'contains_any':
+            names = [f"{name}_{j}" for j in range(len(value))]
+            clauses.append(
+                f"ARRAYS_OVERLAP({field}, ARRAY_CONSTRUCT({', '.join(f'%({n})s' for n in names)}))")
+            params.update(zip(names, value))
+    return clauses, params
+
+
+def _parse_value(field_type, value):
+    """normalizes a stored value the way the SQL comparison sees it"""
+    if value is None:
+        return None
+    if field_type == 'array':
+        if isinstance(value, str):
+            try:
+                value = json.loads(value)
+            except ValueError:
+                return ()
+        return tuple(value) if isinstance(value, (list, tuple)) else ()
+    if field_type == 'str':
+        return str(value).lower()
+    if field_type == 'bool':
+        return bool(value)
+    return value
+
+
+def parse_row(row):
+    """filter-ready view of a plant row; arrays from snowflake arrive as JSON text"""
+    return {field: _parse_value(field_type, row.get(field))
+            for field, field_type in FIELD_TYPES.items() if field in row}
+
+
+def evaluate(conditions, parsed):
+    """in-memory equivalent of compile_sql; NULLs never match, as in SQL"""
+    for field, op, value in conditions:
+        actual = parsed.get(field)
+        if actual is None:
+            return False
+        if op == 'eq':
+            if actual != value:
+                return False
+        elif op == 'in':
+            if actual not in value:
+                return False
+        elif op == 'gt':
+            if not actual > value:
+                return False
+        elif op == 'gte':
+            if not actual >= value:
+                return False
+        elif op == 'lt':
+            if not actual < value:
+                return False
+        elif op == 'lte':
+            if not actual <= value:
+                return False
+        elif op == 'contains':
+            if value not in actual:
+                return False
+        elif op == 'contains_any':
+            if not any(item in actual for item in value):
+                return False
+    return True
+
+
+class PlantSnapshot:
+    """
+    Immutable in-memory copy of selected plant columns. Answers filtered,
+    searched, sorted and paginated list queries without a warehouse round trip.
+    """
+
+    def __init__(self, rows, columns):
+        self.columns = set(columns)
+        self._rows = [(row, parse_row(row)) for row in rows]
+        self._orders = {}
+
+    def __len__(self):
+        return len(self._rows)
+
+    def covers(self, fields, conditions, sort):
+        needed = set(fields) | {condition.field for condition in conditions} | {sort, 'common_name'}
+        return needed <= self.columns
+
+    def _ordered(self, sort):
+        order = self._orders.get(sort)
+        if order is None:
+            if sort == 'id':
+                order = sorted(self._rows, key=lambda item: item[0]['id'])
+                keys = [(item[0]['id'],) for item in order]
+            else:
+                order = sorted(self._rows, key=lambda item: (item[0].get(sort) or '', item[0]['id']))
+                keys = [(item[0].get(sort) or '', item[0]['id']) for item in order]
+            order = (order, keys)
+            self._orders[sort] = order
+        return order
+
+    def query(self, conditions, search_term=None, sort='id', after=None,
+              limit=10, offset=0, fields=None, include_count=False):
+        """returns (plants, total_count); `after` is a decoded (value, id) keyset position"""
+        rows, keys = self._ordered(sort)
+        needle = search_term.lower() if search_term else None
+
+        def matching(start):
+            for row, parsed in rows[start:]:
+                if needle is not None and needle not in (row.get('common_name') or '').lower():
+                    continue
+                if evaluate(conditions, parsed):
+                    yield row
+
+        start = 0
+        if after is not None:
+            position = (after[1],) if sort == 'id' else after
+            start = bisect.bisect_right(keys, position)
+
+        plants = []
+        skip = 0 if after is not None else offset
+        for row in matching(start):
+            if skip:
+                skip -= 1
+                continue
+            plants.append({field: row.get(field) for field in fields})
+            if len(plants) == limit:
+                break
+
+        total = sum(1 for _ in matching(0)) if include_count else None
+        return plants, total
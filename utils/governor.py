@@ -0,0 +1,266 @@
+# utils/governor.py
+import asyncio
+import heapq
+import itertools
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+# lower numbers are served first
+INTERACTIVE = 0
+BULK = 10
+
+_context = threading.local()
+
+
+@contextmanager
+def priority(level):
+    """marks outbound calls made by the current thread with a queue priority"""
+    previous = getattr(_context, 'priority', INTERACTIVE)
+    _context.priority = level
+    try:
+        yield
+    finally:
+        _context.priority = previous
+
+
+def current_priority():
+    return getattr(_context, 'priority', INTERACTIVE)
+
+
+class QuotaExceeded(RuntimeError):
+    pass
+
+
+def _today():
+    return datetime.now(timezone.utc).strftime('%Y-%m-%d')
+
+
+class _MemoryUsage:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._day = _today()
+        self._used = 0
+
+    def consume(self, budget):
+        with self._lock:
+            day = _today()
+            if day != self._day:
+                self._day, self._used = day, 0
+            if budget is not None and self._used >= budget:
+                return False
+            self._used += 1
+            return True
+
+    def used(self):
+        with self._lock:
+            return self._used if self._day == _today() else 0
+
+
+class _SQLiteUsage:
+    """daily call counter in a SQLite file, shared by every worker on the host"""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._connection().execute(
+            "CREATE TABLE IF NOT EXISTS daily_usage (day TEXT PRIMARY KEY, used INTEGER NOT NULL)")
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def consume(self, budget):
+        conn = self._connection()
+        day = _today()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT used FROM daily_usage WHERE day = ?", (day,)).fetchone()
+            used = row[0] if row else 0
+            if budget is not None and used >= budget:
+                conn.execute("COMMIT")
+                return False
+            conn.execute("INSERT OR REPLACE INTO daily_usage (day, used) VALUES (?, ?)", (day, used + 1))
+            conn.execute("DELETE FROM daily_usage WHERE day < ?", (day,))
+            conn.execute("COMMIT")
+            return True
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def used(self):
+        row = self._connection().execute(
+            "SELECT used FROM daily_usage WHERE day = ?", (_today(),)).fetchone()
+        return row[0] if row else 0
+
+
+class OutboundGovernor:
+    """
+    Shapes calls to a rate limited upstream.
+
+    Identical in-flight calls are coalesced so one upstream request serves every
+    waiter (single-flight). Calls that do go upstream take a token from a
+    requests-per-second bucket and a unit of the daily budget, and waiting
+    callers are released in priority order, so interactive traffic overtakes
+    bulk work.
+    """
+
+    def __init__(self, rate_per_sec=5.0, burst=None, daily_budget=None, usage_path=None):
+        self.rate_per_sec = rate_per_sec
+        self.burst = burst or max(1.0, rate_per_sec)
+        self.daily_budget = daily_budget
+        self._usage = _SQLiteUsage(usage_path) if usage_path else _MemoryUsage()
+
+        self._cond = threading.Condition()
+        self._tokens = self.burst
+        self._refilled_at = time.monotonic()
+        self._waiters = []
+        self._sequence = itertools.count()
+
+        self._inflight = {}
+        self._inflight_async = {}  # only touched from the event loop thread
+        self._inflight_lock = threading.Lock()
+        self._counters = {
+            'calls': 0,
+            'upstream_calls': 0,
+            'coalesced': 0,
+            'throttled': 0,
+            'rejected': 0,
+        }
+
+    def _count(self, name):
+        with self._inflight_lock:
+            self._counters[name] += 1
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate_per_sec)
+        self._refilled_at = now
+
+    def _acquire(self, level):
+        ticket = (level, next(self._sequence))
+        with self._cond:
+            heapq.heappush(self._waiters, ticket)
+            waited = False
+            try:
+                while True:
+                    self._refill(time.monotonic())
+                    if self._waiters[0] == ticket and self._tokens >= 1:
+                        self._tokens -= 1
+                        break
+                    waited = True
+                    # sleep until the next token is due, or until someone ahead of us leaves
+                    delay = max((1 - self._tokens) / self.rate_per_sec, 0.001)
+                    self._cond.wait(delay)
+            finally:
+                self._waiters.remove(ticket)
+                heapq.heapify(self._waiters)
+                self._cond.notify_all()
+        if waited:
+            self._count('throttled')
+
+    async def _acquire_async(self, level):
+        # same queue as _acquire, but waits by sleeping the task instead of blocking the thread
+        ticket = (level, next(self._sequence))
+        with self._cond:
+            heapq.heappush(self._waiters, ticket)
+        waited = False
+        try:
+            while True:
+                with self._cond:
+                    self._refill(time.monotonic())
+                    if self._waiters[0] == ticket and self._tokens >= 1:
+                        self._tokens -= 1
+                        break
+                    delay = max((1 - self._tokens) / self.rate_per_sec, 0.001)
+                waited = True
+                await asyncio.sleep(delay)
+        finally:
+            with self._cond:
+                self._waiters.remove(ticket)
+                heapq.heapify(self._waiters)
+                self._cond.notify_all()
+        if waited:
+            self._count('throttled')
+
+    def _admit(self):
+        if not self._usage.consume(self.daily_budget):
+            self._count('rejected')
+            raise QuotaExceeded("Daily upstream request budget exhausted")
+        self._count('upstream_calls')
+
+    def call(self, key, fn, level=None):
+        """runs fn() under the governor, sharing the outcome with concurrent callers of `key`"""
+        self._count('calls')
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+            else:
+                self._counters['coalesced'] += 1
+        if not leader:
+            return future.result()
+
+        try:
+            self._acquire(current_priority() if level is None else level)
+            self._admit()
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+
+    async def _call_upstream_async(self, key, fn, level):
+        try:
+            await self._acquire_async(level)
+            # the usage store may be a sqlite file, so it is updated off the loop
+            await asyncio.to_thread(self._admit)
+            return await fn()
+        finally:
+            del self._inflight_async[key]
+
+    async def call_async(self, key, fn, level=INTERACTIVE):
+        """
+        Coroutine twin of call(): awaits fn(), a coroutine function, under the
+        same rate and budget. Concurrent tasks asking for `key` share one
+        upstream request, which runs as its own task so a caller that goes away
+        does not cancel it for the others.
+        """
+        self._count('calls')
+        task = self._inflight_async.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._call_upstream_async(key, fn, level))
+            # marks the outcome as seen even when every caller was cancelled
+            task.add_done_callback(lambda done: done.cancelled() or done.exception())
+            self._inflight_async[key] = task
+        else:
+            self._count('coalesced')
+        return await asyncio.shield(task)
+
+    def stats(self):
+        with self._inflight_lock:
+            snapshot = dict(self._counters)
+            snapshot['in_flight'] = len(self._inflight) + len(self._inflight_async)
+        with self._cond:
+            snapshot['queued'] = len(self._waiters)
+            snapshot['queued_bulk'] = sum(1 for level, _ in self._waiters if level >= BULK)
+        used = self._usage.used()
+        snapshot['used_today'] = used
+        snapshot['daily_budget'] = self.daily_budget
+        snapshot['remaining_today'] = (None if self.daily_budget is None
+                                       else max(0, self.daily_budget - used))
+        snapshot['rate_per_sec'] = self.rate_per_sec
+        return snapshot
@@ -0,0 +1,197 @@
+# utils/log_config.py
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+# 'json' for one object per line, 'text' for the classic human readable format
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'json')
+LOG_FILE = os.getenv('LOG_FILE')  # stderr when unset
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', 10000))
+# longer messages and tracebacks are cut, so one huge payload cannot flood the sink
+LOG_MAX_MESSAGE_CHARS = int(os.getenv('LOG_MAX_MESSAGE_CHARS', 2000))
+
+# request logs: the share of ordinary requests logged per endpoint, e.g. '{"api.api_fetch_species": 0.05}'.
+# server errors and slow requests are always logged.
+LOG_REQUEST_SAMPLE_RATES = json.loads(os.getenv('LOG_REQUEST_SAMPLE_RATES', '{}'))
+LOG_REQUEST_SAMPLE_DEFAULT = float(os.getenv('LOG_REQUEST_SAMPLE_DEFAULT', 1.0))
+LOG_SLOW_REQUEST_MS = float(os.getenv('LOG_SLOW_REQUEST_MS', 1000))
+
+# chatty libraries that log every request or query at INFO
+QUIET_LOGGERS = ['httpx', 'urllib3', 'snowflake.connector']
+
+# env vars whose values never appear in a log line, whatever logged them
+SECRET_ENV_VARS = ['PERENUAL_API_KEY', 'SNOWFLAKE_PASSWORD', 'SECRET_KEY']
+
+_SECRET_PATTERNS = [
+    # query strings and form bodies: ?key=..., &token=...
+    re.compile(r'(\b(?:key|api_key|apikey|token|access_token|password|secret)=)[^&\s\'",)]+', re.I),
+    # dict and header reprs: 'key': '...', "Authorization": "..."
+    re.compile(r'''(['"](?:key|api_key|x-api-key|authorization|token|password|secret)['"]\s*:\s*['"])[^'"]*''',
+               re.I),
+]
+REDACTED = '***'
+
+# attributes every LogRecord has; anything else on a record came in through extra=
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+request_logger = logging.getLogger('pyplant.requests')
+
+
+def redact(text):
+    """masks api keys, passwords and tokens in `text`"""
+    for pattern in _SECRET_PATTERNS:
+        text = pattern.sub(lambda match: match.group(1) + REDACTED, text)
+    for name in SECRET_ENV_VARS:
+        secret = os.getenv(name)
+        if secret and len(secret) >= 4 and secret in text:
+            text = text.replace(secret, REDACTED)
+    return text
+
+
+def truncate(text, limit=LOG_MAX_MESSAGE_CHARS):
+    if limit and len(text) > limit:
+        return f"{text[:limit]}... [{len(text) - limit} more chars]"
+    return text
+
+
+_traceback_formatter = logging.Formatter()
+
+
+class JSONFormatter(logging.Formatter):
+    """one JSON object per record; fields passed with extra= are kept as top-level keys"""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': truncate(redact(record.getMessage())),
+        }
+        for name, value in vars(record).items():
+            if name not in _RECORD_ATTRS and not name.startswith('_'):
+                entry[name] = value
+        exc_text = record.exc_text or (self.formatException(record.exc_info) if record.exc_info else None)
+        if exc_text:
+            entry['exc_info'] = truncate(redact(exc_text))
+        return redact(json.dumps(entry, default=str))
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)s %(name)s: %(message)s')
+
+    def format(self, record):
+        return truncate(redact(super().format(record)))
+
+
+class LazyQueueHandler(QueueHandler):
+    """
+    Hands records to the listener thread with only the message snapshotted:
+    %-args are merged and a traceback is rendered to text here, so a caller
+    mutating a logged object afterwards cannot change the line and queued
+    records hold no frames. Redaction, JSON encoding and the write happen on
+    the listener thread. Records below the logger's level never get this far,
+    so disabled log calls still cost no formatting. A full queue drops the
+    record rather than block.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _traceback_formatter.formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_listener = None
+_handler = None
+_configure_lock = threading.Lock()
+
+
+def configure_logging(level=None, log_format=None):
+    """
+    Routes every logger through one bounded queue to a single sink. The
+    first call wins; later calls, e.g. from a second app instance, are no-ops.
+    """
+    global _listener, _handler
+    with _configure_lock:
+        if _listener is not None:
+            return
+        sink = logging.FileHandler(LOG_FILE) if LOG_FILE else logging.StreamHandler()
+        sink.setFormatter(JSONFormatter() if (log_format or LOG_FORMAT) == 'json' else TextFormatter())
+
+        log_queue = queue.Queue(LOG_QUEUE_SIZE)
+        _handler = LazyQueueHandler(log_queue)
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(_handler)
+        root.setLevel(level or LOG_LEVEL)
+        for name in QUIET_LOGGERS:
+            logging.getLogger(name).setLevel(logging.WARNING)
+
+        _listener = QueueListener(log_queue, sink, respect_handler_level=True)
+        _listener.start()
+        # flush whatever is queued when the process exits
+        atexit.register(_listener.stop)
+
+
+def dropped_records():
+    return _handler.dropped if _handler is not None else 0
+
+
+def sample_rate(endpoint):
+    return float(LOG_REQUEST_SAMPLE_RATES.get(endpoint, LOG_REQUEST_SAMPLE_DEFAULT))
+
+
+def log_request(endpoint, method, path, status, duration_ms, client=None):
+    """one structured line per request, sampled per endpoint; errors and slow requests always pass"""
+    if not request_logger.isEnabledFor(logging.INFO):
+        return
+    rate = sample_rate(endpoint)
+    if status < 500 and duration_ms < LOG_SLOW_REQUEST_MS and rate < 1 and random.random() >= rate:
+        return
+    request_logger.info('%s %s %s %.1fms', method, path, status, duration_ms, extra={
+        'endpoint': endpoint, 'method': method, 'path': path, 'status': status,
+        'duration_ms': round(duration_ms, 1), 'client': client, 'sample_rate': rate,
+    })
+
+
+def install_request_logging(app):
+    """logs every flask request through log_request"""
+    from flask import g, request
+
+    @app.before_request
+    def start_request_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def log_finished_request(response):
+        started = g.get('request_started')
+        if started is not None:
+            log_request(request.endpoint or 'unmatched', request.method, request.path,
+                        response.status_code, (time.perf_counter() - started) * 1000,
+                        request.remote_addr)
+        return response
@@ -0,0 +1,154 @@
+# utils/prefetch.py
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class Prefetcher:
+    """
+    Reads ahead of clients that page through a list. After a client reads page
+    N, pages N+1..N+depth are fetched on a small thread pool so that they are
+    already cached when asked for; `fetch(page, cancelled)` is expected to go
+    through the same cache as the foreground read. `warm(result, cancelled)`
+    optionally does follow-up work with a fetched page and returns how many
+    items it warmed.
+
+    Queued pages a client no longer wants - it jumped elsewhere or went quiet
+    for `idle_seconds` - are cancelled; long-running fetch or warm work should
+    poll `cancelled()` and stop early.
+    """
+
+    def __init__(self, fetch, depth=2, workers=2, max_pending=16, idle_seconds=120,
+                 max_clients=10000, remember_pages=1024, warm=None):
+        self.fetch = fetch
+        self.warm = warm
+        self.depth = depth
+        self.max_pending = max_pending
+        self.idle_seconds = idle_seconds
+        self.max_clients = max_clients
+        self.remember_pages = remember_pages
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='prefetch')
+        self._lock = threading.Lock()
+        self._clients = OrderedDict()  # client -> (last page read, read at)
+        self._inflight = {}  # page -> future, shared by every client
+        self._prefetched = OrderedDict()  # pages fetched ahead and not read since
+        self._closed = False
+        self._counters = {
+            'hits': 0,
+            'misses': 0,
+            'prefetched': 0,
+            'wasted': 0,
+            'cancelled': 0,
+            'dropped': 0,
+            'errors': 0,
+            'warmed': 0,
+        }
+
+    def after_read(self, client, page):
+        """
+        Notes that `client` just read `page` and queues the pages after it.
+        Returns whether the read was served by an earlier prefetch.
+        """
+        now = time.monotonic()
+        with self._lock:
+            # a page still in flight does not count: the foreground read went upstream itself
+            hit = self._prefetched.pop(page, None) is not None
+            self._counters['hits' if hit else 'misses'] += 1
+
+            self._clients[client] = (page, now)
+            self._clients.move_to_end(client)
+            self._forget_clients(now)
+            self._cancel_unwanted(now)
+            for ahead in range(page + 1, page + self.depth + 1):
+                self._schedule(ahead)
+        return hit
+
+    def _forget_clients(self, now):
+        while self._clients:
+            client, (last, seen) = next(iter(self._clients.items()))
+            if len(self._clients) <= self.max_clients and now - seen < self.idle_seconds:
+                break
+            del self._clients[client]
+            self._waste_window(last, now)
+
+    def _waste_window(self, last, now):
+        # pages fetched ahead for a client that left, and wanted by no one else, will not be read
+        for page in range(last + 1, last + self.depth + 1):
+            if page in self._prefetched and not self._wanted(page, now):
+                del self._prefetched[page]
+                self._counters['wasted'] += 1
+
+    def _wanted(self, page, now):
+        return not self._closed and any(
+            last < page <= last + self.depth and now - seen < self.idle_seconds
+            for last, seen in self._clients.values())
+
+    def _cancel_unwanted(self, now):
+        for page, future in list(self._inflight.items()):
+            if not self._wanted(page, now) and future.cancel():
+                del self._inflight[page]
+                self._counters['cancelled'] += 1
+
+    def _schedule(self, page):
+        if self._closed or page in self._prefetched or page in self._inflight:
+            return
+        if len(self._inflight) >= self.max_pending:
+            self._counters['dropped'] += 1
+            return
+        self._inflight[page] = self._executor.submit(self._run, page)
+
+    def cancelled(self, page):
+        with self._lock:
+            return not self._wanted(page, time.monotonic())
+
+    def _run(self, page):
+        cancelled = lambda: self.cancelled(page)
+        try:
+            if cancelled():
+                self._count('cancelled')
+                return
+            result = self.fetch(page, cancelled)
+            if not result:
+                return
+            with self._lock:
+                self._counters['prefetched'] += 1
+                if not self._wanted(page, time.monotonic()):
+                    # its client left while the fetch ran
+                    self._counters['wasted'] += 1
+                    return
+                self._prefetched[page] = time.monotonic()
+                while len(self._prefetched) > self.remember_pages:
+                    self._prefetched.popitem(last=False)
+                    self._counters['wasted'] += 1
+            if self.warm is not None:
+                self._count('warmed', self.warm(result, cancelled) or 0)
+        except Exception as e:
+            self._count('errors')
+            logger.warning("Prefetch of page %s failed: %s", page, e)
+        finally:
+            with self._lock:
+                self._inflight.pop(page, None)
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def stats(self):
+        with self._lock:
+            self._forget_clients(time.monotonic())
+            snapshot = dict(self._counters)
+            snapshot['pending'] = len(self._inflight)
+            snapshot['clients'] = len(self._clients)
+        reads = snapshot['hits'] + snapshot['misses']
+        snapshot['hit_rate'] = snapshot['hits'] / reads if reads else 0.0
+        return snapshot
+
+    def shutdown(self):
+        """stops scheduling, drops queued pages and lets running ones wind down"""
+        with self._lock:
+            self._closed = True
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,135 @@
+# utils/rate_limit.py
+import math
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+RateLimitResult = namedtuple('RateLimitResult', ['allowed', 'limit', 'remaining', 'reset'])
+
+
+def _sliding_estimate(previous, current, elapsed, period):
+    """sliding-window counter: weight the previous window by how much of it still overlaps"""
+    return previous * (1 - elapsed / period) + current
+
+
+def _decide(previous, current, window_start, now, limit, period):
+    elapsed = now - window_start
+    allowed = _sliding_estimate(previous, current, elapsed, period) + 1 <= limit
+    if allowed:
+        current += 1
+    used = _sliding_estimate(previous, current, elapsed, period)
+    remaining = max(0, int(limit - math.ceil(used)))
+    reset = max(1, int(math.ceil(window_start + period - now)))
+    return allowed, current, RateLimitResult(allowed, limit, remaining, reset)
+
+
+class MemoryBackend:
+    """per-process counters; each key costs three numbers and each hit O(1) work"""
+
+    def __init__(self, prune_every=1000):
+        self._windows = {}  # key -> (window_start, previous_count, current_count)
+        self._lock = threading.Lock()
+        self._prune_every = prune_every
+        self._hits = 0
+
+    def hit(self, key, limit, period, now=None):
+        now = time.time() if now is None else now
+        window_start = math.floor(now / period) * period
+        with self._lock:
+            start, previous, current = self._windows.get(key, (window_start, 0, 0))
+            if start != window_start:
+                # the window rolled over once (keep the old count) or more (forget it)
+                previous = current if window_start - start == period else 0
+                current = 0
+            allowed, current, result = _decide(previous, current, window_start, now, limit, period)
+            self._windows[key] = (window_start, previous, current)
+
+            self._hits += 1
+            if self._hits >= self._prune_every:
+                self._hits = 0
+                self._prune(now, period)
+        return result
+
+    def _prune(self, now, period):
+        # amortized cleanup of clients that went quiet for two whole windows
+        cutoff = now - 2 * period
+        for key in [key for key, (start, _, _) in self._windows.items() if start < cutoff]:
+            del self._windows[key]
+
+
+class SQLiteBackend:
+    """
+    Counters in a SQLite file, so every worker process on the host draws from
+    one budget. Each hit is a single-row read-modify-write inside an
+    immediate transaction.
+    """
+
+    def __init__(self, path, prune_every=1000):
+        self.path = path
+        self._local = threading.local()
+        self._prune_every = prune_every
+        self._hits = 0
+        self._hits_lock = threading.Lock()
+        conn = self._connection()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS rate_limits (
+                key TEXT PRIMARY KEY,
+                window_start REAL NOT NULL,
+                previous_count INTEGER NOT NULL,
+                current_count INTEGER NOT NULL
+            )
+        """)
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def hit(self, key, limit, period, now=None):
+        now = time.time() if now is None else now
+        window_start = math.floor(now / period) * period
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT window_start, previous_count, current_count FROM rate_limits WHERE key = ?",
+                (key,)).fetchone()
+            start, previous, current = row if row else (window_start, 0, 0)
+            if start != window_start:
+                previous = current if window_start - start == period else 0
+                current = 0
+            allowed, current, result = _decide(previous, current, window_start, now, limit, period)
+            conn.execute(
+                "INSERT OR REPLACE INTO rate_limits (key, window_start, previous_count, current_count) "
+                "VALUES (?, ?, ?, ?)", (key, window_start, previous, current))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        with self._hits_lock:
+            self._hits += 1
+            prune = self._hits >= self._prune_every
+            if prune:
+                self._hits = 0
+        if prune:
+            # amortized cleanup, as in MemoryBackend; each worker prunes on its own schedule
+            self.prune(now - 2 * period)
+        return result
+
+    def prune(self, older_than):
+        """drops counters whose window started before `older_than` (epoch seconds)"""
+        self._connection().execute("DELETE FROM rate_limits WHERE window_start < ?", (older_than,))
+
+
+def create_backend(name, path=None):
+    if name == 'memory':
+        return MemoryBackend()
+    if name == 'sqlite':
+        return SQLiteBackend(path or 'rate_limits.db')
+    raise ValueError(f"Unknown rate limit backend: {name}")
@@ -0,0 +1,255 @@
+# utils/schema_compiler.py
+import time
+from functools import lru_cache
+
+from marshmallow import EXCLUDE, RAISE, Schema, ValidationError, fields
+from marshmallow.decorators import POST_LOAD, PRE_LOAD, VALIDATES, VALIDATES_SCHEMA
+from marshmallow.utils import is_collection, missing
+
+from utils import timing
+
+# Values a compiled loader recognizes from their exact type and accepts as-is;
+# anything else goes through the field's own deserialize().
+_FAST_CHECKS = {
+    fields.Integer: 'type(v) is int',
+    fields.String: 'type(v) is str',
+    fields.Boolean: '(v is True or v is False)',
+    fields.Dict: 'type(v) is dict',
+}
+
+
+class _Invalid(Exception):
+    """the fast path found a problem; marshmallow re-runs the record to report it"""
+
+
+def _str_list(value):
+    """a copy of value when every item is a str, else None"""
+    for item in value:
+        if type(item) is not str:
+            return None
+    return list(value)
+
+
+def _supported(schema):
+    load_hooks = (PRE_LOAD, POST_LOAD, VALIDATES, VALIDATES_SCHEMA)
+    if any(schema._hooks[hook] for hook in load_hooks):
+        return False
+    if type(schema).handle_error is not Schema.handle_error:
+        return False
+    if schema.unknown not in (EXCLUDE, RAISE):
+        return False
+    for field in schema.load_fields.values():
+        inner = getattr(field, 'inner', None)
+        if isinstance(field, (fields.Nested, fields.Pluck)) or isinstance(inner, fields.Nested):
+            return False
+    return True
+
+
+def _fast_path(field):
+    """(condition, expression) producing the loaded value from `v` without dispatch"""
+    if field.validators:
+        return None
+    if isinstance(field, fields.List):
+        inner = field.inner
+        if type(inner) is fields.String and not inner.validators and not inner.allow_none:
+            return 'type(v) is list', '_str_list(v)'
+        return None
+    if isinstance(field, fields.Boolean):
+        if True not in field.truthy or False not in field.falsy:
+            return None
+    if isinstance(field, fields.Integer) and field.strict:
+        return None
+    if isinstance(field, fields.Dict):
+        if field.key_field or field.value_field or field.mapping_type is not dict:
+            return None
+        return _FAST_CHECKS[fields.Dict], 'dict(v)'
+    if type(field) is fields.Field:
+        return 'True', 'v'
+    check = _FAST_CHECKS.get(type(field))
+    return (check, 'v') if check else None
+
+
+def _generate(schema, partial):
+    """source of a loader specialized to the schema's fields, unrolled one block per field"""
+    lines = [
+        'def load(data):',
+        '    if not isinstance(data, Mapping):',
+        '        raise _Invalid',
+        '    get = data.get',
+        '    out = dict_class()',
+    ]
+    namespace = {}
+    for i, (name, field) in enumerate(schema.load_fields.items()):
+        key = field.data_key if field.data_key is not None else name
+        target = field.attribute or name
+        namespace[f'f{i}'] = field
+        lines.append(f'    v = get({key!r}, missing)')
+
+        lines.append('    if v is missing:')
+        if partial:
+            lines.append('        pass')
+        elif field.required:
+            lines.append('        raise _Invalid')
+        elif field.load_default is not missing:
+            lines.append(f'        out[{target!r}] = f{i}.deserialize(v, {key!r}, data)')
+        else:
+            lines.append('        pass')
+
+        lines.append('    elif v is None:')
+        if field.allow_none and not field.validators:
+            lines.append(f'        out[{target!r}] = None')
+        else:
+            lines.append(f'        out[{target!r}] = f{i}.deserialize(v, {key!r}, data)')
+
+        fast = _fast_path(field)
+        if fast is not None:
+            check, expression = fast
+            if expression == '_str_list(v)':
+                lines.append(f'    elif {check}:')
+                lines.append('        r = _str_list(v)')
+                lines.append(f'        out[{target!r}] = r if r is not None else f{i}.deserialize(v, {key!r}, data)')
+            elif check == 'True':
+                lines.append('    else:')
+                lines.append(f'        out[{target!r}] = {expression}')
+                continue
+            else:
+                lines.append(f'    elif {check}:')
+                lines.append(f'        out[{target!r}] = {expression}')
+        lines.append('    else:')
+        lines.append(f'        out[{target!r}] = f{i}.deserialize(v, {key!r}, data)')
+
+    if schema.unknown == RAISE:
+        known = {field.data_key if field.data_key is not None else name
+                 for name, field in schema.load_fields.items()}
+        namespace['known'] = frozenset(known)
+        lines.append('    if not known.issuperset(data):')
+        lines.append('        raise _Invalid')
+    lines.append('    return out')
+    return '\n'.join(lines), namespace
+
+
+class CompiledSchema:
+    """
+    A marshmallow schema compiled into specialized load functions.
+
+    Each field becomes an inline type check that accepts well-formed values
+    directly and hands everything else to the field's own deserialize().
+    Whenever a record fails, it is loaded again through the schema itself,
+    so error messages, their nesting and valid_data are exactly marshmallow's.
+    Schemas using load hooks, nested fields or INCLUDE fall back to
+    Schema.load entirely.
+    """
+
+    def __init__(self, schema):
+        self.schema = schema
+        self._loaders = {}
+        if _supported(schema):
+            from collections.abc import Mapping
+            for partial in (False, True):
+                source, namespace = _generate(schema, partial)
+                namespace.update(Mapping=Mapping, missing=missing, dict_class=schema.dict_class,
+                                 _Invalid=_Invalid, _str_list=_str_list)
+                exec(compile(source, f'<compiled {type(schema).__name__} partial={partial}>', 'exec'),
+                     namespace)
+                self._loaders[partial] = namespace['load']
+
+    @property
+    def compiled(self):
+        return bool(self._loaders)
+
+    def _load_one(self, data, partial):
+        if partial is None:
+            partial = self.schema.partial
+        # a collection of field names is a per-field partial, left to marshmallow
+        loader = self._loaders.get(bool(partial)) if partial in (None, False, True) else None
+        if loader is not None:
+            try:
+                return loader(data)
+            except (_Invalid, ValidationError):
+                pass
+        return self.schema.load(data, partial=partial)
+
+    def load(self, data, many=False, partial=None):
+        """drop-in for Schema.load; raises the same ValidationError on bad input"""
+        with timing.timer(timing.SCHEMA_LOAD_SECONDS, 'schema', type(self.schema).__name__):
+            return self._load(data, many, partial)
+
+    def _load(self, data, many, partial):
+        if not many:
+            return self._load_one(data, partial)
+        if not is_collection(data):
+            return self.schema.load(data, many=True, partial=partial)
+        valid, errors = self.load_many(data, partial=partial, _valid_data=True)
+        if errors:
+            raise ValidationError(errors, data=data, valid_data=valid)
+        return valid
+
+    def load_many(self, records, partial=None, _valid_data=False):
+        """
+        Loads a batch and returns (valid_records, errors), where errors maps
+        the input index to the messages Schema.load(records, many=True) reports.
+        """
+        valid = []
+        errors = {}
+        for index, record in enumerate(records):
+            try:
+                valid.append(self._load_one(record, partial))
+            except ValidationError as e:
+                errors[index] = e.messages
+                if _valid_data:
+                    valid.append(e.valid_data)
+        return valid, errors
+
+
+@lru_cache(maxsize=None)
+def compiled_schema(schema_class):
+    """the compiled loader for a schema class, built on first use"""
+    return CompiledSchema(schema_class())
+
+
+def _benchmark(count=5000, rounds=3):
+    """times PlantSchema.load against the compiled loader on perenual-shaped records"""
+    from schemas import PlantSchema
+
+    def record(i):
+        return {
+            'id': i, 'common_name': f'Plant {i}', 'scientific_name': ['Abies alba'],
+            'other_name': ['Silver fir', 'European fir'], 'family': 'Pinaceae', 'origin': ['Europe'],
+            'type': 'tree', 'dimension': 'Height: 60 feet', 'dimensions': {'min': 60, 'max': 60},
+            'cycle': 'Perennial', 'watering': 'Frequent', 'sunlight': ['full sun', 'part shade'],
+            'propagation': ['Seed'], 'hardiness': {'min': '4', 'max': '6'},
+            'hardiness_location': {'full_url': 'https://perenual.com/map/1'},
+            'growth_rate': 'High', 'drought_tolerant': False, 'salt_tolerant': False, 'thorny': False,
+            'invasive': False, 'tropical': False, 'indoor': False, 'care_level': 'Medium',
+            'pest_susceptibility': [], 'flowers': False, 'flowering_season': None, 'flower_color': '',
+            'cones': True, 'fruits': False, 'edible_fruit': False, 'edible_fruit_taste_profile': '',
+            'fruit_nutritional_value': '', 'fruit_color': [], 'harvest_season': None, 'leaf': True,
+            'leaf_color': ['green'], 'edible_leaf': False, 'cuisine': False, 'medicinal': True,
+            'poisonous_to_humans': 0, 'poisonous_to_pets': 0, 'description': 'An evergreen conifer.',
+            'default_image': {'license': 45, 'regular_url': 'https://perenual.com/1.jpg'},
+            'other_images': 'Upgrade Plans To Premium/Supreme', 'watering_period': None,
+        }
+
+    records = [record(i) for i in range(count)]
+    schema = PlantSchema()
+    compiled = compiled_schema(PlantSchema)
+    assert compiled.load(records, many=True) == schema.load(records, many=True)
+
+    def timed(label, fn):
+        best = float('inf')
+        for _ in range(rounds):
+            started = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - started)
+        print(f"{label:<36} {best * 1e6 / count:8.2f} us / record")
+        return best
+
+    print(f"{count} records, best of {rounds}")
+    baseline = timed("PlantSchema.load(many=True)", lambda: schema.load(records, many=True))
+    timed("PlantSchema.load per record", lambda: [schema.load(r) for r in records])
+    fast = timed("compiled load_many", lambda: compiled.load_many(records))
+    print(f"speedup over many=True: {baseline / fast:.1f}x")
+
+
+if __name__ == "__main__":
+    _benchmark()
@@ -0,0 +1,268 @@
+# utils/search_index.py
+import json
+import re
+import threading
+import unicodedata
+from collections import defaultdict, Counter
+
+from sortedcontainers import SortedList
+
+# weight of a match by the field it came from
+FIELD_WEIGHTS = {
+    'common_name': 1.0,
+    'scientific_name': 0.8,
+    'other_name': 0.6,
+}
+
+EXACT_SCORE = 3.0
+PREFIX_SCORE = 2.0
+FUZZY_SCORE = 1.0
+FUZZY_THRESHOLD = 0.4  # minimum trigram similarity for a fuzzy match
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def normalize(text):
+    """lower case and strip accents so 'Érable' matches 'erable'"""
+    text = unicodedata.normalize('NFKD', text)
+    return ''.join(ch for ch in text if not unicodedata.combining(ch)).lower()
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall(normalize(text))
+
+
+def trigrams(token):
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def as_names(value):
+    """names arrive as strings, lists, or (from snowflake ARRAY columns) JSON text"""
+    if value is None:
+        return []
+    if isinstance(value, str):
+        stripped = value.strip()
+        if stripped.startswith('['):
+            try:
+                value = json.loads(stripped)
+            except ValueError:
+                return [value]
+        else:
+            return [value]
+    if isinstance(value, (list, tuple)):
+        return [str(item) for item in value if item]
+    return [str(value)]
+
+
+class SearchIndex:
+    """
+    In-process name index over plants: an inverted index of tokens for exact
+    and prefix matches plus a trigram index over the token vocabulary for
+    fuzzy matches. Safe to update from request threads.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._docs = {}                        # id -> {'common_name', 'scientific_name', 'phrase', 'tokens'}
+        self._postings = defaultdict(dict)     # token -> {id: best field weight}
+        self._vocabulary = SortedList()        # sorted tokens, for prefix scans
+        self._trigrams = defaultdict(set)      # trigram -> tokens containing it
+        self._gram_counts = {}                 # token -> number of distinct trigrams in it
+
+    def __len__(self):
+        return len(self._docs)
+
+    def _add_token(self, token, plant_id, weight):
+        postings = self._postings[token]
+        if not postings:
+            self._vocabulary.add(token)
+            grams = trigrams(token)
+            self._gram_counts[token] = len(grams)
+            for gram in grams:
+                self._trigrams[gram].add(token)
+        if weight > postings.get(plant_id, 0):
+            postings[plant_id] = weight
+
+    def _remove_token(self, token, plant_id):
+        postings = self._postings.get(token)
+        if postings is None:
+            return
+        postings.pop(plant_id, None)
+        if not postings:
+            del self._postings[token]
+            del self._gram_counts[token]
+            self._vocabulary.remove(token)
+            for gram in trigrams(token):
+                tokens = self._trigrams.get(gram)
+                if tokens is not None:
+                    tokens.discard(token)
+                    if not tokens:
+                        del self._trigrams[gram]
+
+    def add(self, plant):
+        """indexes (or re-indexes) one plant dict by its name fields"""
+        plant_id = plant['id']
+        tokens = {}
+        for field, weight in FIELD_WEIGHTS.items():
+            for name in as_names(plant.get(field)):
+                for token in tokenize(name):
+                    tokens[token] = max(weight, tokens.get(token, 0))
+
+        scientific = as_names(plant.get('scientific_name'))
+        with self._lock:
+            self._remove_locked(plant_id)
+            self._docs[plant_id] = {
+                'common_name': plant.get('common_name'),
+                'scientific_name': scientific[0] if scientific else None,
+                'phrase': ' '.join(tokenize(plant.get('common_name') or '')),
+                'tokens': tokens,
+            }
+            for token, weight in tokens.items():
+                self._add_token(token, plant_id, weight)
+
+    def _remove_locked(self, plant_id):
+        doc = self._docs.pop(plant_id, None)
+        if doc is not None:
+            for token in doc['tokens']:
+                self._remove_token(token, plant_id)
+
+    def remove(self, plant_id):
+        with self._lock:
+            self._remove_locked(plant_id)
+
+    def get(self, plant_id):
+        with self._lock:
+            doc = self._docs.get(plant_id)
+            return dict(doc) if doc is not None else None
+
+    def _fuzzy_tokens(self, token):
+        grams = trigrams(token)
+        overlap = Counter()
+        for gram in grams:
+            for candidate in self._trigrams.get(gram, ()):
+                overlap[candidate] += 1
+        matches = []
+        for candidate, shared in overlap.items():
+            similarity = shared / (len(grams) + self._gram_counts[candidate] - shared)
+            if similarity >= FUZZY_THRESHOLD:
+                matches.append((candidate, similarity))
+        return matches
+
+    def _token_scores(self, token, allow_prefix):
+        """best score per plant for one query token"""
+        scores = {}
+
+        def credit(candidate, base):
+            for plant_id, weight in self._postings[candidate].items():
+                score = base * weight
+                if score > scores.get(plant_id, 0):
+                    scores[plant_id] = score
+
+        if token in self._postings:
+            credit(token, EXACT_SCORE)
+        if allow_prefix:
+            for candidate in self._vocabulary.irange(minimum=token):
+                if not candidate.startswith(token):
+                    break
+                if candidate != token:
+                    credit(candidate, PREFIX_SCORE)
+        if len(token) >= 3:
+            for candidate, similarity in self._fuzzy_tokens(token):
+                if candidate != token:
+                    credit(candidate, FUZZY_SCORE * similarity)
+        return scores
+
+    def search(self, query, limit=10):
+        """
+        Ranks plants matching every query token. The last token is treated as
+        a prefix so partially typed words match while the user is typing.
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        with self._lock:
+            totals = None
+            for position, token in enumerate(tokens):
+                is_last = position == len(tokens) - 1
+                scores = self._token_scores(token, allow_prefix=is_last or len(token) >= 4)
+                if totals is None:
+                    totals = scores
+                else:
+                    totals = {plant_id: totals[plant_id] + score
+                              for plant_id, score in scores.items() if plant_id in totals}
+                if not totals:
+                    return []
+
+            phrase = ' '.join(tokens)
+            ranked = []
+            for plant_id, score in totals.items():
+                doc = self._docs[plant_id]
+                # whole-name matches outrank the same words buried in a longer name
+                if doc['phrase'] == phrase:
+                    score += EXACT_SCORE
+                elif doc['phrase'].startswith(phrase):
+                    score += PREFIX_SCORE / 2
+                ranked.append((score, plant_id, doc))
+
+        ranked.sort(key=lambda item: (-item[0], len(item[2]['common_name'] or ''), item[1]))
+        return [{
+            'id': plant_id,
+            'common_name': doc['common_name'],
+            'scientific_name': doc['scientific_name'],
+            'score': round(score, 4),
+        } for score, plant_id, doc in ranked[:limit]]
+
+
+def _synthetic_plants(count, seed=7):
+    """a catalog shaped like perenual's: two or three word common names, latin binomials"""
+    import random
+
+    rng = random.Random(seed)
+    adjectives = ['golden', 'dwarf', 'weeping', 'japanese', 'red', 'silver', 'creeping', 'giant',
+                  'sweet', 'wild', 'mountain', 'blue', 'variegated', 'common', 'european', 'rock']
+    nouns = ['maple', 'fir', 'rose', 'basil', 'aloe', 'fern', 'lily', 'pine', 'oak', 'sage',
+             'thyme', 'ivy', 'spruce', 'birch', 'willow', 'holly', 'juniper', 'laurel', 'poppy']
+    syllables = ['ab', 'ac', 'al', 'an', 'ar', 'bo', 'ca', 'da', 'el', 'fi', 'gi', 'la', 'li',
+                 'lo', 'ma', 'na', 'or', 'pi', 'qu', 'ra', 'sa', 'ta', 'ul', 've', 'xi', 'zo']
+
+    def latin(parts):
+        return ''.join(rng.choice(syllables) for _ in range(parts))
+
+    return [{
+        'id': plant_id,
+        'common_name': ' '.join(rng.sample(adjectives, rng.randint(1, 2)) + [rng.choice(nouns)]).title(),
+        'scientific_name': [f"{latin(3).title()} {latin(4)}"],
+        'other_name': [f"{rng.choice(adjectives)} {rng.choice(nouns)}"] if rng.random() < 0.5 else [],
+    } for plant_id in range(1, count + 1)]
+
+
+# queries like the autocomplete sends: exact, partially typed, multi-word and misspelt
+BENCHMARK_QUERIES = ['maple', 'japanese ma', 'j', 'weeping willow', 'golden', 'silvr birch',
+                     'rosemary', 'creeping jun', 'abal', 'mountain pine']
+
+
+def _benchmark(count=10102, rounds=20):
+    """times building the index over a perenual-sized catalog and the median search per query"""
+    import statistics
+    import time
+
+    plants = _synthetic_plants(count)
+    started = time.perf_counter()
+    index = SearchIndex()
+    for plant in plants:
+        index.add(plant)
+    print(f"built index over {count} plants in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    for query in BENCHMARK_QUERIES:
+        samples = []
+        for _ in range(rounds):
+            started = time.perf_counter()
+            index.search(query, limit=10)
+            samples.append((time.perf_counter() - started) * 1000)
+        print(f"{query!r:<18} median {statistics.median(samples):6.2f} ms   max {max(samples):6.2f} ms")
+
+
+if __name__ == "__main__":
+    _benchmark()
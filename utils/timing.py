@@ -0,0 +1,173 @@
+# utils/timing.py
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+from contextvars import ContextVar
+
+# off by default: when disabled no hooks are installed, /metrics answers 404 and every
+# timer below is a shared no-op context manager
+TIMING_ENABLED = os.getenv('TIMING_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+# the per-request breakdown also goes to clients as a Server-Timing header unless this is off
+TIMING_SERVER_TIMING_HEADER = os.getenv('TIMING_SERVER_TIMING_HEADER', 'true').lower() in ('1', 'true', 'yes')
+TIMING_BUCKETS = tuple(float(bound) for bound in os.getenv(
+    'TIMING_BUCKETS', '0.001,0.0025,0.005,0.01,0.025,0.05,0.1,0.25,0.5,1,2.5,5,10').split(','))
+
+_NOOP = nullcontext()
+# (name, seconds) spans of the request being served, None outside a timed request
+_spans = ContextVar('timing_spans', default=None)
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+class Histogram:
+    """a prometheus histogram: cumulative `le` buckets, a sum and a count per label set"""
+
+    def __init__(self, name, help_text, labelnames=(), buckets=TIMING_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # label values -> [per-bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, seconds, *labels):
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += seconds
+
+    def samples(self, *labels):
+        """(count, sum) for one label set, (0, 0.0) when nothing was observed"""
+        with self._lock:
+            series = self._series.get(labels)
+            return (sum(series[:-1]), series[-1]) if series else (0, 0.0)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = sorted((labels, list(values)) for labels, values in self._series.items())
+        for labels, values in series:
+            pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, labels)]
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), values):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else f'{bound:g}'
+                bucket_labels = ','.join(pairs + [f'le="{le}"'])
+                lines.append(f'{self.name}_bucket{{{bucket_labels}}} {cumulative}')
+            suffix = f'{{{",".join(pairs)}}}' if pairs else ''
+            lines.append(f'{self.name}_sum{suffix} {values[-1]:.6f}')
+            lines.append(f'{self.name}_count{suffix} {cumulative}')
+        return lines
+
+
+REQUEST_SECONDS = Histogram(
+    'pyplant_request_duration_seconds', 'Time spent handling a request.', ('endpoint', 'method', 'status'))
+DB_CHECKOUT_SECONDS = Histogram(
+    'pyplant_db_checkout_seconds', 'Time spent borrowing a connection from the snowflake pool.')
+DB_QUERY_SECONDS = Histogram(
+    'pyplant_db_query_seconds', 'Time spent executing snowflake queries, by service operation.', ('operation',))
+UPSTREAM_SECONDS = Histogram(
+    'pyplant_upstream_request_seconds', 'Time spent on perenual api calls, retries included.', ('endpoint',))
+SCHEMA_LOAD_SECONDS = Histogram(
+    'pyplant_schema_load_seconds', 'Time spent validating records with a schema.', ('schema',))
+JSON_ENCODE_SECONDS = Histogram(
+    'pyplant_json_encode_seconds', 'Time spent serializing JSON responses.')
+
+HISTOGRAMS = [REQUEST_SECONDS, DB_CHECKOUT_SECONDS, DB_QUERY_SECONDS, UPSTREAM_SECONDS,
+              SCHEMA_LOAD_SECONDS, JSON_ENCODE_SECONDS]
+
+
+def record(histogram, span, seconds, *labels):
+    """observes `seconds` and adds it to the current request's Server-Timing span `span`"""
+    histogram.observe(seconds, *labels)
+    spans = _spans.get()
+    if spans is not None:
+        spans.append((span, seconds))
+
+
+class _Timer:
+    __slots__ = ('histogram', 'span', 'labels', 'started')
+
+    def __init__(self, histogram, span, labels):
+        self.histogram = histogram
+        self.span = span
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        record(self.histogram, self.span, time.perf_counter() - self.started, *self.labels)
+
+
+def timer(histogram, span, *labels):
+    """`with timer(DB_QUERY_SECONDS, 'db-query', 'add_plant'):` times the block when timing is enabled"""
+    if not TIMING_ENABLED:
+        return _NOOP
+    return _Timer(histogram, span, labels)
+
+
+def start_request():
+    """starts collecting spans for the current request; returns a token for end_request"""
+    return _spans.set([])
+
+
+def end_request(token, total_seconds):
+    """stops collecting and returns the Server-Timing header value, or None when it is off"""
+    spans = _spans.get()
+    _spans.reset(token)
+    if not TIMING_SERVER_TIMING_HEADER:
+        return None
+    totals = {}
+    for span, seconds in spans or ():
+        totals[span] = totals.get(span, 0.0) + seconds
+    entries = [f'{span};dur={seconds * 1000:.1f}' for span, seconds in totals.items()]
+    entries.append(f'total;dur={total_seconds * 1000:.1f}')
+    return ', '.join(entries)
+
+
+def render_metrics():
+    """every histogram in the prometheus text exposition format"""
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.render())
+    return '\n'.join(lines) + '\n'
+
+
+def install_timing(app):
+    """times every flask request and sets Server-Timing; installs nothing when timing is disabled"""
+    if not TIMING_ENABLED:
+        return
+    from flask import g, request
+
+    @app.before_request
+    def start_request_timer():
+        g.timing_started = time.perf_counter()
+        g.timing_token = start_request()
+
+    @app.after_request
+    def finish_request_timer(response):
+        token = g.pop('timing_token', None)
+        if token is not None:
+            elapsed = time.perf_counter() - g.timing_started
+            REQUEST_SECONDS.observe(elapsed, request.endpoint or 'unmatched', request.method,
+                                    str(response.status_code))
+            header = end_request(token, elapsed)
+            if header:
+                response.headers['Server-Timing'] = header
+        return response
+
+    @app.teardown_request
+    def drop_request_timer(error=None):
+        # a request that never reached after_request must not leave its spans collecting
+        token = g.pop('timing_token', None)
+        if token is not None:
+            _spans.reset(token)